@@ -0,0 +1,63 @@
+"""
+Benchmark: list response serialization, old path vs fast path
+
+    python -m benchmarks.json_responses --rows 100000
+
+Old: dict(aiosqlite.Row) per row, then FastAPI's jsonable_encoder and the
+stdlib json encoder (what returning a plain dict from a route does).
+New: fetch_dicts() and FastJSONResponse (orjson when installed).
+Reads the donors table of DB_PATH.
+"""
+
+from database.db import get_db, close_db, fetch_dicts
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from routes.responses import FastJSONResponse, orjson
+import argparse
+import asyncio
+import json
+import time
+
+
+async def old_path(limit: int) -> bytes:
+    db = await get_db()
+    cursor = await db.execute("SELECT * FROM donors LIMIT ?", (limit,))
+    rows = await cursor.fetchall()
+    content = jsonable_encoder({"success": True, "data": [dict(row) for row in rows]})
+    return JSONResponse(content).body
+
+
+async def new_path(limit: int) -> bytes:
+    db = await get_db()
+    cursor = await db.execute("SELECT * FROM donors LIMIT ?", (limit,))
+    return FastJSONResponse({"success": True, "data": await fetch_dicts(cursor)}).body
+
+
+async def timed(fn, limit: int, repeat: int):
+    best, body = None, b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await fn(limit)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+
+async def main(limit: int, repeat: int):
+    old_seconds, old_body = await timed(old_path, limit, repeat)
+    new_seconds, new_body = await timed(new_path, limit, repeat)
+    await close_db()
+
+    same = json.loads(old_body) == json.loads(new_body)
+    rows = len(json.loads(new_body)["data"])
+    print(f"rows: {rows}  encoder: {'orjson' if orjson else 'json'}  identical payload: {same}")
+    print(f"old: {old_seconds * 1000:9.1f} ms  {len(old_body) / 1e6:6.1f} MB")
+    print(f"new: {new_seconds * 1000:9.1f} ms  {len(new_body) / 1e6:6.1f} MB  ({old_seconds / new_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare list response serialization paths")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
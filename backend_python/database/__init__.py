@@ -1,2 +1,3 @@
 """Database module initialization"""
-from .db import get_db, init_db, seed_data, seed_admin, close_db, pwd_context
+from .db import get_db, init_db, seed_data, seed_admin, close_db, pwd_context, startup_lock
+from .passwords import password_hasher, PasswordHasherBusy
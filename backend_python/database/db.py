@@ -5,16 +5,31 @@ Uses aiosqlite for async SQLite operations
 
 import aiosqlite
 import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from passlib.context import CryptContext
+from .passwords import pwd_context, password_hasher
+from monitoring.db import connect as instrumented_connect
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+try:
+    import fcntl
+except ImportError:  # Windows: single worker only
+    fcntl = None
 
 # Database path
 DB_DIR = Path(__file__).parent
 DB_PATH = os.environ.get("DB_PATH", str(DB_DIR / "blood_emergency.db"))
 
+# Tables whose writes bump a row in data_versions (via triggers, so every
+# write path counts: routes, jobs, imports and other worker processes)
+VERSIONED_TABLES = (
+    "donors", "hospitals", "blood_banks", "blood_inventory",
+    "blood_batches", "blood_requests", "organs",
+)
+
+# Callbacks told which tables a model method just wrote (this process only)
+_write_listeners = []
+
 # Global connection (will be initialized on startup)
 _db_connection = None
 
@@ -23,12 +38,62 @@ async def get_db():
     """Get database connection"""
     global _db_connection
     if _db_connection is None:
-        _db_connection = await aiosqlite.connect(DB_PATH)
+        _db_connection = await instrumented_connect(DB_PATH, "shared")
         _db_connection.row_factory = aiosqlite.Row
         await _db_connection.execute("PRAGMA foreign_keys = ON")
+        # Several worker processes may share the file: readers must not block
+        # the writer, and writers wait for the lock instead of failing
+        await _db_connection.execute("PRAGMA journal_mode = WAL")
+        await _db_connection.execute("PRAGMA busy_timeout = 5000")
     return _db_connection
 
 
+async def fetch_dicts(cursor) -> list:
+    """
+    Remaining rows of a cursor as plain dicts. Builds them straight from
+    tuples, which is much cheaper for large lists than dict(aiosqlite.Row).
+    """
+    cursor.row_factory = None
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+
+
+async def get_data_versions() -> dict:
+    """Current version of every table in VERSIONED_TABLES"""
+    db = await get_db()
+    cursor = await db.execute("SELECT table_name, version FROM data_versions")
+    cursor.row_factory = None
+    return dict(await cursor.fetchall())
+
+
+def add_write_listener(listener):
+    """Register a callback taking the tuple of table names a write touched"""
+    _write_listeners.append(listener)
+
+
+def tables_written(*tables: str):
+    """Called by model write methods once their changes are committed"""
+    for listener in _write_listeners:
+        listener(tables)
+
+
+@contextmanager
+def startup_lock():
+    """
+    Cross-process lock held while a worker runs schema setup, migrations
+    and seeding, so concurrently booting workers don't race each other.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(f"{DB_PATH}.startup.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
 async def init_db():
     """Initialize database with schema"""
     db = await get_db()
@@ -173,6 +238,176 @@ async def run_migrations(db):
         await db.commit()
     except Exception as e:
         print(f"Migration error (organs table): {e}")
+    
+    # Migration: Critical alert dispatch tracking and donor lookup indexes
+    try:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS alert_dispatches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                request_id INTEGER NOT NULL,
+                donor_id INTEGER NOT NULL,
+                wave INTEGER NOT NULL,
+                distance_km REAL,
+                sent_at REAL NOT NULL,
+                delivered_at REAL,
+                responded_at REAL,
+                response TEXT CHECK(response IN ('accepted', 'declined')),
+                FOREIGN KEY (request_id) REFERENCES blood_requests(id) ON DELETE CASCADE,
+                FOREIGN KEY (donor_id) REFERENCES donors(id) ON DELETE CASCADE,
+                UNIQUE(request_id, donor_id)
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_alert_dispatches_response ON alert_dispatches(request_id, response)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_donors_geo ON donors(blood_type, available, latitude, longitude)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_donors_city_type ON donors(city, blood_type, available)")
+        await db.commit()
+    except Exception as e:
+        print(f"Migration error (alert dispatches): {e}")
+    
+    # Migration: Donor notification blasts
+    try:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS donor_blasts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_by INTEGER,
+                filters TEXT NOT NULL,
+                channels TEXT NOT NULL,
+                message TEXT NOT NULL,
+                status TEXT DEFAULT 'queued' CHECK(status IN ('queued', 'running', 'completed', 'cancelled', 'failed')),
+                total INTEGER DEFAULT 0,
+                processed INTEGER DEFAULT 0,
+                sent TEXT,
+                skipped INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                FOREIGN KEY (created_by) REFERENCES users(id)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS blast_deliveries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                blast_id INTEGER NOT NULL,
+                donor_id INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                sent_at REAL NOT NULL,
+                FOREIGN KEY (blast_id) REFERENCES donor_blasts(id) ON DELETE CASCADE
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_blast_deliveries_donor ON blast_deliveries(donor_id, channel, sent_at)")
+        await db.commit()
+    except Exception as e:
+        print(f"Migration error (donor blasts): {e}")
+    
+    # Migration: Resume position for donor blasts run as background jobs
+    try:
+        cursor = await db.execute("PRAGMA table_info(donor_blasts)")
+        columns = await cursor.fetchall()
+        column_names = [col[1] for col in columns]
+        
+        if "last_donor_id" not in column_names:
+            print("Migrating: Adding last_donor_id column to donor_blasts table...")
+            await db.execute("ALTER TABLE donor_blasts ADD COLUMN last_donor_id INTEGER DEFAULT 0")
+            await db.commit()
+    except Exception as e:
+        print(f"Migration error (donor_blasts last_donor_id): {e}")
+    
+    # Migration: Token revocations (single tokens by jti, or all of a user's
+    # tokens issued before not_before)
+    try:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS token_revocations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                jti TEXT,
+                user_id INTEGER,
+                not_before REAL,
+                expires_at REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        await db.commit()
+    except Exception as e:
+        print(f"Migration error (token revocations): {e}")
+
+    # Migration: Refresh tokens (stored as SHA-256 digests; a family is one
+    # login's chain of rotated tokens)
+    try:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                token_hash TEXT NOT NULL UNIQUE,
+                user_id INTEGER NOT NULL,
+                family TEXT NOT NULL,
+                claims TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL,
+                revoked_at REAL
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens(family)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user ON refresh_tokens(user_id)")
+        await db.commit()
+    except Exception as e:
+        print(f"Migration error (refresh tokens): {e}")
+
+    # Migration: Bulk imports (uploaded CSV/NDJSON files processed as jobs)
+    try:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS data_imports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_by INTEGER,
+                entity TEXT NOT NULL,
+                format TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                file_size INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'queued' CHECK(status IN ('queued', 'running', 'completed', 'cancelled', 'failed')),
+                processed INTEGER DEFAULT 0,
+                inserted INTEGER DEFAULT 0,
+                duplicates INTEGER DEFAULT 0,
+                invalid INTEGER DEFAULT 0,
+                bytes_read INTEGER DEFAULT 0,
+                errors TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                FOREIGN KEY (created_by) REFERENCES users(id)
+            )
+        """)
+        # Duplicate checks look records up by phone and email
+        for table in ("donors", "hospitals", "blood_banks"):
+            await db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_phone ON {table}(phone)")
+            await db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_email ON {table}(email)")
+        await db.commit()
+    except Exception as e:
+        print(f"Migration error (data imports): {e}")
+
+    # Migration: Per-table data versions for conditional GETs. Versions start
+    # at the current time in ms, so ETags from a previous database never match
+    try:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS data_versions (
+                table_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
+        seed = int(time.time() * 1000)
+        for table in VERSIONED_TABLES:
+            await db.execute("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (?, ?)", (table, seed))
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                await db.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}';
+                    END
+                """)
+        await db.commit()
+    except Exception as e:
+        print(f"Migration error (data versions): {e}")
 
 
 async def seed_data():
@@ -273,7 +508,7 @@ async def seed_admin():
         
         if not existing:
             print("Seeding admin user...")
-            password_hash = pwd_context.hash(password)
+            password_hash = await password_hasher.hash(password)
             await db.execute(
                 "INSERT INTO users (email, password_hash, role) VALUES (?, ?, ?)",
                 (email, password_hash, role)
@@ -0,0 +1,136 @@
+"""
+Password Hashing for BEOS Python Backend
+bcrypt runs on a bounded thread pool so hashing never blocks the event loop
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from typing import Dict, Any, Optional
+import asyncio
+import os
+import time
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt calls running at once (bcrypt releases the GIL, so threads use several cores)
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Logins waiting or running before new ones are turned away
+LOGIN_MAX_PENDING = int(os.environ.get("LOGIN_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+# Longest a login waits for a hashing slot before it is turned away
+LOGIN_MAX_WAIT = float(os.environ.get("LOGIN_MAX_WAIT_SECONDS", "2"))
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when a login is not admitted (too many pending or waited too long)"""
+
+    def __init__(self, retry_after: float = 1.0):
+        super().__init__("Too many login attempts in progress, please retry shortly")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on `workers` threads. Callers wait for a slot on the event
+    loop (where the wait is measured), not in the executor's own queue.
+    Logins are admitted only while fewer than `login_max_pending` are in
+    flight and get a slot within `login_max_wait` seconds; registrations
+    and seeding always wait their turn.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, login_max_pending: int = LOGIN_MAX_PENDING,
+                 login_max_wait: float = LOGIN_MAX_WAIT):
+        self.workers = max(workers, 1)
+        self.login_max_pending = login_max_pending
+        self.login_max_wait = login_max_wait
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.running = 0
+        self.logins_pending = 0
+        self.stats = {
+            "hashed": 0, "verified": 0, "rejected": 0,
+            "lastQueueMs": None, "maxQueueMs": 0.0, "totalQueueMs": 0.0, "lastRunMs": None
+        }
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            self._slots = asyncio.Semaphore(self.workers)
+
+    async def _run(self, func, *args, max_wait: Optional[float] = None):
+        self._ensure_started()
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            if max_wait is None:
+                await self._slots.acquire()
+            else:
+                await asyncio.wait_for(self._slots.acquire(), max_wait)
+        finally:
+            self.waiting -= 1
+
+        queue_ms = (time.perf_counter() - queued_at) * 1000
+        self.stats["lastQueueMs"] = round(queue_ms, 2)
+        self.stats["maxQueueMs"] = round(max(self.stats["maxQueueMs"], queue_ms), 2)
+        self.stats["totalQueueMs"] += queue_ms
+        self.running += 1
+        try:
+            started = time.perf_counter()
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            self.stats["lastRunMs"] = round((time.perf_counter() - started) * 1000, 2)
+            return result
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """bcrypt hash of a password"""
+        result = await self._run(pwd_context.hash, password)
+        self.stats["hashed"] += 1
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Check a password against its hash (no admission control)"""
+        result = await self._run(pwd_context.verify, plain_password, hashed_password)
+        self.stats["verified"] += 1
+        return result
+
+    async def verify_login(self, plain_password: str, hashed_password: str) -> bool:
+        """Check a login password; raises PasswordHasherBusy when the login is not admitted"""
+        if self.logins_pending >= self.login_max_pending:
+            self.stats["rejected"] += 1
+            raise PasswordHasherBusy()
+        self.logins_pending += 1
+        try:
+            result = await self._run(pwd_context.verify, plain_password, hashed_password,
+                                     max_wait=self.login_max_wait)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            raise PasswordHasherBusy()
+        finally:
+            self.logins_pending -= 1
+        self.stats["verified"] += 1
+        return result
+
+    def shutdown(self):
+        """Stop the hashing threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool size, current queue and timing counters"""
+        completed = self.stats["hashed"] + self.stats["verified"]
+        return {
+            "workers": self.workers,
+            "waiting": self.waiting,
+            "running": self.running,
+            "loginsPending": self.logins_pending,
+            **{k: v for k, v in self.stats.items() if k != "totalQueueMs"},
+            "avgQueueMs": round(self.stats["totalQueueMs"] / completed, 2) if completed else None
+        }
+
+
+password_hasher = PasswordHasher()
@@ -3,20 +3,59 @@ Blood Emergency Platform - Python Backend
 FastAPI Application Entry Point
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import socketio
 import uvicorn
+import asyncio
+import os
 from datetime import datetime
 
-from database.db import init_db, seed_data, seed_admin
-from routes import auth, admin, donors, hospitals, blood_banks, requests, organs, ai
+from database.db import init_db, seed_data, seed_admin, close_db, startup_lock
+from database.passwords import password_hasher
+from middleware.tokens import revocation_list
+from middleware.etag import ETagMiddleware
+from middleware.response_cache import ResponseCacheMiddleware
+from monitoring.metrics import registry as metrics_registry
+from monitoring.http import MetricsMiddleware
+from monitoring.tracing import TracingMiddleware
+from monitoring.loop_lag import loop_lag_monitor, stall_watchdog
+from routes import auth, admin, donors, hospitals, blood_banks, requests, organs, ai, jobs, exports, imports
+from routes.responses import success
 from socket_handlers.handler import setup_socket_handlers
+from socket_handlers.event_bus import EventBus
+from socket_handlers.registry import ConnectionRegistry
+from socket_handlers.presence import PresenceRegistry
+from socket_handlers.backpressure import BackpressureServer
+from socket_handlers.rate_limit import RateLimiter
+from socket_handlers.manager import create_client_manager, close_client_manager, is_distributed
+from socket_handlers.stats_stream import StatsStream
+from services.alert_dispatcher import AlertDispatcher
+from services.blast_service import BlastService
+from services.import_service import ImportService
+from services.analytics_pool import analytics_pool
+from queues.job_queue import JobQueue, PRIORITY_LOW
+from queues.worker import WorkerPool, JOB_WORKERS, JOB_WORKERS_IN_PROCESS, parse_worker_spec, run_maintenance
+from models.blood_request import BloodRequest
+from models.donor import Donor
+
+# Number of uvicorn worker processes (python main.py)
+WORKERS = int(os.environ.get("WORKERS", "1"))
+# Bearer token required by /metrics (unset: open, e.g. behind a private network)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+# Seconds between scheduled inventory resync jobs
+INVENTORY_RESYNC_SECONDS = float(os.environ.get("INVENTORY_RESYNC_SECONDS", str(6 * 3600)))
 
 # Socket.IO setup
-sio = socketio.AsyncServer(
+client_manager = create_client_manager(workers=WORKERS)
+sio = BackpressureServer(
     async_mode='asgi',
+    client_manager=client_manager,
+    # Without sticky sessions, long-polling requests could hit another
+    # worker, so distributed deployments are websocket-only
+    transports=['websocket'] if is_distributed(client_manager) else ['polling', 'websocket'],
     cors_allowed_origins=[
         'http://localhost:5173',
         'http://127.0.0.1:5173',
@@ -32,13 +71,41 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     print("Initializing database...")
-    await init_db()
-    await seed_data()
-    await seed_admin()
+    with startup_lock():
+        await init_db()
+        await seed_data()
+        await seed_admin()
     print("Database initialized successfully!")
+    stats_stream.start()
+    loop_lag_monitor.start()
+    stall_watchdog.start()
+    analytics_pool.start()
+    revocation_list.start()
+    # Periodic inventory totals rebuild (one pending copy across all workers)
+    await job_queue.enqueue("inventory.resync", queue="default", priority=PRIORITY_LOW,
+                            delay=INVENTORY_RESYNC_SECONDS, repeat_every=INVENTORY_RESYNC_SECONDS,
+                            unique_key="inventory.resync")
+    for pool in worker_pools:
+        pool.start()
+    maintenance = asyncio.create_task(run_maintenance(job_queue))
     yield
     # Shutdown
     print("Shutting down...")
+    maintenance.cancel()
+    await stats_stream.stop()
+    await loop_lag_monitor.stop()
+    stall_watchdog.stop()
+    await revocation_list.stop()
+    await alert_dispatcher.stop()
+    await event_bus.stop()
+    for pool in worker_pools:
+        await pool.stop()
+    await job_queue.close()
+    password_hasher.shutdown()
+    analytics_pool.stop()
+    await close_client_manager(client_manager)
+    # The aiosqlite worker thread keeps the process alive until closed
+    await close_db()
 
 
 # Create FastAPI app
@@ -49,6 +116,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Cached responses for mostly static reads (innermost: a 304 never touches it)
+app.add_middleware(ResponseCacheMiddleware)
+
+# Conditional GETs: 304 for polls of unchanged data (inside CORS, so 304s
+# carry the CORS headers too)
+app.add_middleware(ETagMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -64,11 +138,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request traces: a span per request, model method and SQL statement
+app.add_middleware(TracingMiddleware, routes=app.routes)
+
+# Request latency per route template and requests in flight (outermost, so
+# 304s and cached responses are timed too)
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
+# Outbound event bus (coalesced, versioned entity updates); donors are only
+# ever sent with their public fields
+event_bus = EventBus(sio)
+event_bus.register_loader("request", BloodRequest.get_by_id)
+event_bus.register_loader("donor", Donor.get_public_by_id)
+
+metrics_registry.gauge("beos_socket_connected_clients", "Socket.IO clients connected to this process",
+                       collect=lambda: len(sio.eio.sockets))
+
+# Shared stats snapshot pushed to the `stats` room
+stats_stream = StatsStream(sio)
+
+# Inbound per-client/per-user/per-event limits
+rate_limiter = RateLimiter()
+registry = ConnectionRegistry()
+
+# Online donors by blood type and grid cell
+presence = PresenceRegistry()
+
+# Wave-by-wave alerts to eligible donors near critical requests
+alert_dispatcher = AlertDispatcher(sio, presence=presence)
+
+# Durable background jobs (AI computations, donor blasts, inventory resync)
+job_queue = JobQueue()
+
+# Chunked, throttled donor notification blasts, sent by `donor-blast` jobs
+blast_service = BlastService(sio, job_queue)
+# Bulk CSV/NDJSON imports, loaded by `data-import` jobs
+import_service = ImportService(job_queue)
+
+# Job workers inside this process (JOB_WORKERS_IN_PROCESS=0 leaves jobs to
+# standalone `python -m queues.worker` processes)
+worker_pools = [
+    WorkerPool(job_queue, pool["queues"], pool["concurrency"],
+               context={"sio": sio, "blast_service": blast_service, "import_service": import_service})
+    for pool in parse_worker_spec(JOB_WORKERS)
+] if JOB_WORKERS_IN_PROCESS else []
+
 # Store sio in app state for routes to access
 app.state.sio = sio
+app.state.event_bus = event_bus
+app.state.stats_stream = stats_stream
+app.state.rate_limiter = rate_limiter
+app.state.registry = registry
+app.state.presence = presence
+app.state.alert_dispatcher = alert_dispatcher
+app.state.blast_service = blast_service
+app.state.import_service = import_service
+app.state.job_queue = job_queue
+app.state.worker_pools = worker_pools
 
 # Setup socket handlers
-setup_socket_handlers(sio)
+setup_socket_handlers(sio, event_bus, stats_stream, rate_limiter, registry, alert_dispatcher, presence)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -79,6 +208,9 @@ app.include_router(blood_banks.router, prefix="/api/blood-banks", tags=["Blood B
 app.include_router(requests.router, prefix="/api/requests", tags=["Blood Requests"])
 app.include_router(organs.router, prefix="/api/organs", tags=["Organs (Enterprise)"])
 app.include_router(ai.router, prefix="/api/ai", tags=["AI Services (Enterprise)"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Background Jobs"])
+app.include_router(exports.router, prefix="/api/exports", tags=["Data Exports"])
+app.include_router(imports.router, prefix="/api/imports", tags=["Data Imports"])
 
 
 @app.get("/")
@@ -100,6 +232,14 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus metrics of this process"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail={"success": False, "error": "Invalid metrics token"})
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/dashboard")
 async def get_dashboard():
     """Dashboard statistics"""
@@ -116,9 +256,9 @@ async def get_dashboard():
             "inventory": await BloodBank.get_total_inventory(),
             "criticalRequests": await BloodRequest.get_critical()
         }
-        return {"success": True, "data": stats}
+        return success(stats)
     except Exception as e:
-        return {"success": False, "error": str(e)}
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
 
 # Create ASGI application with Socket.IO
@@ -144,4 +284,9 @@ if __name__ == "__main__":
 ║                                                           ║
 ╚═══════════════════════════════════════════════════════════╝
     """)
-    uvicorn.run(socket_app, host="0.0.0.0", port=5000)
+    port = int(os.environ.get("PORT", "5000"))
+    if WORKERS > 1:
+        # Worker processes import the app themselves
+        uvicorn.run("main:socket_app", host="0.0.0.0", port=port, workers=WORKERS)
+    else:
+        uvicorn.run(socket_app, host="0.0.0.0", port=port)
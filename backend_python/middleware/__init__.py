@@ -1,2 +1,2 @@
 """Middleware module initialization"""
-from .auth import verify_token, optional_verify_token, authorize_roles, create_access_token
+from .auth import verify_token, optional_verify_token, authorize_roles, create_access_token, decode_token, resolve_profile_id
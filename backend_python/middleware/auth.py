@@ -5,16 +5,59 @@ Authentication Middleware for BEOS Python Backend
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
+from middleware.tokens import token_cache, revocation_list
+from models.donor import Donor
+from models.hospital import Hospital
+from models.blood_bank import BloodBank
 from typing import Optional, List
 import os
+import time
+import uuid
 
 # JWT Configuration
 JWT_SECRET = os.environ.get("JWT_SECRET", "your-secret-key")
 JWT_ALGORITHM = "HS256"
+# Access tokens are short-lived; clients renew them at /api/auth/refresh
+ACCESS_TOKEN_MINUTES = float(os.environ.get("ACCESS_TOKEN_MINUTES", "15"))
 
 security = HTTPBearer(auto_error=False)
 
 
+# Profile ID claim carried in tokens, by role
+PROFILE_CLAIMS = {"user": "donor_id", "donor": "donor_id", "hospital": "hospital_id", "blood_bank": "blood_bank_id"}
+
+
+def decode_token(token: str) -> dict:
+    """
+    Decode and verify a JWT; raises JWTError when invalid, expired or
+    revoked. Verified payloads are cached until they expire, so repeat
+    requests skip the signature check.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        token_cache.put(token, payload)
+    if revocation_list.is_revoked(payload):
+        raise JWTError("Token has been revoked")
+    return payload
+
+
+async def resolve_profile_id(user: dict) -> Optional[int]:
+    """
+    The donor/hospital/blood bank ID of the user: the token claim, or a
+    lookup for tokens issued before the profile existed
+    """
+    claim = PROFILE_CLAIMS.get(user.get("role"))
+    if claim is None:
+        return None
+    if user.get(claim) is not None:
+        return user[claim]
+
+    model = {"donor_id": Donor, "hospital_id": Hospital, "blood_bank_id": BloodBank}[claim]
+    profile = await model.get_by_user_id(user["id"])
+    return profile["id"] if profile else None
+
+
 async def verify_token(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -29,7 +72,7 @@ async def verify_token(
     token = credentials.credentials
     
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = decode_token(token)
         request.state.user = payload
         return payload
     except JWTError:
@@ -51,7 +94,7 @@ async def optional_verify_token(
     token = credentials.credentials
     
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = decode_token(token)
         request.state.user = payload
         return payload
     except JWTError:
@@ -75,11 +118,14 @@ def authorize_roles(*roles: str):
 
 
 def create_access_token(data: dict) -> str:
-    """Create JWT access token"""
+    """Create JWT access token (with iat, iat_us and a unique jti for revocation)"""
     from datetime import datetime, timedelta
     
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=24)
-    to_encode.update({"exp": expire})
+    issued = time.time()
+    now = datetime.utcfromtimestamp(issued)
+    expire = now + timedelta(minutes=ACCESS_TOKEN_MINUTES)
+    # iat_us: revoke_user cutoffs are sub-second, iat is whole seconds
+    to_encode.update({"exp": expire, "iat": now, "iat_us": int(issued * 1_000_000), "jti": uuid.uuid4().hex})
     
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
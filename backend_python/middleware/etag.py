@@ -0,0 +1,120 @@
+"""
+Conditional GETs for BEOS Python Backend
+ETags derived from the data versions a response depends on
+"""
+
+from database.db import get_data_versions
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
+import re
+
+# (path pattern, tables the response is built from); first match wins and
+# an empty tuple leaves the route alone
+ETAG_ROUTES: List[Tuple[str, Tuple[str, ...]]] = [
+    # Alert progress changes with every dispatch, not with table writes
+    (r"^/api/requests/\d+/alerts$", ()),
+    (r"^/api/requests/\d+/matches$", ("blood_requests", "donors")),
+    (r"^/api/requests(/.*)?$", ("blood_requests", "hospitals")),
+    (r"^/api/blood-banks(/.*)?$", ("blood_banks", "blood_inventory", "blood_batches")),
+    (r"^/api/organs(/.*)?$", ("organs", "donors", "hospitals", "blood_requests")),
+    (r"^/api/dashboard$", ("donors", "hospitals", "blood_requests", "blood_inventory")),
+]
+
+# Shared by every instance (Starlette builds the middleware itself, so the
+# admin endpoint can't reach the instance)
+etag_stats = {"checked": 0, "notModified": 0, "tagged": 0}
+
+
+class ETagMiddleware:
+    """
+    Answers `If-None-Match` with 304 Not Modified before the route runs, so
+    unchanged polls cost one lookup of the data_versions table instead of
+    the query and serialization. Versions are read before the route does,
+    so a write that lands in between only ever makes the next poll return
+    the full payload again, never a 304 over newer data.
+
+    The ETag also covers the URL (path and query) and the Authorization
+    header, since some of these routes answer per user. Responses carry
+    `Cache-Control: no-cache`, so browsers revalidate every poll and turn
+    a 304 into their cached copy without any client code.
+    """
+
+    def __init__(self, app, routes: List[Tuple[str, Tuple[str, ...]]] = None):
+        self.app = app
+        self.routes = [(re.compile(pattern), tables) for pattern, tables in (routes or ETAG_ROUTES)]
+        self.stats = etag_stats
+
+    def _tables(self, path: str) -> Tuple[str, ...]:
+        for pattern, tables in self.routes:
+            if pattern.match(path):
+                return tables
+        return ()
+
+    @staticmethod
+    def _header(scope, name: bytes) -> Optional[bytes]:
+        for key, value in scope["headers"]:
+            if key == name:
+                return value
+        return None
+
+    @staticmethod
+    def compute_etag(path: str, query: bytes, authorization: Optional[bytes],
+                     versions: Dict[str, int], tables: Tuple[str, ...]) -> str:
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(path.encode())
+        digest.update(b"?" + query)
+        digest.update(b"\0" + (authorization or b""))
+        for table in tables:
+            digest.update(f"\0{table}={versions.get(table, 0)}".encode())
+        return f'W/"{digest.hexdigest()}"'
+
+    @staticmethod
+    def matches(if_none_match: bytes, etag: str) -> bool:
+        candidates = [tag.strip() for tag in if_none_match.decode("latin-1").split(",")]
+        # Weak comparison: W/"x" and "x" are the same tag
+        return "*" in candidates or etag[2:] in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        tables = self._tables(scope["path"])
+        if not tables:
+            await self.app(scope, receive, send)
+            return
+
+        self.stats["checked"] += 1
+        try:
+            versions = await get_data_versions()
+        except Exception as e:
+            print(f"ETag version lookup failed: {e}")
+            await self.app(scope, receive, send)
+            return
+        etag = self.compute_etag(
+            scope["path"], scope.get("query_string", b""),
+            self._header(scope, b"authorization"), versions, tables
+        )
+        headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", b"no-cache"),
+            (b"vary", b"Authorization"),
+        ]
+
+        if_none_match = self._header(scope, b"if-none-match")
+        if if_none_match and self.matches(if_none_match, etag):
+            self.stats["notModified"] += 1
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_tagged(message: Dict[str, Any]):
+            # Only successful responses are tagged; errors are never reused
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message["headers"] = [
+                    (key, value) for key, value in message.get("headers", [])
+                    if key.lower() not in (b"etag", b"cache-control")
+                ] + headers
+                self.stats["tagged"] += 1
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
@@ -0,0 +1,198 @@
+"""
+Response Cache for BEOS Python Backend
+Caches GET responses of mostly static read endpoints, invalidated by table tags
+"""
+
+from collections import OrderedDict
+from database.db import get_data_versions, add_write_listener
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import re
+import time
+
+# Memory bound for cached response bodies (least recently used are dropped)
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# Longest a cached response may be served after a write made by another
+# process (jobs, imports, other workers); writes made through this
+# process's models drop entries immediately
+RESPONSE_CACHE_STALENESS_SECONDS = float(os.environ.get("RESPONSE_CACHE_STALENESS_SECONDS", "2"))
+
+# (path pattern, TTL seconds, tags = tables the response is built from,
+# scope): "public" responses are shared by every caller, "user" ones are
+# cached per Authorization header
+CACHE_ROUTES: List[Tuple[str, float, Tuple[str, ...], str]] = [
+    (r"^/api/hospitals/?$", 300, ("hospitals",), "public"),
+    # ?inventory=true embeds each bank's inventory
+    (r"^/api/blood-banks/?$", 300, ("blood_banks", "blood_inventory", "blood_batches"), "public"),
+    (r"^/api/blood-banks/inventory/total$", 60, ("blood_inventory",), "public"),
+    (r"^/api/organs/stats$", 60, ("organs",), "public"),
+    (r"^/api/donors/stats$", 60, ("donors",), "public"),
+]
+
+
+class ResponseCache:
+    """
+    Cached responses keyed by path, query and auth scope. Each entry keeps
+    the versions of its tags from before the route ran: a version from the
+    data_versions table (re-read at most every RESPONSE_CACHE_STALENESS_SECONDS)
+    and a local generation bumped by model writes in this process. An entry
+    is served only while both still match and its TTL has not run out.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 staleness: float = RESPONSE_CACHE_STALENESS_SECONDS):
+        self.max_bytes = max_bytes
+        self.staleness = staleness
+        self.bytes = 0
+        self._entries: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}
+        self._synced_at = float("-inf")
+        self._sync_lock = asyncio.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "stored": 0, "evicted": 0, "invalidations": 0}
+        add_write_listener(self.invalidate)
+
+    async def _sync(self):
+        """Re-read data versions once they are older than the staleness bound"""
+        if time.monotonic() - self._synced_at <= self.staleness:
+            return
+        async with self._sync_lock:
+            if time.monotonic() - self._synced_at <= self.staleness:
+                return
+            started = time.monotonic()
+            self._versions = await get_data_versions()
+            self._synced_at = started
+
+    async def snapshot(self, tags: Tuple[str, ...]) -> tuple:
+        """Current versions of `tags`"""
+        await self._sync()
+        return tuple((self._versions.get(tag), self._generations.get(tag, 0)) for tag in tags)
+
+    async def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if entry["expires"] <= time.monotonic() or entry["snapshot"] != await self.snapshot(entry["tags"]):
+            self._remove(key)
+            self.stats["stale"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry
+
+    def put(self, key: bytes, tags: Tuple[str, ...], snapshot: tuple, ttl: float,
+            status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        # A write through this process while the route ran makes the
+        # response's data unknown; it is not stored
+        if any(generation != self._generations.get(tag, 0) for tag, (_, generation) in zip(tags, snapshot)):
+            return
+        self._remove(key)
+        self._entries[key] = {
+            "tags": tags, "snapshot": snapshot, "expires": time.monotonic() + ttl,
+            "status": status, "headers": headers, "body": body
+        }
+        self.bytes += len(body)
+        self.stats["stored"] += 1
+        while self.bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.stats["evicted"] += 1
+
+    def invalidate(self, tables: Tuple[str, ...]):
+        """Write listener: drop every entry tagged with one of `tables`"""
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+        self.stats["invalidations"] += 1
+        for key in [key for key, entry in self._entries.items() if set(entry["tags"]) & set(tables)]:
+            self._remove(key)
+
+    def _remove(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry["body"])
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hitRatio": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            **self.stats
+        }
+
+
+response_cache = ResponseCache()
+
+
+class ResponseCacheMiddleware:
+    """Serves CACHE_ROUTES from `response_cache`; other requests pass through"""
+
+    def __init__(self, app, cache: ResponseCache = None, routes: List[Tuple[str, float, Tuple[str, ...], str]] = None):
+        self.app = app
+        self.cache = cache or response_cache
+        self.routes = [(re.compile(pattern), ttl, tags, scope) for pattern, ttl, tags, scope in (routes or CACHE_ROUTES)]
+
+    def _route(self, path: str):
+        for pattern, ttl, tags, scope in self.routes:
+            if pattern.match(path):
+                return ttl, tags, scope
+        return None
+
+    @staticmethod
+    def _key(scope, auth_scope: str) -> bytes:
+        # Parameter order doesn't change the response
+        query = b"&".join(sorted(scope.get("query_string", b"").split(b"&")))
+        key = scope["path"].encode() + b"?" + query
+        if auth_scope == "user":
+            authorization = next((v for k, v in scope["headers"] if k == b"authorization"), b"")
+            key += b"\0" + hashlib.blake2b(authorization, digest_size=16).digest()
+        return key
+
+    async def __call__(self, scope, receive, send):
+        route = self._route(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if route is None or self.cache.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        ttl, tags, auth_scope = route
+        key = self._key(scope, auth_scope)
+        try:
+            entry = await self.cache.get(key)
+            # Taken before the route runs, like the ETags
+            snapshot = None if entry else await self.cache.snapshot(tags)
+        except Exception as e:
+            print(f"Response cache lookup failed: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if entry is not None:
+            await send({
+                "type": "http.response.start", "status": entry["status"],
+                "headers": entry["headers"] + [(b"x-cache", b"HIT")]
+            })
+            await send({"type": "http.response.body", "body": entry["body"]})
+            return
+
+        start: Dict[str, Any] = {}
+        chunks: List[bytes] = []
+
+        async def send_capture(message: Dict[str, Any]):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, send_capture)
+
+        body = b"".join(chunks)
+        if start.get("status") == 200 and len(body) <= self.cache.max_bytes // 4:
+            self.cache.put(key, tags, snapshot, ttl, 200, list(start.get("headers", [])), body)
@@ -0,0 +1,181 @@
+"""
+Token Cache and Revocation List for BEOS Python Backend
+"""
+
+from collections import OrderedDict
+from database.db import get_db
+from models.refresh_token import RefreshToken
+from typing import Dict, Any, Optional
+import asyncio
+import hashlib
+import os
+import time
+
+# Verified token payloads kept in memory (least recently used are dropped)
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", "10000"))
+# How often revocations made by other worker processes are picked up
+TOKEN_REVOCATION_SYNC_SECONDS = float(os.environ.get("TOKEN_REVOCATION_SYNC_SECONDS", "5"))
+# Longest an access token can live (tokens issued before ACCESS_TOKEN_MINUTES
+# existed last 24 hours); revocations are kept this long
+TOKEN_MAX_LIFETIME_SECONDS = 24 * 3600
+
+
+def token_key(token: str) -> bytes:
+    """Cache key: a short digest, so raw tokens are never held in memory"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class TokenCache:
+    """LRU of verified JWT payloads; an entry is never served past the token's `exp`"""
+
+    def __init__(self, max_size: int = JWT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0}
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """A copy of the cached payload, or None"""
+        key = token_key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        payload, exp = entry
+        if exp <= time.time():
+            del self._entries[key]
+            self.stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return dict(payload)
+
+    def put(self, token: str, payload: Dict[str, Any]):
+        """Cache a payload that was just verified"""
+        exp = payload.get("exp")
+        if not exp or self.max_size <= 0:
+            return
+        self._entries[token_key(token)] = (dict(payload), exp)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), **self.stats}
+
+
+class RevocationList:
+    """
+    Revoked tokens (by `jti`) and per-user cutoffs (tokens issued before
+    `not_before`). Checks are in-memory; revocations are stored in the
+    token_revocations table and other workers pick them up every
+    TOKEN_REVOCATION_SYNC_SECONDS.
+    """
+
+    def __init__(self, sync_interval: float = TOKEN_REVOCATION_SYNC_SECONDS):
+        self.sync_interval = sync_interval
+        # jti -> token expiry
+        self._jtis: Dict[str, float] = {}
+        # user ID -> not_before (epoch seconds, sub-second precision)
+        self._user_cutoffs: Dict[int, float] = {}
+        self._last_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """True when the token's jti was revoked or it predates its user's cutoff"""
+        jti = payload.get("jti")
+        if jti is not None and jti in self._jtis:
+            return True
+        cutoff = self._user_cutoffs.get(payload.get("id"))
+        if cutoff is None:
+            return False
+        # iat is whole seconds, so a token issued earlier in the cutoff's
+        # second would pass a plain iat check; iat_us places it exactly
+        issued = payload["iat_us"] / 1_000_000 if "iat_us" in payload else payload.get("iat", 0)
+        return issued <= cutoff
+
+    async def revoke_token(self, payload: Dict[str, Any]):
+        """Revoke a single token (e.g. logout)"""
+        jti = payload.get("jti")
+        if not jti:
+            # Tokens issued before jti existed can only be revoked per user
+            await self.revoke_user(payload["id"])
+            return
+        expires_at = payload.get("exp") or time.time() + TOKEN_MAX_LIFETIME_SECONDS
+        self._jtis[jti] = expires_at
+        await self._store(jti, payload.get("id"), None, expires_at)
+
+    async def revoke_user(self, user_id: int):
+        """Revoke every token of a user issued up to now, refresh tokens included (password or role change)"""
+        not_before = time.time()
+        self._user_cutoffs[user_id] = max(self._user_cutoffs.get(user_id, 0), not_before)
+        await self._store(None, user_id, not_before, time.time() + TOKEN_MAX_LIFETIME_SECONDS)
+        await RefreshToken.revoke_user(user_id)
+
+    async def _store(self, jti: Optional[str], user_id: Optional[int], not_before: Optional[float], expires_at: float):
+        db = await get_db()
+        await db.execute(
+            """INSERT INTO token_revocations (jti, user_id, not_before, expires_at, created_at)
+            VALUES (?, ?, ?, ?, ?)""",
+            (jti, user_id, not_before, expires_at, time.time())
+        )
+        await db.commit()
+
+    async def sync(self):
+        """Load revocations stored since the last sync and drop expired ones"""
+        db = await get_db()
+        now = time.time()
+        cursor = await db.execute(
+            """SELECT id, jti, user_id, not_before, expires_at FROM token_revocations
+            WHERE id > ? AND expires_at > ? ORDER BY id""",
+            (self._last_id, now)
+        )
+        for row_id, jti, user_id, not_before, expires_at in await cursor.fetchall():
+            self._last_id = row_id
+            if jti:
+                self._jtis[jti] = expires_at
+            elif user_id is not None:
+                self._user_cutoffs[user_id] = max(self._user_cutoffs.get(user_id, 0), not_before)
+
+        # Tokens that expired no longer need a revocation entry
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        cutoff_age = now - TOKEN_MAX_LIFETIME_SECONDS
+        self._user_cutoffs = {u: nb for u, nb in self._user_cutoffs.items() if nb > cutoff_age}
+
+    def start(self):
+        """Start syncing with the database"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync_loop(self):
+        try:
+            await self.prune()
+        except Exception as e:
+            print(f"Token revocation prune error: {e}")
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Token revocation sync error: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    async def prune(self):
+        """Delete expired revocations and refresh tokens from the database"""
+        db = await get_db()
+        await db.execute("DELETE FROM token_revocations WHERE expires_at <= ?", (time.time(),))
+        await db.commit()
+        await RefreshToken.prune()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"revokedTokens": len(self._jtis), "revokedUsers": len(self._user_cutoffs)}
+
+
+token_cache = TokenCache()
+revocation_list = RevocationList()
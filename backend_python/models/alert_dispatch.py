@@ -0,0 +1,109 @@
+"""
+Alert Dispatch Model for BEOS Python Backend
+"""
+
+from database.db import get_db
+from monitoring.tracing import trace_methods
+from typing import Optional, Dict, Any, List
+import time
+
+
+@trace_methods
+class AlertDispatch:
+    """Per-donor record of a critical alert: when it was sent, delivered and answered"""
+
+    @staticmethod
+    async def record_wave(request_id: int, wave: int, donors: List[Dict[str, Any]], sent_at: float = None):
+        """Record one wave of alerts in a single transaction"""
+        db = await get_db()
+        sent_at = sent_at or time.time()
+        await db.executemany(
+            """INSERT OR IGNORE INTO alert_dispatches (request_id, donor_id, wave, distance_km, sent_at)
+            VALUES (?, ?, ?, ?, ?)""",
+            [(request_id, d["id"], wave, d.get("distance_km"), sent_at) for d in donors]
+        )
+        await db.commit()
+
+    @staticmethod
+    async def mark_delivered(request_id: int, donor_id: int) -> bool:
+        """Record that the donor's client received the alert"""
+        db = await get_db()
+        cursor = await db.execute(
+            """UPDATE alert_dispatches SET delivered_at = ?
+            WHERE request_id = ? AND donor_id = ? AND delivered_at IS NULL""",
+            (time.time(), request_id, donor_id)
+        )
+        await db.commit()
+        return cursor.rowcount > 0
+
+    @staticmethod
+    async def record_response(request_id: int, donor_id: int, accepted: bool) -> Optional[Dict[str, Any]]:
+        """Record a donor's accept/decline (first answer wins)"""
+        db = await get_db()
+        now = time.time()
+        cursor = await db.execute(
+            """UPDATE alert_dispatches
+            SET response = ?, responded_at = ?, delivered_at = COALESCE(delivered_at, ?)
+            WHERE request_id = ? AND donor_id = ? AND response IS NULL""",
+            ("accepted" if accepted else "declined", now, now, request_id, donor_id)
+        )
+        await db.commit()
+        if cursor.rowcount == 0:
+            return None
+        cursor = await db.execute(
+            "SELECT * FROM alert_dispatches WHERE request_id = ? AND donor_id = ?",
+            (request_id, donor_id)
+        )
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+    @staticmethod
+    async def count_accepted(request_id: int) -> int:
+        """Number of donors who accepted the alert"""
+        db = await get_db()
+        cursor = await db.execute(
+            "SELECT COUNT(*) FROM alert_dispatches WHERE request_id = ? AND response = 'accepted'",
+            (request_id,)
+        )
+        return (await cursor.fetchone())[0]
+
+    @staticmethod
+    async def get_pending_donor_ids(request_id: int) -> List[int]:
+        """Donors alerted for a request who have not answered yet"""
+        db = await get_db()
+        cursor = await db.execute(
+            "SELECT donor_id FROM alert_dispatches WHERE request_id = ? AND response IS NULL",
+            (request_id,)
+        )
+        rows = await cursor.fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    async def get_summary(request_id: int) -> Dict[str, Any]:
+        """Per-wave counts and delivery/response latencies for a request"""
+        db = await get_db()
+        cursor = await db.execute(
+            """SELECT wave,
+                COUNT(*) as sent,
+                COUNT(delivered_at) as delivered,
+                SUM(response = 'accepted') as accepted,
+                SUM(response = 'declined') as declined,
+                MAX(distance_km) as max_distance_km,
+                AVG(delivered_at - sent_at) * 1000 as avg_delivery_ms,
+                AVG(responded_at - sent_at) as avg_response_seconds
+            FROM alert_dispatches
+            WHERE request_id = ?
+            GROUP BY wave
+            ORDER BY wave""",
+            (request_id,)
+        )
+        waves = [dict(row) for row in await cursor.fetchall()]
+
+        return {
+            "request_id": request_id,
+            "waves": waves,
+            "sent": sum(w["sent"] for w in waves),
+            "delivered": sum(w["delivered"] for w in waves),
+            "accepted": sum(w["accepted"] or 0 for w in waves),
+            "declined": sum(w["declined"] or 0 for w in waves)
+        }
@@ -2,10 +2,12 @@
 BloodBank Model for BEOS Python Backend
 """
 
-from database.db import get_db
+from database.db import get_db, fetch_dicts, tables_written
+from monitoring.tracing import trace_methods
 from typing import Optional, Dict, Any, List
 
 
+@trace_methods
 class BloodBank:
     """Blood Bank model with inventory management"""
     
@@ -30,8 +32,7 @@ class BloodBank:
         query += " ORDER BY name ASC"
         
         cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def get_by_id(bank_id: int) -> Optional[Dict[str, Any]]:
@@ -64,8 +65,7 @@ class BloodBank:
             ORDER BY blood_type""",
             (bank_id,)
         )
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def get_by_user_id(user_id: int) -> Optional[Dict[str, Any]]:
@@ -108,8 +108,56 @@ class BloodBank:
             )
         
         await db.commit()
+        tables_written("blood_banks", "blood_inventory")
         return {"id": bank_id, **blood_bank}
     
+    @staticmethod
+    async def bulk_create(records: List[Dict[str, Any]], db=None) -> int:
+        """
+        Insert many validated blood banks with one executemany; the caller
+        commits and then calls tables_written. `db` defaults to the
+        shared connection.
+        """
+        db = db or await get_db()
+        cursor = await db.execute("SELECT COALESCE(MAX(id), 0) FROM blood_banks")
+        last_id = (await cursor.fetchone())[0]
+        await db.executemany(
+            """INSERT INTO blood_banks (user_id, name, address, city, phone, email, latitude, longitude, operating_hours)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(
+                r.get("user_id"),
+                r.get("name"),
+                r.get("address"),
+                r.get("city"),
+                r.get("phone"),
+                r.get("email"),
+                r.get("latitude"),
+                r.get("longitude"),
+                r.get("operating_hours")
+            ) for r in records]
+        )
+        # Every bank starts with an empty inventory row per blood type
+        await db.execute(
+            """INSERT INTO blood_inventory (blood_bank_id, blood_type, units)
+            SELECT b.id, t.column1, 0 FROM blood_banks b
+            CROSS JOIN (VALUES ('A+'), ('A-'), ('B+'), ('B-'), ('AB+'), ('AB-'), ('O+'), ('O-')) t
+            WHERE b.id > ? AND NOT EXISTS (SELECT 1 FROM blood_inventory i WHERE i.blood_bank_id = b.id)""",
+            (last_id,)
+        )
+        return len(records)
+    
+    @staticmethod
+    async def find_existing_contacts(phones: List[str], emails: List[str], db=None) -> set:
+        """Phones and emails (of the given ones) already registered"""
+        db = db or await get_db()
+        found = set()
+        for column, values in (("phone", phones), ("email", emails)):
+            if values:
+                placeholders = ','.join('?' for _ in values)
+                cursor = await db.execute(f"SELECT {column} FROM blood_banks WHERE {column} IN ({placeholders})", values)
+                found.update(row[0] for row in await cursor.fetchall())
+        return found
+    
     @staticmethod
     async def update(bank_id: int, blood_bank: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a blood bank"""
@@ -149,6 +197,7 @@ class BloodBank:
         params.append(bank_id)
         await db.execute(f"UPDATE blood_banks SET {', '.join(fields)} WHERE id = ?", params)
         await db.commit()
+        tables_written("blood_banks")
         
         return await BloodBank.get_by_id(bank_id)
     
@@ -163,6 +212,7 @@ class BloodBank:
             (units, bank_id, blood_type)
         )
         await db.commit()
+        tables_written("blood_inventory")
         return await BloodBank.get_inventory(bank_id)
     
     @staticmethod
@@ -172,6 +222,7 @@ class BloodBank:
         await db.execute("DELETE FROM blood_inventory WHERE blood_bank_id = ?", (bank_id,))
         await db.execute("DELETE FROM blood_banks WHERE id = ?", (bank_id,))
         await db.commit()
+        tables_written("blood_banks", "blood_inventory")
         return True
     
     @staticmethod
@@ -199,8 +250,7 @@ class BloodBank:
             ORDER BY bi.units DESC""",
             (blood_type, min_units)
         )
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     # --- Batch Management System ---
     
@@ -214,8 +264,7 @@ class BloodBank:
             ORDER BY expiry_date ASC""",
             (bank_id,)
         )
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def add_batch(bank_id: int, blood_type: str, units: int, expiry_date: str) -> Dict[str, Any]:
@@ -227,6 +276,7 @@ class BloodBank:
             (bank_id, blood_type, units, expiry_date)
         )
         await db.commit()
+        tables_written("blood_batches")
         
         await BloodBank.sync_inventory(bank_id, blood_type)
         
@@ -263,6 +313,7 @@ class BloodBank:
             params.append(batch_id)
             await db.execute(f"UPDATE blood_batches SET {', '.join(fields)} WHERE id = ?", params)
             await db.commit()
+            tables_written("blood_batches")
             await BloodBank.sync_inventory(batch["blood_bank_id"], batch["blood_type"])
         
         cursor = await db.execute("SELECT * FROM blood_batches WHERE id = ?", (batch_id,))
@@ -282,6 +333,7 @@ class BloodBank:
         batch = dict(batch)
         await db.execute("DELETE FROM blood_batches WHERE id = ?", (batch_id,))
         await db.commit()
+        tables_written("blood_batches")
         await BloodBank.sync_inventory(batch["blood_bank_id"], batch["blood_type"])
         return True
     
@@ -307,3 +359,4 @@ class BloodBank:
             (bank_id, blood_type, total_units)
         )
         await db.commit()
+        tables_written("blood_inventory")
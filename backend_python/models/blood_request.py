@@ -2,10 +2,12 @@
 BloodRequest Model for BEOS Python Backend
 """
 
-from database.db import get_db
+from database.db import get_db, fetch_dicts
+from monitoring.tracing import trace_methods
 from typing import Optional, Dict, Any, List
 
 
+@trace_methods
 class BloodRequest:
     """Blood Request model for emergency requests"""
     
@@ -50,8 +52,7 @@ class BloodRequest:
         """
         
         cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def get_by_id(request_id: int) -> Optional[Dict[str, Any]]:
@@ -85,8 +86,7 @@ class BloodRequest:
             WHERE br.status = 'pending' AND br.urgency = 'critical'
             ORDER BY br.created_at ASC"""
         )
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def get_history(donor_id: int) -> List[Dict[str, Any]]:
@@ -100,8 +100,7 @@ class BloodRequest:
             ORDER BY br.fulfilled_at DESC""",
             (donor_id,)
         )
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def create(request: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,93 @@
+"""
+Data Import Model for BEOS Python Backend
+"""
+
+from database.db import get_db
+from monitoring.tracing import trace_methods
+from typing import Optional, Dict, Any, List
+import json
+import time
+
+
+@trace_methods
+class DataImport:
+    """Bulk CSV/NDJSON imports and their progress"""
+
+    @staticmethod
+    def _row_to_import(row) -> Dict[str, Any]:
+        data_import = dict(row)
+        data_import["errors"] = json.loads(data_import["errors"]) if data_import.get("errors") else []
+        return data_import
+
+    @staticmethod
+    async def create(data_import: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a queued import"""
+        db = await get_db()
+        cursor = await db.execute(
+            """INSERT INTO data_imports (created_by, entity, format, file_path, file_size, status, created_at)
+            VALUES (?, ?, ?, ?, ?, 'queued', ?)""",
+            (
+                data_import.get("created_by"),
+                data_import["entity"],
+                data_import["format"],
+                data_import["file_path"],
+                data_import.get("file_size", 0),
+                time.time()
+            )
+        )
+        await db.commit()
+        return await DataImport.get_by_id(cursor.lastrowid)
+
+    @staticmethod
+    async def get_by_id(import_id: int) -> Optional[Dict[str, Any]]:
+        """Get import by ID"""
+        db = await get_db()
+        cursor = await db.execute("SELECT * FROM data_imports WHERE id = ?", (import_id,))
+        row = await cursor.fetchone()
+        if row:
+            return DataImport._row_to_import(row)
+        return None
+
+    @staticmethod
+    async def get_recent(limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent imports first (without their error lists)"""
+        db = await get_db()
+        cursor = await db.execute("SELECT * FROM data_imports ORDER BY id DESC LIMIT ?", (limit,))
+        rows = await cursor.fetchall()
+        imports = []
+        for row in rows:
+            data_import = dict(row)
+            data_import.pop("errors", None)
+            imports.append(data_import)
+        return imports
+
+    @staticmethod
+    async def update(import_id: int, fields: Dict[str, Any]) -> None:
+        """Update status/progress columns"""
+        db = await get_db()
+        values = {k: json.dumps(v) if k == "errors" else v for k, v in fields.items()}
+        await db.execute(
+            f"UPDATE data_imports SET {', '.join(f'{k} = ?' for k in values)} WHERE id = ?",
+            (*values.values(), import_id)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def cancel(import_id: int) -> bool:
+        """Mark a queued or running import cancelled (its worker stops at the next chunk)"""
+        db = await get_db()
+        cursor = await db.execute(
+            """UPDATE data_imports SET status = 'cancelled', finished_at = ?
+            WHERE id = ? AND status IN ('queued', 'running')""",
+            (time.time(), import_id)
+        )
+        await db.commit()
+        return cursor.rowcount > 0
+
+    @staticmethod
+    async def get_status(import_id: int) -> Optional[str]:
+        """Current status only (checked between chunks)"""
+        db = await get_db()
+        cursor = await db.execute("SELECT status FROM data_imports WHERE id = ?", (import_id,))
+        row = await cursor.fetchone()
+        return row[0] if row else None
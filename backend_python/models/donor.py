@@ -2,13 +2,18 @@
 Donor Model for BEOS Python Backend
 """
 
-from database.db import get_db
+from database.db import get_db, fetch_dicts, tables_written
+from monitoring.tracing import trace_methods
 from typing import Optional, Dict, Any, List
 
 
+@trace_methods
 class Donor:
     """Donor model for blood donors"""
     
+    # Fields that may be shown to other users (no contact details or coordinates)
+    PUBLIC_FIELDS = ("id", "name", "blood_type", "city", "available", "last_donation")
+    
     @staticmethod
     async def get_all(filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Get all donors with optional filters"""
@@ -33,8 +38,7 @@ class Donor:
         query += " ORDER BY created_at DESC"
         
         cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def get_by_id(donor_id: int) -> Optional[Dict[str, Any]]:
@@ -46,6 +50,16 @@ class Donor:
             return dict(row)
         return None
     
+    @staticmethod
+    async def get_public_by_id(donor_id: int) -> Optional[Dict[str, Any]]:
+        """Get a donor's public fields by ID"""
+        db = await get_db()
+        cursor = await db.execute(
+            f"SELECT {', '.join(Donor.PUBLIC_FIELDS)} FROM donors WHERE id = ?", (donor_id,)
+        )
+        rows = await fetch_dicts(cursor)
+        return rows[0] if rows else None
+    
     @staticmethod
     async def get_by_user_id(user_id: int) -> Optional[Dict[str, Any]]:
         """Get donor by user ID"""
@@ -62,8 +76,9 @@ class Donor:
         db = await get_db()
         
         cursor = await db.execute(
-            """INSERT INTO donors (user_id, name, blood_type, phone, email, city, address, available, last_donation)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            """INSERT INTO donors (user_id, name, blood_type, phone, email, city, address, available, last_donation,
+                latitude, longitude)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             (
                 donor.get("user_id"),
                 donor["name"],
@@ -73,13 +88,55 @@ class Donor:
                 donor["city"],
                 donor.get("address"),
                 1 if donor.get("available", True) else 0,
-                donor.get("last_donation")
+                donor.get("last_donation"),
+                donor.get("latitude"),
+                donor.get("longitude")
             )
         )
         await db.commit()
+        tables_written("donors")
         
         return {"id": cursor.lastrowid, **donor}
     
+    @staticmethod
+    async def bulk_create(records: List[Dict[str, Any]], db=None) -> int:
+        """
+        Insert many validated donors with one executemany; the caller
+        commits and then calls tables_written. `db` defaults to the
+        shared connection.
+        """
+        db = db or await get_db()
+        await db.executemany(
+            """INSERT INTO donors (user_id, name, blood_type, phone, email, city, address, available, last_donation, latitude, longitude)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(
+                r.get("user_id"),
+                r.get("name"),
+                r.get("blood_type"),
+                r.get("phone"),
+                r.get("email"),
+                r.get("city"),
+                r.get("address"),
+                1 if r.get("available", True) else 0,
+                r.get("last_donation"),
+                r.get("latitude"),
+                r.get("longitude")
+            ) for r in records]
+        )
+        return len(records)
+    
+    @staticmethod
+    async def find_existing_contacts(phones: List[str], emails: List[str], db=None) -> set:
+        """Phones and emails (of the given ones) already registered"""
+        db = db or await get_db()
+        found = set()
+        for column, values in (("phone", phones), ("email", emails)):
+            if values:
+                placeholders = ','.join('?' for _ in values)
+                cursor = await db.execute(f"SELECT {column} FROM donors WHERE {column} IN ({placeholders})", values)
+                found.update(row[0] for row in await cursor.fetchall())
+        return found
+    
     @staticmethod
     async def update(donor_id: int, donor: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a donor"""
@@ -112,6 +169,12 @@ class Donor:
         if "last_donation" in donor:
             fields.append("last_donation = ?")
             params.append(donor["last_donation"])
+        if "latitude" in donor:
+            fields.append("latitude = ?")
+            params.append(donor["latitude"])
+        if "longitude" in donor:
+            fields.append("longitude = ?")
+            params.append(donor["longitude"])
         
         if not fields:
             return await Donor.get_by_id(donor_id)
@@ -119,6 +182,7 @@ class Donor:
         params.append(donor_id)
         await db.execute(f"UPDATE donors SET {', '.join(fields)} WHERE id = ?", params)
         await db.commit()
+        tables_written("donors")
         
         return await Donor.get_by_id(donor_id)
     
@@ -128,6 +192,7 @@ class Donor:
         db = await get_db()
         await db.execute("DELETE FROM donors WHERE id = ?", (donor_id,))
         await db.commit()
+        tables_written("donors")
         return True
     
     @staticmethod
@@ -138,8 +203,100 @@ class Donor:
             "SELECT * FROM donors WHERE blood_type = ? AND available = 1",
             (blood_type,)
         )
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
+    
+    @staticmethod
+    async def get_eligible_in_box(
+        blood_types: List[str],
+        min_lat: float, max_lat: float,
+        min_lng: float, max_lng: float,
+        min_days_since_donation: int = 90
+    ) -> List[Dict[str, Any]]:
+        """Get available, eligible donors of the given types inside a lat/lng box (uses idx_donors_geo)"""
+        db = await get_db()
+        placeholders = ','.join('?' for _ in blood_types)
+        cursor = await db.execute(
+            f"""SELECT id, user_id, name, blood_type, city, latitude, longitude, last_donation
+            FROM donors
+            WHERE blood_type IN ({placeholders}) AND available = 1
+            AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?
+            AND (last_donation IS NULL OR last_donation <= date('now', ?))""",
+            (*blood_types, min_lat, max_lat, min_lng, max_lng, f"-{min_days_since_donation} days")
+        )
+        return await fetch_dicts(cursor)
+    
+    @staticmethod
+    async def get_eligible_in_city(
+        blood_types: List[str],
+        city: str,
+        after_id: int = 0,
+        limit: int = 100,
+        min_days_since_donation: int = 90
+    ) -> List[Dict[str, Any]]:
+        """Get available, eligible donors of the given types in a city, paged by ID"""
+        db = await get_db()
+        placeholders = ','.join('?' for _ in blood_types)
+        cursor = await db.execute(
+            f"""SELECT id, user_id, name, blood_type, city, latitude, longitude, last_donation
+            FROM donors
+            WHERE city = ? AND blood_type IN ({placeholders}) AND available = 1
+            AND (last_donation IS NULL OR last_donation <= date('now', ?))
+            AND id > ?
+            ORDER BY id
+            LIMIT ?""",
+            (city, *blood_types, f"-{min_days_since_donation} days", after_id, limit)
+        )
+        return await fetch_dicts(cursor)
+    
+    @staticmethod
+    def _blast_conditions(filters: Dict[str, Any]):
+        """WHERE clause for blast recipient filters (blood types, city, lat/lng box, eligibility)"""
+        conditions = ["available = 1"]
+        params: List[Any] = []
+        if filters.get("blood_types"):
+            conditions.append(f"blood_type IN ({','.join('?' for _ in filters['blood_types'])})")
+            params.extend(filters["blood_types"])
+        if filters.get("city"):
+            conditions.append("city = ?")
+            params.append(filters["city"])
+        if filters.get("box"):
+            conditions.append("latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+            params.extend(filters["box"])
+        if filters.get("min_days_since_donation"):
+            conditions.append("(last_donation IS NULL OR last_donation <= date('now', ?))")
+            params.append(f"-{filters['min_days_since_donation']} days")
+        return " AND ".join(conditions), params
+    
+    @staticmethod
+    async def count_for_blast(filters: Dict[str, Any]) -> int:
+        """Count donors matching blast filters"""
+        db = await get_db()
+        where, params = Donor._blast_conditions(filters)
+        cursor = await db.execute(f"SELECT COUNT(*) FROM donors WHERE {where}", params)
+        return (await cursor.fetchone())[0]
+    
+    @staticmethod
+    async def get_blast_coordinates(filters: Dict[str, Any]) -> List[tuple]:
+        """(latitude, longitude) of every donor matching blast filters (for radius counts)"""
+        db = await get_db()
+        where, params = Donor._blast_conditions(filters)
+        cursor = await db.execute(f"SELECT latitude, longitude FROM donors WHERE {where}", params)
+        return await cursor.fetchall()
+    
+    @staticmethod
+    async def get_blast_chunk(filters: Dict[str, Any], after_id: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """Next chunk of donors matching blast filters, paged by ID"""
+        db = await get_db()
+        where, params = Donor._blast_conditions(filters)
+        cursor = await db.execute(
+            f"""SELECT id, user_id, name, blood_type, phone, email, city, latitude, longitude
+            FROM donors
+            WHERE {where} AND id > ?
+            ORDER BY id
+            LIMIT ?""",
+            (*params, after_id, limit)
+        )
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def get_stats() -> Dict[str, Any]:
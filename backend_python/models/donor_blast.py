@@ -0,0 +1,117 @@
+"""
+Donor Blast Model for BEOS Python Backend
+"""
+
+from database.db import get_db
+from monitoring.tracing import trace_methods
+from typing import Optional, Dict, Any, List
+import json
+import time
+
+
+@trace_methods
+class DonorBlast:
+    """Bulk donor notification runs and the deliveries they made"""
+
+    @staticmethod
+    def _row_to_blast(row) -> Dict[str, Any]:
+        blast = dict(row)
+        for key in ("filters", "channels", "sent"):
+            blast[key] = json.loads(blast[key]) if blast.get(key) else None
+        return blast
+
+    @staticmethod
+    async def create(blast: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a queued blast"""
+        db = await get_db()
+        cursor = await db.execute(
+            """INSERT INTO donor_blasts (created_by, filters, channels, message, status, total, created_at)
+            VALUES (?, ?, ?, ?, 'queued', ?, ?)""",
+            (
+                blast.get("created_by"),
+                json.dumps(blast["filters"]),
+                json.dumps(blast["channels"]),
+                blast["message"],
+                blast.get("total", 0),
+                time.time()
+            )
+        )
+        await db.commit()
+        return await DonorBlast.get_by_id(cursor.lastrowid)
+
+    @staticmethod
+    async def get_by_id(blast_id: int) -> Optional[Dict[str, Any]]:
+        """Get blast by ID"""
+        db = await get_db()
+        cursor = await db.execute("SELECT * FROM donor_blasts WHERE id = ?", (blast_id,))
+        row = await cursor.fetchone()
+        if row:
+            return DonorBlast._row_to_blast(row)
+        return None
+
+    @staticmethod
+    async def get_recent(limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent blasts first"""
+        db = await get_db()
+        cursor = await db.execute("SELECT * FROM donor_blasts ORDER BY id DESC LIMIT ?", (limit,))
+        rows = await cursor.fetchall()
+        return [DonorBlast._row_to_blast(row) for row in rows]
+
+    @staticmethod
+    async def update(blast_id: int, fields: Dict[str, Any]) -> None:
+        """Update status/progress columns"""
+        db = await get_db()
+        values = {k: json.dumps(v) if k == "sent" else v for k, v in fields.items()}
+        await db.execute(
+            f"UPDATE donor_blasts SET {', '.join(f'{k} = ?' for k in values)} WHERE id = ?",
+            (*values.values(), blast_id)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def cancel(blast_id: int) -> bool:
+        """Mark a queued or running blast cancelled (its worker stops at the next chunk)"""
+        db = await get_db()
+        cursor = await db.execute(
+            """UPDATE donor_blasts SET status = 'cancelled', finished_at = ?
+            WHERE id = ? AND status IN ('queued', 'running')""",
+            (time.time(), blast_id)
+        )
+        await db.commit()
+        return cursor.rowcount > 0
+    
+    @staticmethod
+    async def get_status(blast_id: int) -> Optional[str]:
+        """Current status only (checked between chunks)"""
+        db = await get_db()
+        cursor = await db.execute("SELECT status FROM donor_blasts WHERE id = ?", (blast_id,))
+        row = await cursor.fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    async def get_recently_notified(donor_ids: List[int], channel: str, since: float) -> set:
+        """Donors that already got a blast on this channel since a timestamp"""
+        if not donor_ids:
+            return set()
+        db = await get_db()
+        placeholders = ','.join('?' for _ in donor_ids)
+        cursor = await db.execute(
+            f"""SELECT DISTINCT donor_id FROM blast_deliveries
+            WHERE donor_id IN ({placeholders}) AND channel = ? AND sent_at > ?""",
+            (*donor_ids, channel, since)
+        )
+        rows = await cursor.fetchall()
+        return {row[0] for row in rows}
+
+    @staticmethod
+    async def record_deliveries(blast_id: int, channel: str, donor_ids: List[int]) -> None:
+        """Record one chunk of deliveries in a single transaction"""
+        if not donor_ids:
+            return
+        db = await get_db()
+        now = time.time()
+        await db.executemany(
+            "INSERT INTO blast_deliveries (blast_id, donor_id, channel, sent_at) VALUES (?, ?, ?, ?)",
+            [(blast_id, donor_id, channel, now) for donor_id in donor_ids]
+        )
+        await db.commit()
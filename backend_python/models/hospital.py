@@ -2,10 +2,12 @@
 Hospital Model for BEOS Python Backend
 """
 
-from database.db import get_db
+from database.db import get_db, fetch_dicts, tables_written
+from monitoring.tracing import trace_methods
 from typing import Optional, Dict, Any, List
 
 
+@trace_methods
 class Hospital:
     """Hospital model"""
     
@@ -30,8 +32,7 @@ class Hospital:
         query += " ORDER BY name ASC"
         
         cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await fetch_dicts(cursor)
     
     @staticmethod
     async def get_by_id(hospital_id: int) -> Optional[Dict[str, Any]]:
@@ -74,9 +75,47 @@ class Hospital:
             )
         )
         await db.commit()
+        tables_written("hospitals")
         
         return {"id": cursor.lastrowid, **hospital}
     
+    @staticmethod
+    async def bulk_create(records: List[Dict[str, Any]], db=None) -> int:
+        """
+        Insert many validated hospitals with one executemany; the caller
+        commits and then calls tables_written. `db` defaults to the
+        shared connection.
+        """
+        db = db or await get_db()
+        await db.executemany(
+            """INSERT INTO hospitals (user_id, name, address, city, phone, email, latitude, longitude, emergency_contact)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(
+                r.get("user_id"),
+                r.get("name"),
+                r.get("address"),
+                r.get("city"),
+                r.get("phone"),
+                r.get("email"),
+                r.get("latitude"),
+                r.get("longitude"),
+                r.get("emergency_contact")
+            ) for r in records]
+        )
+        return len(records)
+    
+    @staticmethod
+    async def find_existing_contacts(phones: List[str], emails: List[str], db=None) -> set:
+        """Phones and emails (of the given ones) already registered"""
+        db = db or await get_db()
+        found = set()
+        for column, values in (("phone", phones), ("email", emails)):
+            if values:
+                placeholders = ','.join('?' for _ in values)
+                cursor = await db.execute(f"SELECT {column} FROM hospitals WHERE {column} IN ({placeholders})", values)
+                found.update(row[0] for row in await cursor.fetchall())
+        return found
+    
     @staticmethod
     async def update(hospital_id: int, hospital: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a hospital"""
@@ -116,6 +155,7 @@ class Hospital:
         params.append(hospital_id)
         await db.execute(f"UPDATE hospitals SET {', '.join(fields)} WHERE id = ?", params)
         await db.commit()
+        tables_written("hospitals")
         
         return await Hospital.get_by_id(hospital_id)
     
@@ -125,6 +165,7 @@ class Hospital:
         db = await get_db()
         await db.execute("DELETE FROM hospitals WHERE id = ?", (hospital_id,))
         await db.commit()
+        tables_written("hospitals")
         return True
     
     @staticmethod
@@ -3,7 +3,8 @@ Organ Model for BEOS Enterprise - Organ Transplant Logistics
 Handles organ donations, viability tracking, and matching
 """
 
-from database.db import get_db
+from database.db import get_db, tables_written
+from monitoring.tracing import trace_methods
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 
@@ -24,6 +25,7 @@ ORGAN_VIABILITY = {
 HLA_MARKERS = ["HLA-A", "HLA-B", "HLA-C", "HLA-DR", "HLA-DQ", "HLA-DP"]
 
 
+@trace_methods
 class Organ:
     """Organ model for transplant logistics"""
     
@@ -138,6 +140,7 @@ class Organ:
             )
         )
         await db.commit()
+        tables_written("organs")
         
         return await Organ.get_by_id(cursor.lastrowid)
     
@@ -166,6 +169,7 @@ class Organ:
             params
         )
         await db.commit()
+        tables_written("organs")
         
         return await Organ.get_by_id(organ_id)
     
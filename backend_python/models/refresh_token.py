@@ -0,0 +1,128 @@
+"""
+Refresh Token Model for BEOS Python Backend
+"""
+
+from database.db import get_db
+from monitoring.tracing import trace_methods
+from typing import Dict, Any, Tuple
+import hashlib
+import json
+import os
+import secrets
+import time
+import uuid
+
+REFRESH_TOKEN_DAYS = float(os.environ.get("REFRESH_TOKEN_DAYS", "30"))
+# A rotated token presented again within this many seconds is rejected without
+# revoking its family (two tabs refreshing at once); later reuse revokes it
+REFRESH_REUSE_GRACE_SECONDS = float(os.environ.get("REFRESH_REUSE_GRACE_SECONDS", "10"))
+
+
+def hash_refresh_token(token: str) -> str:
+    """Only digests are stored, so a database leak yields no usable tokens"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+@trace_methods
+class RefreshToken:
+    """Opaque, single-use refresh tokens that carry the claims of the next access token"""
+
+    @staticmethod
+    async def _insert(claims: Dict[str, Any], family: str) -> str:
+        db = await get_db()
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        await db.execute(
+            """INSERT INTO refresh_tokens (token_hash, user_id, family, claims, expires_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)""",
+            (hash_refresh_token(token), claims["id"], family, json.dumps(claims),
+             now + REFRESH_TOKEN_DAYS * 86400, now)
+        )
+        return token
+
+    @staticmethod
+    async def issue(claims: Dict[str, Any]) -> str:
+        """Start a new family (login/register) and return its first token"""
+        db = await get_db()
+        token = await RefreshToken._insert(claims, uuid.uuid4().hex)
+        await db.commit()
+        return token
+
+    @staticmethod
+    async def rotate(token: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Spend a refresh token: returns (next refresh token, access token
+        claims). Raises ValueError when the token is unknown, expired,
+        revoked or already used; reuse after the grace period revokes the
+        whole family, since either the holder or a thief has a copy.
+        """
+        db = await get_db()
+        cursor = await db.execute(
+            "SELECT id, family, claims, expires_at, used_at, revoked_at FROM refresh_tokens WHERE token_hash = ?",
+            (hash_refresh_token(token),)
+        )
+        row = await cursor.fetchone()
+        now = time.time()
+        if not row or row["revoked_at"] is not None:
+            raise ValueError("Invalid refresh token")
+        if row["expires_at"] <= now:
+            raise ValueError("Refresh token expired")
+
+        if row["used_at"] is None:
+            # Conditional update: of two concurrent rotations only one wins
+            cursor = await db.execute(
+                "UPDATE refresh_tokens SET used_at = ? WHERE id = ? AND used_at IS NULL AND revoked_at IS NULL",
+                (now, row["id"])
+            )
+            if cursor.rowcount == 1:
+                claims = json.loads(row["claims"])
+                next_token = await RefreshToken._insert(claims, row["family"])
+                await db.commit()
+                return next_token, claims
+            used_at = now
+        else:
+            used_at = row["used_at"]
+
+        if now - used_at > REFRESH_REUSE_GRACE_SECONDS:
+            await RefreshToken.revoke_family(row["family"])
+            print(f"Refresh token reuse detected; revoked family {row['family']}")
+        raise ValueError("Refresh token already used")
+
+    @staticmethod
+    async def revoke(token: str) -> bool:
+        """Revoke the family a token belongs to (logout)"""
+        db = await get_db()
+        cursor = await db.execute(
+            "SELECT family FROM refresh_tokens WHERE token_hash = ?", (hash_refresh_token(token),)
+        )
+        row = await cursor.fetchone()
+        if not row:
+            return False
+        await RefreshToken.revoke_family(row[0])
+        return True
+
+    @staticmethod
+    async def revoke_family(family: str) -> None:
+        db = await get_db()
+        await db.execute(
+            "UPDATE refresh_tokens SET revoked_at = ? WHERE family = ? AND revoked_at IS NULL",
+            (time.time(), family)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def revoke_user(user_id: int) -> None:
+        """Revoke every refresh token of a user"""
+        db = await get_db()
+        await db.execute(
+            "UPDATE refresh_tokens SET revoked_at = ? WHERE user_id = ? AND revoked_at IS NULL",
+            (time.time(), user_id)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def prune() -> None:
+        """Delete expired tokens (used ones are kept until then for reuse detection)"""
+        db = await get_db()
+        await db.execute("DELETE FROM refresh_tokens WHERE expires_at <= ?", (time.time(),))
+        await db.commit()
@@ -2,10 +2,13 @@
 User Model for BEOS Python Backend
 """
 
-from database.db import get_db, pwd_context
+from database.db import get_db
+from monitoring.tracing import trace_methods
+from database.passwords import password_hasher
 from typing import Optional, Dict, Any
 
 
+@trace_methods
 class User:
     """User model for authentication"""
     
@@ -13,7 +16,7 @@ class User:
     async def create(email: str, password: str, role: str) -> Dict[str, Any]:
         """Create a new user"""
         db = await get_db()
-        password_hash = pwd_context.hash(password)
+        password_hash = await password_hasher.hash(password)
         
         try:
             cursor = await db.execute(
@@ -51,6 +54,11 @@ class User:
         return None
     
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verify password against hash"""
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        """Verify password against hash (off the event loop)"""
+        return await password_hasher.verify(plain_password, hashed_password)
+    
+    @staticmethod
+    async def verify_login(plain_password: str, hashed_password: str) -> bool:
+        """Verify a login password; raises PasswordHasherBusy when logins are saturated"""
+        return await password_hasher.verify_login(plain_password, hashed_password)
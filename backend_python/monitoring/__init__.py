@@ -0,0 +1,2 @@
+"""Monitoring module initialization"""
+from .metrics import registry, Counter, Gauge, Histogram
@@ -0,0 +1,143 @@
+"""
+SQL Instrumentation for BEOS Python Backend
+aiosqlite connections that time every statement and attribute it to its caller
+"""
+
+from monitoring.metrics import registry, SQL_BUCKETS
+from monitoring.tracing import tracer, current_span, Span, KIND_CLIENT, MAX_STATEMENT_LENGTH
+from monitoring.sql_profiler import sql_profiler
+from functools import partial
+from typing import Any
+import aiosqlite
+import sqlite3
+import sys
+import time
+
+# Frames from these modules are plumbing; the caller is the first frame outside them
+_PLUMBING = ("aiosqlite", "database.db", "monitoring.db")
+# Operations that run SQL (fetches and commits are timed but not counted as queries)
+_STATEMENTS = {"execute", "executemany", "executescript"}
+_FETCHES = {"fetchone", "fetchmany", "fetchall"}
+
+SQL_QUERIES = registry.counter(
+    "beos_db_queries_total", "SQL statements run, by connection and calling function",
+    ("connection", "caller")
+)
+SQL_DURATION = registry.histogram(
+    "beos_db_query_duration_seconds",
+    "Time SQLite spent on statements, fetches and commits, by calling function",
+    ("connection", "caller", "operation"), SQL_BUCKETS
+)
+CONNECTION_WAIT = registry.histogram(
+    "beos_db_connection_wait_seconds",
+    "Time an operation queued behind others for the connection's thread",
+    ("connection",), SQL_BUCKETS
+)
+LOCK_WAIT = registry.histogram(
+    "beos_lock_wait_seconds", "Time spent waiting to acquire an application lock",
+    ("lock",), SQL_BUCKETS
+)
+
+
+def caller_name() -> str:
+    """`module.Qualname` of the first frame outside aiosqlite and the DB helpers"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_PLUMBING):
+            return f"{module}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class InstrumentedConnection(aiosqlite.Connection):
+    """
+    aiosqlite runs every call on one thread per connection, so a call first
+    waits for the calls queued ahead of it. Both parts are recorded: the
+    wait (contention for the connection) and the run (SQLite's own time,
+    which includes waiting on SQLite's file lock up to busy_timeout).
+    """
+
+    def __init__(self, connector, iter_chunk_size: int, name: str):
+        super().__init__(connector, iter_chunk_size)
+        self.name = name
+
+    async def _execute(self, fn, *args, **kwargs):
+        operation = getattr(fn, "__name__", "call")
+        caller = caller_name()
+        parent = current_span()
+        timing = []
+        function = partial(fn, *args, **kwargs)
+
+        # Runs on the connection's thread: start and end exclude the hops
+        # to and from the event loop
+        def timed():
+            timing.append(time.perf_counter())
+            try:
+                return function()
+            finally:
+                timing.append(time.perf_counter())
+
+        queued_ns = time.time_ns()
+        queued = time.perf_counter()
+        result = None
+        try:
+            result = await super()._execute(timed)
+            return result
+        finally:
+            if len(timing) == 2:
+                started, finished = timing
+                CONNECTION_WAIT.observe(started - queued, (self.name,))
+                SQL_DURATION.observe(finished - started, (self.name, caller, operation))
+                if operation in _STATEMENTS:
+                    SQL_QUERIES.inc((self.name, caller))
+                sql_profiler.record(self, fn, operation, args, result, finished - started, caller)
+                if parent is not None:
+                    self._trace(parent, fn, operation, args, result, queued_ns,
+                                started - queued, finished - queued)
+
+    def _trace(self, parent: Span, fn, operation: str, args: tuple, result: Any,
+               queued_ns: int, wait: float, total: float):
+        """
+        A span per statement, with its text, queue wait and row count. Fetches
+        from the cursor of the statement just recorded extend its span (and
+        add to its rows), so a query and its fetches read as one span.
+        """
+        if parent.trace.finished:
+            return
+        end_ns = queued_ns + int(total * 1e9)
+        if operation in _FETCHES:
+            rows = (0 if result is None else 1) if operation == "fetchone" else len(result or ())
+            cursor = id(getattr(fn, "__self__", None))
+            last = parent.trace.spans[-1]
+            if last.cursor == cursor and last.parent_id == parent.span_id:
+                last.duration_ns = end_ns - last.start_ns
+                last.set("db.rows", last.attributes.get("db.rows", 0) + rows)
+                return
+            span = tracer.add_span(f"sql {operation}", KIND_CLIENT, queued_ns, parent)
+            if span is not None:
+                span.set("db.rows", rows)
+        elif operation in _STATEMENTS or operation in ("commit", "rollback"):
+            statement = str(args[0]) if operation in _STATEMENTS and args else operation.upper()
+            span = tracer.add_span(f"sql {statement.split(None, 1)[0].upper()}", KIND_CLIENT, queued_ns, parent)
+            if span is None:
+                return
+            span.set("db.statement", statement[:MAX_STATEMENT_LENGTH])
+            cursor = result if isinstance(result, sqlite3.Cursor) else getattr(fn, "__self__", None)
+            span.cursor = id(cursor)
+            if getattr(cursor, "rowcount", -1) >= 0 and operation in _STATEMENTS:
+                span.set("db.rows_affected", cursor.rowcount)
+        else:
+            return
+        if span is not None:
+            span.set("db.connection", self.name)
+            span.set("db.wait_ms", round(wait * 1000, 3))
+            span.duration_ns = end_ns - queued_ns
+
+def connect(database: str, name: str = "shared", iter_chunk_size: int = 64, **kwargs: Any) -> InstrumentedConnection:
+    """aiosqlite.connect() returning an instrumented connection labelled `name`"""
+
+    def connector() -> sqlite3.Connection:
+        return sqlite3.connect(database, **kwargs)
+
+    return InstrumentedConnection(connector, iter_chunk_size, name)
@@ -0,0 +1,66 @@
+"""
+HTTP Instrumentation for BEOS Python Backend
+Request latency per route template and requests in flight
+"""
+
+from monitoring.metrics import registry
+from starlette.routing import Match
+import time
+
+HTTP_DURATION = registry.histogram(
+    "beos_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "beos_http_requests_in_flight", "HTTP requests being handled", ("method",)
+)
+
+
+def route_template(scope, routes: list) -> str:
+    """
+    The route template a request matched (`/api/requests/{request_id}`).
+    Requests answered by a middleware before routing (304s, cache hits) are
+    matched against `routes` here.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request, labelled by route template so IDs don't
+    explode the series
+    """
+
+    def __init__(self, app, routes: list = None):
+        self.app = app
+        self.routes = routes if routes is not None else []
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = [500]
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            HTTP_IN_FLIGHT.dec((method,))
+            HTTP_DURATION.observe(
+                time.perf_counter() - started, (method, route_template(scope, self.routes), str(status[0]))
+            )
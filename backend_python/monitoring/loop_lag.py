@@ -0,0 +1,218 @@
+"""
+Event Loop Lag Monitor for BEOS Python Backend
+Measures how late the event loop runs a timer, i.e. how long callbacks block it,
+and samples the loop thread's stack while it is blocked
+"""
+
+from monitoring.metrics import registry
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Seconds between lag samples
+LOOP_LAG_INTERVAL_SECONDS = float(os.environ.get("LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+# Stalls longer than this get the loop thread's stack sampled (0 disables the watchdog)
+LOOP_STALL_THRESHOLD_MS = float(os.environ.get("LOOP_STALL_THRESHOLD_MS", "100"))
+# Stack sampling period while the loop is stalled
+LOOP_STALL_SAMPLE_MS = float(os.environ.get("LOOP_STALL_SAMPLE_MS", "5"))
+# Stalls kept for /api/admin/loop-stalls
+LOOP_STALL_BUFFER_SIZE = int(os.environ.get("LOOP_STALL_BUFFER_SIZE", "100"))
+
+# Frames from files under this directory are application code
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+# Innermost frames kept per sampled stack
+MAX_STACK_DEPTH = 40
+
+LOOP_STALLS = registry.counter(
+    "beos_event_loop_stalls_total", "Event loop stalls over LOOP_STALL_THRESHOLD_MS, by blocking function",
+    ("function",)
+)
+LOOP_BLOCKED = registry.counter(
+    "beos_event_loop_blocked_seconds_total", "Time the event loop spent in stalls, by blocking function",
+    ("function",)
+)
+LOOP_LAG = registry.histogram(
+    "beos_event_loop_lag_seconds", "Delay between a timer's due time and when the event loop ran it",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+
+class LoopLagMonitor:
+    """Sleeps `interval` in a loop and records how much longer each sleep took"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+        registry.gauge("beos_event_loop_lag_last_seconds", "Most recent event loop lag sample",
+                       collect=lambda: self.last_lag)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - due)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG.observe(lag)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"interval": self.interval, "last_lag": round(self.last_lag, 4), "max_lag": round(self.max_lag, 4)}
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}:{frame.f_lineno}"
+
+
+def _is_app_frame(frame) -> bool:
+    filename = frame.f_code.co_filename
+    return filename.startswith(_APP_ROOT) and "site-packages" not in filename
+
+
+class StallWatchdog:
+    """
+    The lag monitor only learns about a stall once it is over, when the
+    blocking code is gone from the stack. The watchdog catches it in the
+    act: the loop stamps a heartbeat every `tick`, and a helper thread
+    that finds the heartbeat overdue by `threshold` samples the loop
+    thread's stack (sys._current_frames) until it beats again. Each stall
+    is attributed to the innermost application frame seen most often.
+    """
+
+    def __init__(self, threshold_ms: float = LOOP_STALL_THRESHOLD_MS, sample_ms: float = LOOP_STALL_SAMPLE_MS,
+                 buffer_size: int = LOOP_STALL_BUFFER_SIZE):
+        self.threshold = threshold_ms / 1000
+        self.sample = sample_ms / 1000
+        # Heartbeats often enough that a stall of `threshold` can't fall between two
+        self.tick = self.threshold / 4
+        self.stalls: deque = deque(maxlen=buffer_size)
+        self.stats = {"stalls": 0, "blockedSeconds": 0.0, "samples": 0}
+        self._last_beat = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id: Optional[int] = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        """Start watching the running loop (call from the loop's thread)"""
+        if self._thread is not None or self.threshold <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def _beat(self):
+        self._last_beat = time.perf_counter()
+        self._handle = self._loop.call_later(self.tick, self._beat)
+
+    def _watch(self):
+        while not self._stopping.wait(self.tick):
+            beat = self._last_beat
+            if time.perf_counter() - beat - self.tick < self.threshold:
+                continue
+            samples: Counter = Counter()
+            while self._last_beat == beat and not self._stopping.is_set():
+                frame = sys._current_frames().get(self._thread_id)
+                if frame is not None:
+                    samples[self._stack(frame)] += 1
+                del frame
+                time.sleep(self.sample)
+            end = self._last_beat if self._last_beat != beat else time.perf_counter()
+            self._record(end - beat - self.tick, samples)
+
+    @staticmethod
+    def _stack(frame) -> tuple:
+        """(outermost .. innermost frame names, innermost application frame)"""
+        names = []
+        blocked_in = None
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            names.append(_frame_name(frame))
+            if blocked_in is None and _is_app_frame(frame):
+                blocked_in = f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+            frame = frame.f_back
+        names.reverse()
+        return tuple(names), blocked_in or "(outside application code)"
+
+    def _record(self, duration: float, samples: Counter):
+        blocked: Counter = Counter()
+        for (_, function), count in samples.items():
+            blocked[function] += count
+        function = blocked.most_common(1)[0][0] if blocked else "(not sampled)"
+        total = sum(samples.values())
+        stall = {
+            "at": datetime.utcnow().isoformat(),
+            "durationMs": round(duration * 1000, 1),
+            "blockedIn": function,
+            "samples": total,
+            # Share of samples per blocking function, and the most common stacks
+            "functions": {name: round(count / total, 3) for name, count in blocked.most_common(5)},
+            "stacks": [{"samples": count, "blockedIn": blocked_in, "frames": list(frames)}
+                       for (frames, blocked_in), count in samples.most_common(3)],
+        }
+        self.stalls.append(stall)
+        self.stats["stalls"] += 1
+        self.stats["blockedSeconds"] += duration
+        self.stats["samples"] += total
+        LOOP_STALLS.inc((function,))
+        LOOP_BLOCKED.inc((function,), duration)
+        where = stall["stacks"][0]["frames"][-1] if stall["stacks"] else "?"
+        print(f"Event loop blocked {stall['durationMs']:.0f} ms in {function} (at {where}, {total} samples)")
+
+    def get_recent(self, limit: int = 50, min_ms: float = 0) -> List[Dict[str, Any]]:
+        """Recorded stalls, newest first"""
+        return [stall for stall in reversed(self.stalls) if stall["durationMs"] >= min_ms][:limit]
+
+    def get_hotspots(self) -> List[Dict[str, Any]]:
+        """Blocking functions over all recorded stalls, by total time blocked"""
+        totals: Dict[str, list] = {}
+        for stall in self.stalls:
+            entry = totals.setdefault(stall["blockedIn"], [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += stall["durationMs"]
+            entry[2] = max(entry[2], stall["durationMs"])
+        return [{"function": name, "stalls": count, "totalMs": round(total, 1), "maxMs": longest}
+                for name, (count, total, longest) in sorted(totals.items(), key=lambda item: -item[1][1])]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "thresholdMs": self.threshold * 1000,
+            "running": self._thread is not None,
+            **self.stats,
+            "blockedSeconds": round(self.stats["blockedSeconds"], 3),
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
+stall_watchdog = StallWatchdog()
@@ -0,0 +1,145 @@
+"""
+Sampling Profiler for BEOS Python Backend
+On-demand statistical profiling of the live process into collapsed stacks
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Optional
+import os
+import sys
+import threading
+import time
+
+# Longest profile an admin can request
+PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", "60"))
+# Default sampling period (each sample walks the sampled threads' stacks)
+PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", "10"))
+
+# Innermost frames of the event loop waiting for I/O: samples ending here are
+# idle (uvloop polls in C, so its idle loop thread ends in the runner)
+_IDLE_LEAVES = ("selectors._PollLikeSelector.select", "selectors.SelectSelector.select",
+                "selectors.KqueueSelector.select", "asyncio.runners.Runner.run")
+# Innermost frames of pool threads waiting for work (or for their workers),
+# and of the stall watchdog sleeping between stack samples
+_WAITING_LEAVES = ("threading.Condition.wait", "queue.Queue.get", "concurrent.futures.thread._worker",
+                   "threading.Event.wait", "threading.Thread._wait_for_tstate_lock",
+                   "monitoring.loop_lag.StallWatchdog._watch")
+
+
+class ProfilerBusy(Exception):
+    """A profile is already running in this process"""
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the event loop thread (or of every thread) from
+    a helper thread every `interval`, with sys._current_frames(). Nothing
+    is hooked into the profiled code, so the cost is the sampling thread's
+    own time: tens of microseconds per sample. One profile runs at a time.
+    """
+
+    def __init__(self, max_seconds: float = PROFILER_MAX_SECONDS):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self.running: Optional[Dict[str, Any]] = None
+        self.last: Optional[Dict[str, Any]] = None
+        self.stats = {"profiles": 0, "rejected": 0}
+
+    def run(self, seconds: float, interval: float, thread_id: Optional[int] = None,
+            include_idle: bool = False) -> Dict[str, Any]:
+        """
+        Profile for `seconds` (blocking, run it off the event loop) and return
+        the report. `thread_id` limits sampling to that thread; None samples
+        every thread but this one.
+        """
+        if not self._lock.acquire(blocking=False):
+            self.stats["rejected"] += 1
+            running = self.running
+            raise ProfilerBusy(f"A profile is already running (started {running['started'] if running else 'just now'})")
+        try:
+            seconds = min(seconds, self.max_seconds)
+            self.running = {"started": datetime.utcnow().isoformat(), "seconds": seconds}
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            own = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = idle = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            next_sample = started
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if now < next_sample:
+                    time.sleep(next_sample - now)
+                next_sample += interval
+                frames = sys._current_frames()
+                for ident, frame in frames.items():
+                    if ident == own or (thread_id is not None and ident != thread_id):
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_name(frame))
+                        frame = frame.f_back
+                    samples += 1
+                    if stack[0] in _IDLE_LEAVES or stack[0] in _WAITING_LEAVES:
+                        idle += 1
+                        if not include_idle:
+                            continue
+                    stack.append(names.get(ident) or f"thread-{ident}")
+                    stack.reverse()
+                    stacks[tuple(stack)] += 1
+                del frames
+            report = self._report(stacks, samples, idle, time.perf_counter() - started, interval)
+            self.last = report
+            self.stats["profiles"] += 1
+            return report
+        finally:
+            self.running = None
+            self._lock.release()
+
+    @staticmethod
+    def _report(stacks: Counter, samples: int, idle: int, elapsed: float, interval: float) -> Dict[str, Any]:
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in stacks.items():
+            # Skip the thread name pseudo-frame; count recursion once per stack
+            self_counts[stack[-1]] += count
+            for name in set(stack[1:]):
+                total_counts[name] += count
+        busy = sum(stacks.values()) or 1
+
+        def row(name: str) -> Dict[str, Any]:
+            return {
+                "function": name,
+                "self": self_counts[name],
+                "total": total_counts[name],
+                "selfPct": round(100 * self_counts[name] / busy, 1),
+                "totalPct": round(100 * total_counts[name] / busy, 1),
+            }
+
+        return {
+            "finished": datetime.utcnow().isoformat(),
+            "seconds": round(elapsed, 2),
+            "intervalMs": interval * 1000,
+            "samples": samples,
+            "idleSamples": idle,
+            "stacks": len(stacks),
+            # Where time is spent (innermost frame), and what it is spent under
+            "topSelf": [row(name) for name, _ in self_counts.most_common(25)],
+            "topTotal": [row(name) for name, _ in total_counts.most_common(25)],
+            # Brendan Gregg's collapsed format: `frame;frame;frame count`,
+            # for flamegraph.pl, speedscope or inferno
+            "collapsed": "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common()),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"running": self.running, "lastFinished": self.last and self.last["finished"], **self.stats}
+
+
+profiler = SamplingProfiler()
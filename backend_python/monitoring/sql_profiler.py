@@ -0,0 +1,233 @@
+"""
+SQL Profiler for BEOS Python Backend
+Per-fingerprint statement timings, a slow-query log and captured query plans
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import asyncio
+import contextvars
+import os
+import re
+import sqlite3
+
+# Statements (including their fetches) at least this slow go to the slow
+# log, and the first one of each fingerprint gets its EXPLAIN QUERY PLAN
+SQL_SLOW_MS = float(os.environ.get("SQL_SLOW_MS", "100"))
+# Recent executions per fingerprint that p50/p99 are computed over
+SQL_PROFILE_SAMPLES = int(os.environ.get("SQL_PROFILE_SAMPLES", "1000"))
+# Distinct fingerprints tracked (later ones are counted under "(other)")
+SQL_PROFILE_MAX_FINGERPRINTS = int(os.environ.get("SQL_PROFILE_MAX_FINGERPRINTS", "1000"))
+# Slow statements kept for /api/admin/sql/slow
+SQL_SLOW_LOG_SIZE = int(os.environ.get("SQL_SLOW_LOG_SIZE", "200"))
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_VALUES_ROWS = re.compile(r"\bVALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))+", re.I)
+_WHITESPACE = re.compile(r"\s+")
+
+_FETCHES = {"fetchone", "fetchmany", "fetchall"}
+_fingerprints: Dict[str, str] = {}
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Statement shape with literals and placeholder lists folded, so every
+    filter combination of a dynamic query is one fingerprint per shape:
+    `... WHERE id IN (?, ?, ?)` and `... IN (?)` both become `IN (...)`.
+    """
+    cached = _fingerprints.get(sql)
+    if cached is not None:
+        return cached
+    shape = _COMMENTS.sub(" ", sql)
+    shape = _STRINGS.sub("?", shape)
+    shape = _NUMBERS.sub("?", shape)
+    shape = _IN_LISTS.sub("IN (...)", shape)
+    shape = _VALUES_ROWS.sub("VALUES (...)", shape)
+    shape = _WHITESPACE.sub(" ", shape).strip()
+    if len(_fingerprints) >= 4096:
+        _fingerprints.clear()
+    _fingerprints[sql] = shape
+    return shape
+
+
+def _has_plan(sql: str) -> bool:
+    """EXPLAIN QUERY PLAN only describes reads and writes, not DDL or PRAGMAs"""
+    words = sql.split(None, 1)
+    return bool(words) and words[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class QueryStats:
+    __slots__ = ("fingerprint", "count", "total", "max", "rows", "slow", "samples", "callers",
+                 "plan", "plan_sql", "explaining")
+
+    def __init__(self, fingerprint: str, sample_size: int):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.samples: deque = deque(maxlen=sample_size)
+        self.callers: Dict[str, int] = {}
+        self.plan: Optional[List[str]] = None
+        self.plan_sql: Optional[str] = None
+        self.explaining = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(sample[0] for sample in self.samples)
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "totalMs": round(self.total * 1000, 3),
+            "meanMs": round(self.total / self.count * 1000, 3) if self.count else 0,
+            "p50Ms": round(_percentile(ordered, 0.5) * 1000, 3) if ordered else None,
+            "p99Ms": round(_percentile(ordered, 0.99) * 1000, 3) if ordered else None,
+            "maxMs": round(self.max * 1000, 3),
+            "rows": self.rows,
+            "slow": self.slow,
+            "callers": dict(sorted(self.callers.items(), key=lambda item: -item[1])[:10]),
+            "plan": self.plan,
+        }
+
+
+class SQLProfiler:
+    """
+    Fed by the instrumented connections with the SQLite time of every
+    statement and fetch. A statement's time includes the fetches from its
+    cursor (for most SELECTs that is where the rows are produced).
+    """
+
+    # sort= values of top() and the report field each sorts by
+    SORT_KEYS = {"total": "totalMs", "count": "count", "mean": "meanMs", "p99": "p99Ms", "max": "maxMs"}
+
+    def __init__(self, slow_ms: float = SQL_SLOW_MS, sample_size: int = SQL_PROFILE_SAMPLES,
+                 max_fingerprints: int = SQL_PROFILE_MAX_FINGERPRINTS, slow_log_size: int = SQL_SLOW_LOG_SIZE):
+        self.slow = slow_ms / 1000
+        self.sample_size = sample_size
+        self.max_fingerprints = max_fingerprints
+        self._stats: Dict[str, QueryStats] = {}
+        # id(sqlite3 cursor) -> [stats, sample, slow log record, sql, params]
+        # of the cursor's last statement
+        self._cursors: Dict[int, list] = {}
+        self.slow_log: deque = deque(maxlen=slow_log_size)
+        self.plans_captured = 0
+
+    def _get_stats(self, shape: str) -> QueryStats:
+        stats = self._stats.get(shape)
+        if stats is None:
+            if len(self._stats) >= self.max_fingerprints:
+                shape = "(other)"
+                stats = self._stats.get(shape)
+            if stats is None:
+                stats = self._stats[shape] = QueryStats(shape, self.sample_size)
+        return stats
+
+    def record(self, connection, fn, operation: str, args: tuple, result: Any, duration: float, caller: str):
+        """Account one operation of an instrumented connection"""
+        if operation in ("execute", "executemany"):
+            sql = str(args[0]) if args else ""
+            if sql.lstrip()[:7].upper() == "EXPLAIN":
+                return
+            stats = self._get_stats(fingerprint(sql))
+            sample = [duration]
+            stats.samples.append(sample)
+            stats.count += 1
+            stats.total += duration
+            stats.callers[caller] = stats.callers.get(caller, 0) + 1
+            cursor = result if isinstance(result, sqlite3.Cursor) else getattr(fn, "__self__", None)
+            if getattr(cursor, "rowcount", -1) > 0:
+                stats.rows += cursor.rowcount
+            if len(self._cursors) >= 10000:
+                self._cursors.clear()
+            params = args[1] if operation == "execute" and len(args) > 1 else None
+            pending = [stats, sample, None, sql, params]
+            self._cursors[id(cursor)] = pending
+            self._check(pending, connection, caller)
+        elif operation in _FETCHES:
+            pending = self._cursors.get(id(getattr(fn, "__self__", None)))
+            if pending is None:
+                return
+            stats, sample = pending[0], pending[1]
+            stats.total += duration
+            sample[0] += duration
+            stats.rows += (0 if result is None else 1) if operation == "fetchone" else len(result or ())
+            self._check(pending, connection, caller)
+
+    def _check(self, pending: list, connection, caller: str):
+        stats, sample, record, sql, params = pending
+        stats.max = max(stats.max, sample[0])
+        if sample[0] < self.slow:
+            return
+        if record is not None:
+            # Later fetches of a statement already logged as slow
+            record["durationMs"] = round(sample[0] * 1000, 3)
+            return
+        stats.slow += 1
+        pending[2] = record = {
+            "at": datetime.utcnow().isoformat(),
+            "durationMs": round(sample[0] * 1000, 3),
+            "fingerprint": stats.fingerprint,
+            "caller": caller,
+            "connection": connection.name,
+        }
+        self.slow_log.append(record)
+        print(f"Slow query ({record['durationMs']:.0f} ms, {caller}): {stats.fingerprint[:200]}")
+        if stats.plan is None and not stats.explaining and _has_plan(sql):
+            stats.explaining = True
+            # Empty context: the EXPLAIN must not show up in the request's trace
+            asyncio.get_running_loop().create_task(
+                self._explain(connection, stats, sql, params), context=contextvars.Context()
+            )
+
+    async def _explain(self, connection, stats: QueryStats, sql: str, params):
+        try:
+            cursor = await connection.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+            rows = await cursor.fetchall()
+            await cursor.close()
+            depth = {0: -1}
+            plan = []
+            for row in rows:
+                node_id, parent, detail = row[0], row[1], row[3]
+                depth[node_id] = depth.get(parent, -1) + 1
+                plan.append("  " * depth[node_id] + detail)
+            stats.plan = plan
+            stats.plan_sql = sql
+            self.plans_captured += 1
+        except Exception as e:
+            stats.plan = [f"EXPLAIN failed: {e}"]
+        finally:
+            stats.explaining = False
+
+    def top(self, limit: int = 20, sort: str = "total") -> List[Dict[str, Any]]:
+        """The `limit` heaviest fingerprints by total, count, max, mean or p99 time"""
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(self.SORT_KEYS)}")
+        reports = [stats.to_dict() for stats in self._stats.values()]
+        key = self.SORT_KEYS[sort]
+        reports.sort(key=lambda report: report[key] or 0, reverse=True)
+        return reports[:limit]
+
+    def reset(self):
+        self._stats.clear()
+        self._cursors.clear()
+        self.slow_log.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "fingerprints": len(self._stats),
+            "statements": sum(stats.count for stats in self._stats.values()),
+            "slowMs": self.slow * 1000,
+            "slowLogged": len(self.slow_log),
+            "plansCaptured": self.plans_captured,
+        }
+
+
+sql_profiler = SQLProfiler()
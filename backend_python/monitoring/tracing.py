@@ -0,0 +1,343 @@
+"""
+Request Tracing for BEOS Python Backend
+Span trees from route to model method to SQL statement, kept in a ring buffer
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from monitoring.http import route_template
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+import asyncio
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+
+# Share of requests traced and kept regardless of duration
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.01"))
+# Requests at least this slow are kept even when not sampled (every request
+# is then recorded; 0 records sampled requests only)
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "250"))
+# Kept traces held in memory for /api/admin/traces
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", "200"))
+# Spans per trace (further spans are counted, not recorded)
+TRACE_MAX_SPANS = int(os.environ.get("TRACE_MAX_SPANS", "500"))
+# Append kept traces to this file as OTLP/JSON lines (one
+# ExportTraceServiceRequest per line); unset disables export
+TRACE_EXPORT_FILE = os.environ.get("TRACE_EXPORT_FILE")
+
+# Longest SQL text recorded on a span
+MAX_STATEMENT_LENGTH = 2000
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# OTLP span kinds
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans", "dropped", "finished")
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self.finished = False
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "duration_ns",
+                 "attributes", "error", "cursor", "_started")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None,
+                 kind: int = KIND_INTERNAL, start_ns: Optional[int] = None):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.duration_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.cursor: Optional[int] = None
+        self._started = time.perf_counter()
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self):
+        if self.duration_ns is None:
+            self.duration_ns = int((time.perf_counter() - self._started) * 1e9)
+
+    @property
+    def duration_ms(self) -> float:
+        return round((self.duration_ns or 0) / 1e6, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns // 1000 / 1e3,
+            "durationMs": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def current_span() -> Optional[Span]:
+    """The span code is running in, or None when the request isn't traced"""
+    return _current_span.get()
+
+
+def set_span_attribute(key: str, value: Any):
+    span = _current_span.get()
+    if span is not None:
+        span.set(key, value)
+
+
+class Tracer:
+    """
+    Head sampling (TRACE_SAMPLE_RATE) plus tail keeping: while TRACE_SLOW_MS
+    is set every request is recorded, and the ones that turn out slow are
+    kept even if they weren't sampled. Kept traces go to a ring buffer and,
+    with TRACE_EXPORT_FILE, to an OTLP/JSON file.
+    """
+
+    def __init__(self, sample_rate: float = TRACE_SAMPLE_RATE, slow_ms: float = TRACE_SLOW_MS,
+                 buffer_size: int = TRACE_BUFFER_SIZE, max_spans: int = TRACE_MAX_SPANS,
+                 export_file: Optional[str] = TRACE_EXPORT_FILE):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.max_spans = max_spans
+        self.export_file = export_file
+        self._traces: deque = deque(maxlen=buffer_size)
+        self._export_lock = threading.Lock()
+        self.stats = {"recorded": 0, "kept": 0, "exported": 0, "exportErrors": 0, "droppedSpans": 0}
+
+    # Recording
+
+    def start_trace(self, name: str) -> Optional[Span]:
+        """Root span for a request, or None when it won't be recorded"""
+        sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_ms <= 0:
+            return None
+        root = Span(Trace(), name, kind=KIND_SERVER)
+        root.set("trace.sampled", sampled)
+        root.trace.spans.append(root)
+        self.stats["recorded"] += 1
+        return root
+
+    def add_span(self, name: str, kind: int = KIND_INTERNAL, start_ns: Optional[int] = None,
+                 parent: Optional[Span] = None) -> Optional[Span]:
+        """A child of `parent` (default: the current span), or None outside a trace"""
+        parent = parent or _current_span.get()
+        if parent is None or parent.trace.finished:
+            return None
+        trace = parent.trace
+        if len(trace.spans) >= self.max_spans:
+            trace.dropped += 1
+            self.stats["droppedSpans"] += 1
+            return None
+        span = Span(trace, name, parent.span_id, kind, start_ns)
+        trace.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL):
+        """Run a block in a child span of the current one (a no-op outside a trace)"""
+        span = self.add_span(name, kind)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+
+    def activate(self, span: Span):
+        return _current_span.set(span)
+
+    def deactivate(self, token):
+        _current_span.reset(token)
+
+    def finish_trace(self, root: Span):
+        """End a request's trace; keep it if sampled or slow"""
+        root.finish()
+        trace = root.trace
+        trace.finished = True
+        if trace.dropped:
+            root.set("trace.dropped_spans", trace.dropped)
+        if not root.attributes.get("trace.sampled") and root.duration_ms < self.slow_ms:
+            return
+        self._traces.append(root)
+        self.stats["kept"] += 1
+        if self.export_file:
+            line = json.dumps(self.to_otlp(root), separators=(",", ":"))
+            try:
+                asyncio.get_running_loop().run_in_executor(None, self._write_export, line)
+            except RuntimeError:
+                self._write_export(line)
+
+    def _write_export(self, line: str):
+        try:
+            with self._export_lock, open(self.export_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.stats["exported"] += 1
+        except OSError as e:
+            self.stats["exportErrors"] += 1
+            print(f"Trace export failed: {e}")
+
+    # Reading
+
+    @staticmethod
+    def summary(root: Span) -> Dict[str, Any]:
+        return {
+            "traceId": root.trace.trace_id,
+            "name": root.name,
+            "start": datetime.fromtimestamp(root.start_ns / 1e9, timezone.utc).isoformat(),
+            "durationMs": root.duration_ms,
+            "status": root.attributes.get("http.status_code"),
+            "sampled": root.attributes.get("trace.sampled"),
+            "spans": len(root.trace.spans),
+        }
+
+    def get_recent(self, limit: int = 50, min_ms: float = 0, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Kept traces, newest first"""
+        results = []
+        for root in reversed(self._traces):
+            if root.duration_ms < min_ms or (name and name not in root.name):
+                continue
+            results.append(self.summary(root))
+            if len(results) >= limit:
+                break
+        return results
+
+    def get_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """A kept trace as a span tree (children in start order)"""
+        root = next((r for r in self._traces if r.trace.trace_id == trace_id), None)
+        if root is None:
+            return None
+        nodes = {span.span_id: {**span.to_dict(), "children": []} for span in root.trace.spans}
+        for span in root.trace.spans:
+            if span.parent_id in nodes:
+                nodes[span.parent_id]["children"].append(nodes[span.span_id])
+        return {**self.summary(root), "root": nodes[root.span_id]}
+
+    @staticmethod
+    def to_otlp(root: Span) -> Dict[str, Any]:
+        """A trace as an OTLP/JSON ExportTraceServiceRequest"""
+
+        def value(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        spans = []
+        for span in root.trace.spans:
+            otlp = {
+                "traceId": span.trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.start_ns + (span.duration_ns or 0)),
+                "attributes": [{"key": k, "value": value(v)} for k, v in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {},
+            }
+            if span.parent_id:
+                otlp["parentSpanId"] = span.parent_id
+            spans.append(otlp)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "beos-backend"}}]},
+            "scopeSpans": [{"scope": {"name": "beos.tracing"}, "spans": spans}]
+        }]}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sampleRate": self.sample_rate,
+            "slowMs": self.slow_ms,
+            "buffered": len(self._traces),
+            **self.stats
+        }
+
+
+tracer = Tracer()
+
+
+def traced(name: str):
+    """Decorator: run a coroutine function in a span called `name`"""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            # Untraced requests pay one context variable lookup
+            if _current_span.get() is None:
+                return await fn(*args, **kwargs)
+            with tracer.span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def trace_methods(cls):
+    """Class decorator: a span per call of every async static method (`Class.method`)"""
+    for attr, member in list(vars(cls).items()):
+        if isinstance(member, staticmethod) and inspect.iscoroutinefunction(member.__func__):
+            setattr(cls, attr, staticmethod(traced(f"{cls.__name__}.{attr}")(member.__func__)))
+    return cls
+
+
+class TracingMiddleware:
+    """Opens a request's root span; its name becomes `METHOD /route/{template}`"""
+
+    def __init__(self, app, routes: list = None):
+        self.app = app
+        self.routes = routes if routes is not None else []
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        root = self.tracer.start_trace(f"{scope['method']} {scope['path']}")
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        root.set("http.method", scope["method"])
+        root.set("http.target", scope["path"] + (f"?{scope['query_string'].decode('latin-1')}" if scope.get("query_string") else ""))
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                root.set("http.status_code", message["status"])
+            await send(message)
+
+        token = self.tracer.activate(root)
+        try:
+            await self.app(scope, receive, send_status)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.tracer.deactivate(token)
+            template = route_template(scope, self.routes)
+            root.name = f"{scope['method']} {template}"
+            root.set("http.route", template)
+            self.tracer.finish_trace(root)
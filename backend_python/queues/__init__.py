@@ -0,0 +1,3 @@
+"""Background job queue module initialization"""
+from .job_queue import JobQueue, PRIORITY_CRITICAL, PRIORITY_NORMAL, PRIORITY_LOW
+from .tasks import job_handler
@@ -0,0 +1,295 @@
+"""
+Durable Job Queue for BEOS Python Backend
+SQLite-backed jobs with priorities, delays, retries and visibility timeouts
+"""
+
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+from monitoring.db import connect as instrumented_connect, LOCK_WAIT
+import aiosqlite
+import asyncio
+import json
+import os
+import random
+import time
+
+JOB_QUEUE_DB = os.environ.get(
+    "JOB_QUEUE_DB", str(Path(__file__).parent.parent / "database" / "jobs.db")
+)
+
+# Higher runs first
+PRIORITY_CRITICAL = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+# How long a claimed job stays invisible to other workers without a heartbeat
+DEFAULT_VISIBILITY_TIMEOUT = 60.0
+# Finished jobs are kept this long for status lookups
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue TEXT NOT NULL DEFAULT 'default',
+    name TEXT NOT NULL,
+    payload TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK(status IN ('pending', 'running', 'completed', 'failed', 'cancelled')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    backoff REAL NOT NULL DEFAULT 2,
+    repeat_every REAL,
+    unique_key TEXT,
+    run_at REAL NOT NULL,
+    locked_by TEXT,
+    locked_until REAL,
+    result TEXT,
+    last_error TEXT,
+    created_by INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, queue, priority DESC, run_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_locked ON jobs(status, locked_until);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_unique ON jobs(unique_key)
+    WHERE unique_key IS NOT NULL AND status IN ('pending', 'running');
+"""
+
+INSERT_JOB = """INSERT OR IGNORE INTO jobs
+    (queue, name, payload, priority, max_attempts, backoff, repeat_every, unique_key,
+     run_at, created_by, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    RETURNING *"""
+
+
+def _row_to_job(row) -> Dict[str, Any]:
+    job = dict(row)
+    for key in ("payload", "result"):
+        job[key] = json.loads(job[key]) if job.get(key) else None
+    return job
+
+
+class JobQueue:
+    """
+    Jobs live in their own SQLite file so queue traffic never contends
+    with the main database. Any number of processes may share it: a job
+    is claimed with one atomic UPDATE and stays invisible to others until
+    `locked_until`; a worker that dies simply lets the lock expire.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_DB):
+        self.path = path
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        # Workers share one connection; each write (or _transaction block) is its own transaction
+        self._write_lock = asyncio.Lock()
+        # Called after every enqueue (in-process pools wake up immediately)
+        self.listeners: List = []
+
+    async def _db(self) -> aiosqlite.Connection:
+        async with self._connect_lock:
+            if self._conn is None:
+                conn = await instrumented_connect(self.path, "jobs")
+                conn.row_factory = aiosqlite.Row
+                await conn.execute("PRAGMA journal_mode=WAL")
+                await conn.execute("PRAGMA synchronous=NORMAL")
+                await conn.execute("PRAGMA busy_timeout=5000")
+                await conn.executescript(SCHEMA)
+                await conn.commit()
+                self._conn = conn
+            return self._conn
+
+    @asynccontextmanager
+    async def _transaction(self):
+        """The connection under the write lock; commits the block's writes together, or none of them"""
+        db = await self._db()
+        waiting = time.perf_counter()
+        async with self._write_lock:
+            LOCK_WAIT.observe(time.perf_counter() - waiting, ("job_queue_write",))
+            try:
+                yield db
+            except BaseException:
+                await db.rollback()
+                raise
+            await db.commit()
+
+    @staticmethod
+    async def _execute(db: aiosqlite.Connection, sql: str, params: tuple = ()) -> tuple:
+        cursor = await db.execute(sql, params)
+        # Drain RETURNING rows so the statement is finished before commit
+        rows = await cursor.fetchall()
+        rowcount = cursor.rowcount
+        await cursor.close()
+        return rows, rowcount
+
+    async def _write(self, sql: str, params: tuple = ()) -> tuple:
+        """Run one statement and commit it; returns (rows, rowcount)"""
+        async with self._transaction() as db:
+            return await self._execute(db, sql, params)
+
+    async def close(self):
+        """Close the queue connection"""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def enqueue(self, name: str, payload: Dict[str, Any] = None, queue: str = "default",
+                      priority: int = PRIORITY_NORMAL, delay: float = 0, run_at: float = None,
+                      max_attempts: int = 3, backoff: float = 2, repeat_every: float = None,
+                      unique_key: str = None, created_by: int = None) -> Dict[str, Any]:
+        """
+        Add a job. `delay`/`run_at` schedule it for later, `repeat_every`
+        re-schedules it after each success, and `unique_key` makes the call
+        a no-op (returning the existing job) while an identical job is
+        pending or running.
+        """
+        now = time.time()
+        rows, _ = await self._write(
+            INSERT_JOB,
+            (queue, name, json.dumps(payload or {}), priority, max_attempts, backoff, repeat_every,
+             unique_key, run_at if run_at is not None else now + delay, created_by, now)
+        )
+
+        if rows:
+            job = _row_to_job(rows[0])
+            self._notify(job)
+            return job
+
+        db = await self._db()
+        cursor = await db.execute(
+            "SELECT * FROM jobs WHERE unique_key = ? AND status IN ('pending', 'running')",
+            (unique_key,)
+        )
+        return _row_to_job(await cursor.fetchone())
+
+    def _notify(self, job: Dict[str, Any]):
+        for listener in self.listeners:
+            listener(job)
+
+    async def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a job by ID"""
+        db = await self._db()
+        cursor = await db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        row = await cursor.fetchone()
+        return _row_to_job(row) if row else None
+
+    async def claim(self, queues: Iterable[str], worker_id: str,
+                    visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> Optional[Dict[str, Any]]:
+        """Atomically take the most urgent ready job from the given queues"""
+        queues = list(queues)
+        now = time.time()
+        rows, _ = await self._write(
+            f"""UPDATE jobs
+            SET status = 'running', locked_by = ?, locked_until = ?,
+                attempts = attempts + 1, started_at = ?
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE status = 'pending' AND queue IN ({','.join('?' for _ in queues)}) AND run_at <= ?
+                ORDER BY priority DESC, run_at, id
+                LIMIT 1
+            )
+            RETURNING *""",
+            (worker_id, now + visibility_timeout, now, *queues, now)
+        )
+        return _row_to_job(rows[0]) if rows else None
+
+    async def extend(self, job_id: int, worker_id: str,
+                     visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        """Heartbeat: keep a running job invisible to other workers"""
+        _, rowcount = await self._write(
+            "UPDATE jobs SET locked_until = ? WHERE id = ? AND locked_by = ? AND status = 'running'",
+            (time.time() + visibility_timeout, job_id, worker_id)
+        )
+        return rowcount > 0
+
+    async def complete(self, job_id: int, worker_id: str, result: Any = None) -> bool:
+        """
+        Mark a job done. A repeating job's next run is inserted in the same
+        transaction, so a crash can't complete it without rescheduling it.
+        """
+        now = time.time()
+        next_job = None
+        async with self._transaction() as db:
+            rows, _ = await self._execute(
+                db,
+                """UPDATE jobs SET status = 'completed', result = ?, finished_at = ?, locked_by = NULL
+                WHERE id = ? AND locked_by = ? AND status = 'running'
+                RETURNING *""",
+                (json.dumps(result, default=str), now, job_id, worker_id)
+            )
+            if rows and rows[0]["repeat_every"]:
+                job = rows[0]
+                # The completed row no longer holds its unique_key, so only a
+                # copy enqueued meanwhile makes this a no-op
+                inserted, _ = await self._execute(
+                    db, INSERT_JOB,
+                    (job["queue"], job["name"], job["payload"], job["priority"], job["max_attempts"],
+                     job["backoff"], job["repeat_every"], job["unique_key"], now + job["repeat_every"],
+                     None, now)
+                )
+                next_job = _row_to_job(inserted[0]) if inserted else None
+        if next_job:
+            self._notify(next_job)
+        return bool(rows)
+
+    async def fail(self, job_id: int, worker_id: str, error: str) -> Optional[str]:
+        """Record a failure; retried with exponential backoff until attempts run out"""
+        # backoff, 2x backoff, 4x backoff ... with +-20% jitter
+        jitter = random.uniform(0.8, 1.2)
+        now = time.time()
+        rows, _ = await self._write(
+            """UPDATE jobs SET
+                status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+                run_at = CASE WHEN attempts < max_attempts
+                    THEN ? + backoff * (1 << (attempts - 1)) * ? ELSE run_at END,
+                finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE ? END,
+                last_error = ?, locked_by = NULL, locked_until = NULL
+            WHERE id = ? AND locked_by = ? AND status = 'running'
+            RETURNING status""",
+            (now, jitter, now, error, job_id, worker_id)
+        )
+        return rows[0]["status"] if rows else None
+
+    async def cancel(self, job_id: int) -> bool:
+        """Cancel a job that has not started yet"""
+        _, rowcount = await self._write(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'pending'",
+            (time.time(), job_id)
+        )
+        return rowcount > 0
+
+    async def requeue_expired(self) -> int:
+        """Return jobs whose worker stopped heartbeating to the queue (or fail them when out of attempts)"""
+        now = time.time()
+        await self._write(
+            """UPDATE jobs SET status = 'failed', last_error = 'Visibility timeout expired',
+                finished_at = ?, locked_by = NULL, locked_until = NULL
+            WHERE status = 'running' AND locked_until < ? AND attempts >= max_attempts""",
+            (now, now)
+        )
+        _, rowcount = await self._write(
+            """UPDATE jobs SET status = 'pending', locked_by = NULL, locked_until = NULL
+            WHERE status = 'running' AND locked_until < ?""",
+            (now,)
+        )
+        return rowcount
+
+    async def prune(self, older_than: float = JOB_RETENTION_SECONDS) -> int:
+        """Delete finished jobs older than `older_than` seconds"""
+        _, rowcount = await self._write(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed', 'cancelled') AND finished_at < ?",
+            (time.time() - older_than,)
+        )
+        return rowcount
+
+    async def counts(self) -> Dict[str, Dict[str, int]]:
+        """Job counts per queue and status"""
+        db = await self._db()
+        cursor = await db.execute("SELECT queue, status, COUNT(*) FROM jobs GROUP BY queue, status")
+        counts: Dict[str, Dict[str, int]] = {}
+        for queue, status, count in await cursor.fetchall():
+            counts.setdefault(queue, {})[status] = count
+        return counts
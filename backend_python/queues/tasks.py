@@ -0,0 +1,74 @@
+"""
+Job Handlers for BEOS Python Backend
+Every job name maps to an async function (payload, context) -> result;
+the context holds the pool's shared objects plus the running `job`
+"""
+
+from models.blood_bank import BloodBank
+from services.ai_service import AIService
+from database.db import get_db
+from typing import Dict, Any, Callable, Awaitable
+import os
+
+JobHandler = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]
+
+HANDLERS: Dict[str, JobHandler] = {}
+
+# Analytics jobs get a longer deadline than HTTP requests
+ANALYTICS_JOB_TIMEOUT = float(os.environ.get("ANALYTICS_JOB_TIMEOUT_SECONDS", "300"))
+
+
+def job_handler(name: str):
+    """Register a coroutine as the handler for a job name"""
+    def register(func: JobHandler) -> JobHandler:
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+@job_handler("ai.predict-demand")
+async def predict_demand(payload, context):
+    return await AIService.predict_demand(payload.get("days", 7), timeout=ANALYTICS_JOB_TIMEOUT)
+
+
+@job_handler("ai.suggest-transfers")
+async def suggest_transfers(payload, context):
+    return await AIService.suggest_transfers(timeout=ANALYTICS_JOB_TIMEOUT)
+
+
+@job_handler("ai.smart-match")
+async def smart_match(payload, context):
+    return await AIService.smart_match_donors(payload["request_id"], timeout=ANALYTICS_JOB_TIMEOUT)
+
+
+@job_handler("inventory.resync")
+async def resync_inventory(payload, context):
+    """Rebuild blood_inventory totals from batches (one bank, or every bank)"""
+    db = await get_db()
+    if payload.get("bank_id"):
+        cursor = await db.execute(
+            "SELECT DISTINCT blood_bank_id, blood_type FROM blood_batches WHERE blood_bank_id = ?",
+            (payload["bank_id"],)
+        )
+    else:
+        cursor = await db.execute("SELECT DISTINCT blood_bank_id, blood_type FROM blood_batches")
+    pairs = await cursor.fetchall()
+    for bank_id, blood_type in pairs:
+        await BloodBank.sync_inventory(bank_id, blood_type)
+    return {"synced": len(pairs)}
+
+
+@job_handler("donor-blast")
+async def donor_blast(payload, context):
+    job = context["job"]
+    return await context["blast_service"].run(
+        payload["blast_id"], final_attempt=job["attempts"] >= job["max_attempts"]
+    )
+
+
+@job_handler("data-import")
+async def data_import(payload, context):
+    job = context["job"]
+    return await context["import_service"].run(
+        payload["import_id"], final_attempt=job["attempts"] >= job["max_attempts"]
+    )
@@ -0,0 +1,229 @@
+"""
+Job Worker Pool for BEOS Python Backend
+Runs queued jobs inside the API process or as a standalone process:
+
+    python -m queues.worker --queues default,notifications --concurrency 4
+"""
+
+from queues.job_queue import JobQueue, DEFAULT_VISIBILITY_TIMEOUT
+from queues.tasks import HANDLERS
+from typing import Dict, Any, List
+import argparse
+import asyncio
+import os
+import socket
+import time
+import uuid
+
+# "queue=concurrency,..." for the pools started inside the API process
+JOB_WORKERS = os.environ.get("JOB_WORKERS", "critical,default=4;notifications=2")
+# Set to 0 when jobs are processed by standalone workers only
+JOB_WORKERS_IN_PROCESS = os.environ.get("JOB_WORKERS_IN_PROCESS", "1") == "1"
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL_SECONDS", "0.5"))
+# How often expired visibility locks are released and old jobs pruned
+MAINTENANCE_INTERVAL = 30.0
+
+
+def parse_worker_spec(spec: str) -> List[Dict[str, Any]]:
+    """
+    Parse JOB_WORKERS, e.g. "critical,default=4;notifications=2":
+    one pool per ';' item, serving the ',' separated queues.
+    """
+    pools = []
+    for item in (spec or "").split(";"):
+        if not item.strip():
+            continue
+        queues, _, concurrency = item.partition("=")
+        pools.append({
+            "queues": [q.strip() for q in queues.split(",") if q.strip()],
+            "concurrency": int(concurrency or 1)
+        })
+    return pools
+
+
+class WorkerPool:
+    """`concurrency` asyncio workers claiming jobs from a set of queues"""
+
+    def __init__(self, queue: JobQueue, queues: List[str] = None, concurrency: int = 4,
+                 context: Dict[str, Any] = None, poll_interval: float = JOB_POLL_INTERVAL,
+                 visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT):
+        self.queue = queue
+        self.queues = queues or ["default"]
+        self.concurrency = concurrency
+        self.context = context or {}
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._tasks: List[asyncio.Task] = []
+        self.running: Dict[int, str] = {}
+        self.stats = {"completed": 0, "retried": 0, "failed": 0, "lost": 0, "last_wait_ms": None}
+        queue.listeners.append(self._on_enqueue)
+
+    def _on_enqueue(self, job: Dict[str, Any]):
+        if job["queue"] in self.queues:
+            self._wake.set()
+
+    def start(self):
+        """Start the worker tasks"""
+        if not self._tasks:
+            self._stopping = False
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self, grace: float = 10.0):
+        """Stop claiming jobs, give running ones `grace` seconds, then cancel them"""
+        self._stopping = True
+        self._wake.set()
+        if not self._tasks:
+            return
+        done, pending = await asyncio.wait(self._tasks, timeout=grace)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while not self._stopping:
+            try:
+                job = await self.queue.claim(self.queues, self.worker_id, self.visibility_timeout)
+            except Exception as e:
+                print(f"Job claim error: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self, job: Dict[str, Any], work: asyncio.Task):
+        """
+        Keep the job's lock alive. Returns (after cancelling `work`) when the
+        lock is gone: the visibility timeout ran out and the job was handed
+        back to the queue, possibly to another worker already running it.
+        """
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                extended = await self.queue.extend(job["id"], self.worker_id, self.visibility_timeout)
+            except Exception as e:
+                print(f"Job {job['id']} heartbeat error: {e}")
+                continue
+            if not extended:
+                print(f"Job {job['id']} ({job['name']}) lost its lock, cancelling")
+                work.cancel()
+                return
+
+    async def _run(self, job: Dict[str, Any]):
+        self.stats["last_wait_ms"] = round((time.time() - job["run_at"]) * 1000, 1)
+        self.running[job["id"]] = job["name"]
+        heartbeat = None
+        try:
+            handler = HANDLERS.get(job["name"])
+            if handler is None:
+                raise LookupError(f"No handler for job '{job['name']}'")
+            work = asyncio.create_task(handler(job["payload"] or {}, {**self.context, "job": job}))
+            heartbeat = asyncio.create_task(self._heartbeat(job, work))
+            try:
+                result = await work
+            except asyncio.CancelledError:
+                if not heartbeat.done():
+                    # Shutdown: the lock expires and another worker picks the job up
+                    raise
+                # Lock lost: the job is no longer ours to complete or fail
+                self.stats["lost"] += 1
+                return
+            if await self.queue.complete(job["id"], self.worker_id, result):
+                self.stats["completed"] += 1
+            else:
+                self.stats["lost"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status = await self.queue.fail(job["id"], self.worker_id, f"{type(e).__name__}: {e}")
+            self.stats["retried" if status == "pending" else "failed"] += 1
+            print(f"Job {job['id']} ({job['name']}) failed: {e}")
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            self.running.pop(job["id"], None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool configuration, running jobs and outcome counts"""
+        return {
+            "queues": self.queues,
+            "concurrency": self.concurrency,
+            "running": dict(self.running),
+            **self.stats
+        }
+
+
+async def run_maintenance(queue: JobQueue, interval: float = MAINTENANCE_INTERVAL):
+    """Release expired locks and prune finished jobs forever"""
+    while True:
+        try:
+            released = await queue.requeue_expired()
+            if released:
+                print(f"Requeued {released} job(s) after visibility timeout")
+            await queue.prune()
+        except Exception as e:
+            print(f"Job maintenance error: {e}")
+        await asyncio.sleep(interval)
+
+
+class ExternalEmitter:
+    """`sio.emit`-compatible sender for processes without a Socket.IO server"""
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    async def emit(self, event, data=None, to=None, room=None, namespace='/'):
+        await self.manager.emit(event, data, namespace=namespace, room=to or room)
+
+
+async def main(queues: List[str], concurrency: int):
+    """Standalone worker: run a pool until interrupted"""
+    from database.db import close_db
+    from services.blast_service import BlastService
+    from services.import_service import ImportService
+    from socket_handlers.manager import SOCKETIO_MESSAGE_QUEUE, create_client_manager, close_client_manager
+
+    # Socket events reach clients through the shared message queue, if any
+    manager = None
+    emitter = None
+    if SOCKETIO_MESSAGE_QUEUE:
+        manager = create_client_manager(SOCKETIO_MESSAGE_QUEUE, write_only=True)
+        emitter = ExternalEmitter(manager)
+
+    queue = JobQueue()
+    pool = WorkerPool(queue, queues, concurrency, context={
+        "sio": emitter,
+        "blast_service": BlastService(emitter, queue),
+        "import_service": ImportService(queue)
+    })
+    pool.start()
+    maintenance = asyncio.create_task(run_maintenance(queue))
+    print(f"Worker {pool.worker_id} processing {', '.join(queues)} (concurrency {concurrency})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        maintenance.cancel()
+        await pool.stop()
+        await queue.close()
+        if manager:
+            await close_client_manager(manager)
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BEOS background job worker")
+    parser.add_argument("--queues", default="critical,default,notifications")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main([q.strip() for q in args.queues.split(",") if q.strip()], args.concurrency))
+    except KeyboardInterrupt:
+        pass
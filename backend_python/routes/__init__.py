@@ -1,2 +1,2 @@
 """Routes module initialization"""
-from . import auth, admin, donors, hospitals, blood_banks, requests, organs, ai
+from . import auth, admin, donors, hospitals, blood_banks, requests, organs, ai, jobs, exports, imports
@@ -2,9 +2,24 @@
 Admin Routes for BEOS Python Backend
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from database.db import get_db
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from database.db import get_db, fetch_dicts
+from database.passwords import password_hasher
+from services.analytics_pool import analytics_pool
+from services.export_service import export_service
 from middleware.auth import authorize_roles
+from routes.responses import success
+from middleware.tokens import token_cache, revocation_list
+from middleware.etag import etag_stats
+from middleware.response_cache import response_cache
+from monitoring.loop_lag import loop_lag_monitor, stall_watchdog
+from monitoring.tracing import tracer
+from monitoring.sql_profiler import sql_profiler
+from monitoring.profiler import profiler, ProfilerBusy, PROFILER_MAX_SECONDS, PROFILER_INTERVAL_MS
+import asyncio
+import threading
 
 router = APIRouter()
 
@@ -93,10 +108,9 @@ async def get_all_users(_: dict = Depends(authorize_roles("admin"))):
         """
         
         cursor = await db.execute(query)
-        rows = await cursor.fetchall()
-        users = [dict(row) for row in rows]
+        users = await fetch_dicts(cursor)
         
-        return {"success": True, "data": users}
+        return success(users)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -115,9 +129,155 @@ async def delete_user(user_id: int, current_user: dict = Depends(authorize_roles
         db = await get_db()
         await db.execute("DELETE FROM users WHERE id = ?", (user_id,))
         await db.commit()
+        # Tokens already issued to the user stop working
+        await revocation_list.revoke_user(user_id)
         
         return {"success": True, "message": "User deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.post("/users/{user_id}/revoke-tokens")
+async def revoke_user_tokens(user_id: int, _: dict = Depends(authorize_roles("admin"))):
+    """Sign a user out everywhere (every token issued until now)"""
+    try:
+        await revocation_list.revoke_user(user_id)
+        return {"success": True, "message": "User tokens revoked"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.get("/realtime")
+async def get_realtime_stats(request: Request, _: dict = Depends(authorize_roles("admin"))):
+    """Socket layer counters: fan-out, stats stream, rate limits and backpressure"""
+    state = request.app.state
+    sio = state.sio
+    return {
+        "success": True,
+        "data": {
+            "connectedClients": len(sio.eio.sockets),
+            "connections": state.registry.get_stats(),
+            "presence": state.presence.get_stats(),
+            "eventBus": state.event_bus.get_stats(),
+            "statsStream": state.stats_stream.stats,
+            "rateLimits": state.rate_limiter.get_stats(),
+            "alerts": state.alert_dispatcher.stats,
+            "jobs": [pool.get_stats() for pool in state.worker_pools],
+            "passwordHashing": password_hasher.get_stats(),
+            "tokens": {**token_cache.get_stats(), **revocation_list.get_stats()},
+            "analytics": analytics_pool.get_stats(),
+            "exports": export_service.get_stats(),
+            "etags": etag_stats,
+            "responseCache": response_cache.get_stats(),
+            "eventLoop": {**loop_lag_monitor.get_stats(), "watchdog": stall_watchdog.get_stats()},
+            "tracing": tracer.get_stats(),
+            "profiler": profiler.get_stats(),
+            "sqlProfile": sql_profiler.get_stats(),
+            "backpressure": sio.get_backpressure_stats()
+        }
+    }
+
+
+@router.get("/traces")
+async def get_traces(
+    limit: int = Query(50, ge=1, le=500),
+    min_ms: float = Query(0, ge=0),
+    name: Optional[str] = Query(None),
+    _: dict = Depends(authorize_roles("admin"))
+):
+    """Recent kept traces (sampled or slow requests), newest first"""
+    return success(tracer.get_recent(limit, min_ms, name))
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, _: dict = Depends(authorize_roles("admin"))):
+    """One trace as a span tree: request, model methods, SQL statements"""
+    trace = tracer.get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail={"success": False, "error": "Trace not found (it may have been evicted)"})
+    return success(trace)
+
+
+@router.get("/sql")
+async def get_sql_profile(
+    limit: int = Query(20, ge=1, le=500),
+    sort: str = Query("total"),
+    _: dict = Depends(authorize_roles("admin"))
+):
+    """Heaviest statement fingerprints with count, total, p50/p99 and query plans"""
+    if sort not in sql_profiler.SORT_KEYS:
+        raise HTTPException(status_code=400, detail={"success": False, "error": f"sort must be one of: {', '.join(sql_profiler.SORT_KEYS)}"})
+    return success({**sql_profiler.get_stats(), "queries": sql_profiler.top(limit, sort)})
+
+
+@router.get("/sql/slow")
+async def get_slow_queries(limit: int = Query(50, ge=1, le=500), _: dict = Depends(authorize_roles("admin"))):
+    """Most recent statements over SQL_SLOW_MS, newest first"""
+    return success(list(reversed(sql_profiler.slow_log))[:limit])
+
+
+@router.delete("/sql")
+async def reset_sql_profile(_: dict = Depends(authorize_roles("admin"))):
+    """Start a fresh profiling window"""
+    sql_profiler.reset()
+    return {"success": True, "message": "SQL profile reset"}
+
+
+@router.get("/loop-stalls")
+async def get_loop_stalls(
+    limit: int = Query(50, ge=1, le=500),
+    min_ms: float = Query(0, ge=0),
+    _: dict = Depends(authorize_roles("admin"))
+):
+    """Event loop stalls with the stacks sampled while blocked, and blocking functions by total time"""
+    return success({
+        **stall_watchdog.get_stats(),
+        "hotspots": stall_watchdog.get_hotspots(),
+        "stalls": stall_watchdog.get_recent(limit, min_ms)
+    })
+
+
+def profile_response(report: dict, format: str):
+    """A profile report as JSON, or its collapsed stacks as a download for flamegraph tools"""
+    if format == "collapsed":
+        filename = f"profile-{report['finished'][:19].replace(':', '')}.collapsed"
+        return PlainTextResponse(report["collapsed"],
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    return success(report)
+
+
+@router.post("/profile")
+async def run_profile(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(PROFILER_INTERVAL_MS, ge=1, le=1000),
+    threads: str = Query("loop", pattern="^(loop|all)$"),
+    include_idle: bool = Query(False),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    _: dict = Depends(authorize_roles("admin"))
+):
+    """
+    Sample the live process for `seconds` and return the top functions and
+    collapsed stacks. `threads=loop` profiles the event loop thread, `all`
+    adds the DB, bcrypt and worker threads. One profile at a time.
+    """
+    thread_id = threading.get_ident() if threads == "loop" else None
+    try:
+        report = await asyncio.get_running_loop().run_in_executor(
+            None, profiler.run, seconds, interval_ms / 1000, thread_id, include_idle
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail={"success": False, "error": str(e)})
+    return profile_response(report, format)
+
+
+@router.get("/profile/last")
+async def get_last_profile(
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    _: dict = Depends(authorize_roles("admin"))
+):
+    """The most recent profile (e.g. to fetch its collapsed stacks after reading the summary)"""
+    if profiler.last is None:
+        raise HTTPException(status_code=404, detail={"success": False, "error": "No profile has been run"})
+    return profile_response(profiler.last, format)
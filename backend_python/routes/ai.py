@@ -2,19 +2,57 @@
 AI Routes for BEOS Enterprise
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from pydantic import BaseModel
+from typing import Optional, List
 from services.ai_service import AIService
+from services.analytics_pool import AnalyticsTimeout, ClientDisconnected, run_until_disconnected
+from models.donor_blast import DonorBlast
 from middleware.auth import authorize_roles
+from routes.responses import success
 
 router = APIRouter()
 
 
+def analytics_error(e: Exception) -> HTTPException:
+    """504 when analytics timed out (retry with background=true), 499 when the client left"""
+    if isinstance(e, ClientDisconnected):
+        return HTTPException(status_code=499, detail={"success": False, "error": "Client closed request"})
+    return HTTPException(status_code=504, detail={"success": False, "error": f"{e}; retry with background=true"})
+
+
+async def enqueue_job(request: Request, name: str, payload: dict, current_user: dict) -> dict:
+    """Queue an AI computation instead of running it in the request"""
+    return await request.app.state.job_queue.enqueue(name, payload, created_by=current_user.get("id"))
+
+
+class DonorBlastCreate(BaseModel):
+    blood_types: Optional[List[str]] = None
+    city: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius_km: Optional[float] = None
+    eligible_only: Optional[bool] = True
+    channels: Optional[List[str]] = None
+    message: Optional[str] = None
+
+
 @router.get("/predict-demand")
-async def predict_demand(days: int = Query(7, ge=1, le=30), _: dict = Depends(authorize_roles("admin", "blood_bank"))):
-    """Predict blood demand for coming days"""
+async def predict_demand(
+    request: Request,
+    days: int = Query(7, ge=1, le=30),
+    background: bool = Query(False),
+    current_user: dict = Depends(authorize_roles("admin", "blood_bank"))
+):
+    """Predict blood demand for coming days (`background=true` queues a job)"""
     try:
-        prediction = await AIService.predict_demand(days)
-        return {"success": True, "data": prediction}
+        if background:
+            job = await enqueue_job(request, "ai.predict-demand", {"days": days}, current_user)
+            return success(job)
+        prediction = await run_until_disconnected(request, AIService.predict_demand(days))
+        return success(prediction)
+    except (AnalyticsTimeout, ClientDisconnected) as e:
+        raise analytics_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -24,27 +62,46 @@ async def get_expiring(days: int = Query(7, ge=1, le=30), _: dict = Depends(auth
     """Get blood batches expiring soon"""
     try:
         expiring = await AIService.get_expiring_blood(days)
-        return {"success": True, "data": expiring}
+        return success(expiring)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
 
 @router.get("/suggest-transfers")
-async def suggest_transfers(_: dict = Depends(authorize_roles("admin"))):
-    """Get AI-suggested inventory transfers"""
+async def suggest_transfers(
+    request: Request,
+    background: bool = Query(False),
+    current_user: dict = Depends(authorize_roles("admin"))
+):
+    """Get AI-suggested inventory transfers (`background=true` queues a job)"""
     try:
-        suggestions = await AIService.suggest_transfers()
-        return {"success": True, "data": suggestions}
+        if background:
+            job = await enqueue_job(request, "ai.suggest-transfers", {}, current_user)
+            return success(job)
+        suggestions = await run_until_disconnected(request, AIService.suggest_transfers())
+        return success(suggestions)
+    except (AnalyticsTimeout, ClientDisconnected) as e:
+        raise analytics_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
 
 @router.get("/smart-match/{request_id}")
-async def smart_match(request_id: int, _: dict = Depends(authorize_roles("hospital", "admin"))):
-    """Smart match donors for a request"""
+async def smart_match(
+    request_id: int,
+    request: Request,
+    background: bool = Query(False),
+    current_user: dict = Depends(authorize_roles("hospital", "admin"))
+):
+    """Smart match donors for a request (`background=true` queues a job)"""
     try:
-        matches = await AIService.smart_match_donors(request_id)
-        return {"success": True, "data": matches}
+        if background:
+            job = await enqueue_job(request, "ai.smart-match", {"request_id": request_id}, current_user)
+            return success(job)
+        matches = await run_until_disconnected(request, AIService.smart_match_donors(request_id))
+        return success(matches)
+    except (AnalyticsTimeout, ClientDisconnected) as e:
+        raise analytics_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -54,6 +111,69 @@ async def get_insights(_: dict = Depends(authorize_roles("admin"))):
     """Get AI-powered dashboard insights"""
     try:
         insights = await AIService.get_insights()
-        return {"success": True, "data": insights}
+        return success(insights)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.post("/donor-blast")
+async def create_donor_blast(
+    blast: DonorBlastCreate,
+    request: Request,
+    current_user: dict = Depends(authorize_roles("admin", "blood_bank"))
+):
+    """Notify matching donors in the background (defaults to low-stock blood types)"""
+    try:
+        created = await request.app.state.blast_service.start(blast.model_dump(), current_user.get("id"))
+        return {"success": True, "data": created}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"success": False, "error": str(e)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.get("/donor-blast")
+async def list_donor_blasts(
+    limit: int = Query(20, ge=1, le=100),
+    _: dict = Depends(authorize_roles("admin", "blood_bank"))
+):
+    """Get recent donor blasts"""
+    try:
+        blasts = await DonorBlast.get_recent(limit)
+        return success(blasts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.get("/donor-blast/{blast_id}")
+async def get_donor_blast(blast_id: int, _: dict = Depends(authorize_roles("admin", "blood_bank"))):
+    """Get a donor blast with its progress"""
+    try:
+        blast = await DonorBlast.get_by_id(blast_id)
+        if not blast:
+            raise HTTPException(status_code=404, detail={"success": False, "error": "Blast not found"})
+        return success(blast)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.post("/donor-blast/{blast_id}/cancel")
+async def cancel_donor_blast(
+    blast_id: int,
+    request: Request,
+    _: dict = Depends(authorize_roles("admin", "blood_bank"))
+):
+    """Cancel a queued or running donor blast"""
+    try:
+        if not await request.app.state.blast_service.cancel(blast_id):
+            raise HTTPException(
+                status_code=404,
+                detail={"success": False, "error": "Blast not found or already finished"}
+            )
+        return {"success": True, "data": await DonorBlast.get_by_id(blast_id)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
@@ -9,7 +9,10 @@ from models.user import User
 from models.donor import Donor
 from models.hospital import Hospital
 from models.blood_bank import BloodBank
-from middleware.auth import verify_token, create_access_token
+from models.refresh_token import RefreshToken
+from middleware.auth import verify_token, create_access_token, resolve_profile_id, PROFILE_CLAIMS, ACCESS_TOKEN_MINUTES
+from middleware.tokens import revocation_list
+from database.passwords import PasswordHasherBusy
 
 router = APIRouter()
 
@@ -34,6 +37,23 @@ class LoginRequest(BaseModel):
     password: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
+async def issue_tokens(claims: dict) -> dict:
+    """Access token plus the first refresh token of a new family"""
+    return {
+        "token": create_access_token(claims),
+        "refreshToken": await RefreshToken.issue(claims),
+        "expiresIn": int(ACCESS_TOKEN_MINUTES * 60)
+    }
+
+
 @router.post("/register")
 async def register(request: RegisterRequest):
     """Register a new user"""
@@ -62,6 +82,8 @@ async def register(request: RegisterRequest):
         if request.role == "user":
             # User role maps to Donor profile
             profile_data["blood_type"] = request.blood_type
+            profile_data["latitude"] = request.latitude
+            profile_data["longitude"] = request.longitude
             profile = await Donor.create(profile_data)
         elif request.role == "hospital":
             profile_data["latitude"] = request.latitude
@@ -74,16 +96,18 @@ async def register(request: RegisterRequest):
             profile_data["operating_hours"] = request.operating_hours
             profile = await BloodBank.create(profile_data)
         
-        # Create token
-        token = create_access_token({
+        # Create token (carries the profile ID so handlers skip the lookup)
+        claims = {
             "id": user["id"],
             "email": user["email"],
             "role": user["role"]
-        })
+        }
+        if profile:
+            claims[PROFILE_CLAIMS[user["role"]]] = profile["id"]
         
         return {
             "success": True,
-            "token": token,
+            **await issue_tokens(claims),
             "user": {
                 "id": user["id"],
                 "email": user["email"],
@@ -103,21 +127,24 @@ async def login(request: LoginRequest):
     try:
         user = await User.find_by_email(request.email)
         
-        if not user or not User.verify_password(request.password, user["password_hash"]):
+        if not user or not await User.verify_login(request.password, user["password_hash"]):
             raise HTTPException(
                 status_code=401,
                 detail={"success": False, "error": "Invalid credentials"}
             )
         
-        token = create_access_token({
+        claims = {
             "id": user["id"],
             "email": user["email"],
             "role": user["role"]
-        })
+        }
+        profile_id = await resolve_profile_id(claims)
+        if profile_id is not None:
+            claims[PROFILE_CLAIMS[user["role"]]] = profile_id
         
         return {
             "success": True,
-            "token": token,
+            **await issue_tokens(claims),
             "user": {
                 "id": user["id"],
                 "email": user["email"],
@@ -126,8 +153,44 @@ async def login(request: LoginRequest):
         }
     except HTTPException:
         raise
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=503,
+            detail={"success": False, "error": str(e)},
+            headers={"Retry-After": str(int(e.retry_after))}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.post("/refresh")
+async def refresh(request: RefreshRequest):
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    No password check: one indexed lookup, a rotation and a signature.
+    """
+    try:
+        refresh_token, claims = await RefreshToken.rotate(request.refresh_token)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail={"success": False, "error": str(e)})
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+    
+    return {
+        "success": True,
+        "token": create_access_token(claims),
+        "refreshToken": refresh_token,
+        "expiresIn": int(ACCESS_TOKEN_MINUTES * 60)
+    }
+
+
+@router.post("/logout")
+async def logout(request: Optional[LogoutRequest] = None, current_user: dict = Depends(verify_token)):
+    """Revoke the token used for this request and, if given, its refresh token family"""
+    await revocation_list.revoke_token(current_user)
+    if request and request.refresh_token:
+        await RefreshToken.revoke(request.refresh_token)
+    return {"success": True, "message": "Logged out"}
 
 
 @router.get("/me")
@@ -6,7 +6,8 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import Optional
 from models.blood_bank import BloodBank
-from middleware.auth import verify_token
+from middleware.auth import verify_token, resolve_profile_id
+from routes.responses import success
 
 router = APIRouter()
 
@@ -59,7 +60,7 @@ async def get_my_profile(current_user: dict = Depends(verify_token)):
                 status_code=404,
                 detail={"success": False, "error": "Blood Bank profile not found"}
             )
-        return {"success": True, "data": bank}
+        return success(bank)
     except HTTPException:
         raise
     except Exception as e:
@@ -70,14 +71,14 @@ async def get_my_profile(current_user: dict = Depends(verify_token)):
 async def get_my_batches(current_user: dict = Depends(verify_token)):
     """Get batches for logged-in blood bank"""
     try:
-        bank = await BloodBank.get_by_user_id(current_user["id"])
-        if not bank:
+        bank_id = await resolve_profile_id(current_user)
+        if bank_id is None:
             raise HTTPException(
                 status_code=404,
                 detail={"success": False, "error": "Blood Bank profile not found"}
             )
-        batches = await BloodBank.get_batches(bank["id"])
-        return {"success": True, "data": batches}
+        batches = await BloodBank.get_batches(bank_id)
+        return success(batches)
     except HTTPException:
         raise
     except Exception as e:
@@ -88,8 +89,8 @@ async def get_my_batches(current_user: dict = Depends(verify_token)):
 async def add_batch(batch: BatchCreate, current_user: dict = Depends(verify_token)):
     """Add new batch"""
     try:
-        bank = await BloodBank.get_by_user_id(current_user["id"])
-        if not bank:
+        bank_id = await resolve_profile_id(current_user)
+        if bank_id is None:
             raise HTTPException(
                 status_code=404,
                 detail={"success": False, "error": "Blood Bank profile not found"}
@@ -101,7 +102,7 @@ async def add_batch(batch: BatchCreate, current_user: dict = Depends(verify_toke
                 detail={"success": False, "error": "Missing required fields"}
             )
         
-        new_batch = await BloodBank.add_batch(bank["id"], batch.blood_type, batch.units, batch.expiry_date)
+        new_batch = await BloodBank.add_batch(bank_id, batch.blood_type, batch.units, batch.expiry_date)
         return {"success": True, "data": new_batch}
     except HTTPException:
         raise
@@ -150,7 +151,7 @@ async def get_blood_banks(
                 filters["search"] = search
             banks = await BloodBank.get_all(filters)
         
-        return {"success": True, "data": banks}
+        return success(banks)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -160,7 +161,7 @@ async def get_total_inventory():
     """Get total blood inventory across all banks"""
     try:
         inventory = await BloodBank.get_total_inventory()
-        return {"success": True, "data": inventory}
+        return success(inventory)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -170,7 +171,7 @@ async def find_by_blood_type(blood_type: str, minUnits: int = Query(1)):
     """Find blood banks with specific blood type available"""
     try:
         banks = await BloodBank.find_by_blood_type(blood_type, minUnits)
-        return {"success": True, "data": banks}
+        return success(banks)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -185,7 +186,7 @@ async def get_blood_bank(bank_id: int):
                 status_code=404,
                 detail={"success": False, "error": "Blood bank not found"}
             )
-        return {"success": True, "data": bank}
+        return success(bank)
     except HTTPException:
         raise
     except Exception as e:
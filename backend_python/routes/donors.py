@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from typing import Optional
 from models.donor import Donor
 from middleware.auth import verify_token
+from routes.responses import success
 
 router = APIRouter()
 
@@ -19,6 +20,8 @@ class DonorCreate(BaseModel):
     email: Optional[str] = None
     address: Optional[str] = None
     available: Optional[bool] = True
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 
 class DonorUpdate(BaseModel):
@@ -30,6 +33,8 @@ class DonorUpdate(BaseModel):
     address: Optional[str] = None
     available: Optional[bool] = None
     last_donation: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 
 @router.get("/me")
@@ -42,7 +47,7 @@ async def get_my_profile(current_user: dict = Depends(verify_token)):
                 status_code=404,
                 detail={"success": False, "error": "Donor profile not found"}
             )
-        return {"success": True, "data": donor}
+        return success(donor)
     except HTTPException:
         raise
     except Exception as e:
@@ -66,7 +71,7 @@ async def get_donors(
             filters["available"] = available == "true"
         
         donors = await Donor.get_all(filters)
-        return {"success": True, "data": donors}
+        return success(donors)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -76,7 +81,7 @@ async def get_donor_stats():
     """Get donor statistics"""
     try:
         stats = await Donor.get_stats()
-        return {"success": True, "data": stats}
+        return success(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -86,7 +91,7 @@ async def get_donors_by_blood_type(blood_type: str):
     """Get donors by blood type"""
     try:
         donors = await Donor.get_by_blood_type(blood_type)
-        return {"success": True, "data": donors}
+        return success(donors)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -101,7 +106,7 @@ async def get_donor(donor_id: int):
                 status_code=404,
                 detail={"success": False, "error": "Donor not found"}
             )
-        return {"success": True, "data": donor}
+        return success(donor)
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,99 @@
+"""
+Data Export Routes for BEOS Python Backend
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Optional, List
+from datetime import datetime
+from middleware.auth import authorize_roles
+from routes.responses import dumps
+from services.export_service import export_service, ExportBusy
+import csv
+import io
+
+router = APIRouter()
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def encode_ndjson(columns: List[str], rows: List[tuple]) -> bytes:
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def encode_csv(columns: List[str], rows: List[tuple], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson"),
+    since: Optional[str] = Query(None),
+    until: Optional[str] = Query(None),
+    after_id: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    header: bool = Query(True),
+    blood_type: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    available: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    urgency: Optional[str] = Query(None),
+    hospital_id: Optional[int] = Query(None),
+    donor_id: Optional[int] = Query(None),
+    blood_bank_id: Optional[int] = Query(None),
+    _: dict = Depends(authorize_roles("admin"))
+):
+    """
+    Stream donors, requests, donations or batches as NDJSON or CSV, in ID
+    order. `since`/`until` bound the dataset's timestamp (`until` is
+    exclusive); to resume an interrupted export pass the last ID received
+    as `after_id` (and `header=false` for CSV).
+    """
+    filters = {
+        "blood_type": blood_type, "city": city, "status": status, "urgency": urgency,
+        "hospital_id": hospital_id, "donor_id": donor_id, "blood_bank_id": blood_bank_id,
+        "available": None if available is None else (1 if available == "true" else 0)
+    }
+    filters = {k: v for k, v in filters.items() if v is not None}
+
+    try:
+        if format not in MEDIA_TYPES:
+            raise ValueError("format must be 'ndjson' or 'csv'")
+        export_service.build_query(dataset, filters, since, until)
+        slot = export_service.acquire()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"success": False, "error": str(e)})
+    except ExportBusy as e:
+        raise HTTPException(status_code=429, detail={"success": False, "error": str(e)}, headers={"Retry-After": "30"})
+
+    chunks = export_service.stream(slot, dataset, filters, since, until, after_id, limit)
+
+    async def close():
+        # A client that disconnects leaves the generator suspended (or never
+        # started); closing it releases the export's connection and slot
+        await chunks.aclose()
+        slot.release()
+
+    async def body():
+        first = True
+        async for columns, rows in chunks:
+            if format == "csv":
+                yield encode_csv(columns, rows, header and first)
+            elif rows:
+                yield encode_ndjson(columns, rows)
+            first = False
+
+    filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{format}"
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        background=BackgroundTask(close)
+    )
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from typing import Optional
 from models.hospital import Hospital
 from middleware.auth import verify_token
+from routes.responses import success
 
 router = APIRouter()
 
@@ -43,7 +44,7 @@ async def get_my_profile(current_user: dict = Depends(verify_token)):
                 status_code=404,
                 detail={"success": False, "error": "Hospital profile not found"}
             )
-        return {"success": True, "data": hospital}
+        return success(hospital)
     except HTTPException:
         raise
     except Exception as e:
@@ -64,7 +65,7 @@ async def get_hospitals(
             filters["search"] = search
         
         hospitals = await Hospital.get_all(filters)
-        return {"success": True, "data": hospitals}
+        return success(hospitals)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -74,7 +75,7 @@ async def get_hospital_stats():
     """Get hospital statistics"""
     try:
         stats = await Hospital.get_stats()
-        return {"success": True, "data": stats}
+        return success(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -89,7 +90,7 @@ async def get_hospital(hospital_id: int):
                 status_code=404,
                 detail={"success": False, "error": "Hospital not found"}
             )
-        return {"success": True, "data": hospital}
+        return success(hospital)
     except HTTPException:
         raise
     except Exception as e:
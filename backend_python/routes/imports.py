@@ -0,0 +1,78 @@
+"""
+Data Import Routes for BEOS Python Backend
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, UploadFile, File
+from typing import Optional
+from models.data_import import DataImport
+from middleware.auth import authorize_roles
+from routes.responses import success
+
+router = APIRouter()
+
+
+@router.post("/{entity}")
+async def create_import(
+    entity: str,
+    request: Request,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None),
+    current_user: dict = Depends(authorize_roles("admin"))
+):
+    """
+    Upload a CSV (with a header row) or NDJSON file of donors, hospitals or
+    blood banks; it is loaded in the background. Records whose phone or
+    email is already registered are skipped as duplicates.
+    """
+    try:
+        created = await request.app.state.import_service.start(
+            entity, file.file, file.filename, format, current_user.get("id")
+        )
+        return {"success": True, "data": created}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"success": False, "error": str(e)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+    finally:
+        await file.close()
+
+
+@router.get("/")
+async def list_imports(
+    limit: int = Query(20, ge=1, le=100),
+    _: dict = Depends(authorize_roles("admin"))
+):
+    """Get recent imports"""
+    try:
+        imports = await DataImport.get_recent(limit)
+        return success(imports)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.get("/{import_id}")
+async def get_import(import_id: int, _: dict = Depends(authorize_roles("admin"))):
+    """Get an import with its progress and per-row errors"""
+    try:
+        data_import = await DataImport.get_by_id(import_id)
+        if not data_import:
+            raise HTTPException(status_code=404, detail={"success": False, "error": "Import not found"})
+        return success(data_import)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.post("/{import_id}/cancel")
+async def cancel_import(import_id: int, request: Request, _: dict = Depends(authorize_roles("admin"))):
+    """Cancel a queued or running import"""
+    try:
+        cancelled = await request.app.state.import_service.cancel(import_id)
+        if not cancelled:
+            raise HTTPException(status_code=400, detail={"success": False, "error": "Import is not running"})
+        return {"success": True, "message": "Import cancelled"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
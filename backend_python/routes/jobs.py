@@ -0,0 +1,31 @@
+"""
+Background Job Routes for BEOS Python Backend
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from middleware.auth import verify_token, authorize_roles
+from routes.responses import success
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_jobs(request: Request, _: dict = Depends(authorize_roles("admin"))):
+    """Job counts per queue and the worker pools of this process"""
+    try:
+        state = request.app.state
+        return success({
+            "queues": await state.job_queue.counts(),
+            "pools": [pool.get_stats() for pool in state.worker_pools]
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: int, request: Request, current_user: dict = Depends(verify_token)):
+    """Get a job's status and result (admins, or the user that queued it)"""
+    job = await request.app.state.job_queue.get(job_id)
+    if not job or (current_user.get("role") != "admin" and job["created_by"] != current_user.get("id")):
+        raise HTTPException(status_code=404, detail={"success": False, "error": "Job not found"})
+    return success(job)
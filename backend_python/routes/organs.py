@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from typing import Optional, List
 from models.organ import Organ
 from middleware.auth import verify_token, authorize_roles
+from routes.responses import success
 
 router = APIRouter()
 
@@ -53,7 +54,7 @@ async def get_organs(
         filters["viable_only"] = viable_only
         
         organs = await Organ.get_all(filters)
-        return {"success": True, "data": organs}
+        return success(organs)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -63,7 +64,7 @@ async def get_organ_stats():
     """Get organ statistics"""
     try:
         stats = await Organ.get_stats()
-        return {"success": True, "data": stats}
+        return success(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -78,7 +79,7 @@ async def get_urgent_organs():
             o for o in organs 
             if o.get("viability_remaining") is not None and o["viability_remaining"] < 4
         ]
-        return {"success": True, "data": urgent}
+        return success(urgent)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -90,7 +91,7 @@ async def get_organ(organ_id: int):
         organ = await Organ.get_by_id(organ_id)
         if not organ:
             raise HTTPException(status_code=404, detail={"success": False, "error": "Organ not found"})
-        return {"success": True, "data": organ}
+        return success(organ)
     except HTTPException:
         raise
     except Exception as e:
@@ -102,7 +103,7 @@ async def get_organ_matches(organ_id: int):
     """Find matches for an organ"""
     try:
         matches = await Organ.find_matches(organ_id)
-        return {"success": True, "data": matches}
+        return success(matches)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -2,13 +2,16 @@
 Blood Request Routes for BEOS Python Backend
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, BackgroundTasks
 from pydantic import BaseModel
 from typing import Optional
 from models.blood_request import BloodRequest
 from models.donor import Donor
+from models.alert_dispatch import AlertDispatch
 from services.fraud_detection import FraudDetectionService
-from middleware.auth import verify_token, optional_verify_token
+from middleware.auth import verify_token, optional_verify_token, authorize_roles, resolve_profile_id
+from routes.responses import success
+from socket_handlers.rooms import request_rooms
 
 router = APIRouter()
 
@@ -58,15 +61,15 @@ class RequestUpdate(BaseModel):
 async def get_my_history(current_user: dict = Depends(verify_token)):
     """Get donation history for current user"""
     try:
-        donor = await Donor.get_by_user_id(current_user["id"])
-        if not donor:
+        donor_id = await resolve_profile_id(current_user)
+        if current_user.get("role") not in ["donor", "user"] or donor_id is None:
             raise HTTPException(
                 status_code=404,
                 detail={"success": False, "error": "Donor profile not found"}
             )
         
-        history = await BloodRequest.get_history(donor["id"])
-        return {"success": True, "data": history}
+        history = await BloodRequest.get_history(donor_id)
+        return success(history)
     except HTTPException:
         raise
     except Exception as e:
@@ -93,7 +96,7 @@ async def get_requests(
             filters["hospital_id"] = hospital_id
         
         requests = await BloodRequest.get_all(filters)
-        return {"success": True, "data": requests}
+        return success(requests)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -103,7 +106,7 @@ async def get_stats():
     """Get request statistics"""
     try:
         stats = await BloodRequest.get_stats()
-        return {"success": True, "data": stats}
+        return success(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -113,7 +116,7 @@ async def get_pending():
     """Get pending requests"""
     try:
         requests = await BloodRequest.get_pending()
-        return {"success": True, "data": requests}
+        return success(requests)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -123,7 +126,7 @@ async def get_critical():
     """Get critical requests"""
     try:
         requests = await BloodRequest.get_critical()
-        return {"success": True, "data": requests}
+        return success(requests)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -138,7 +141,7 @@ async def get_request(request_id: int):
                 status_code=404,
                 detail={"success": False, "error": "Request not found"}
             )
-        return {"success": True, "data": request}
+        return success(request)
     except HTTPException:
         raise
     except Exception as e:
@@ -157,7 +160,33 @@ async def get_matches(request_id: int):
             )
         
         matches = await Donor.get_by_blood_type(request["blood_type"])
-        return {"success": True, "data": matches}
+        return success(matches)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+
+
+@router.get("/{request_id}/alerts")
+async def get_alert_summary(
+    request_id: int,
+    current_user: dict = Depends(authorize_roles("admin", "hospital"))
+):
+    """Get donor alert waves, delivery and response times for a request (hospitals: their own requests)"""
+    try:
+        request = await BloodRequest.get_by_id(request_id)
+        if not request:
+            raise HTTPException(
+                status_code=404,
+                detail={"success": False, "error": "Request not found"}
+            )
+        if current_user.get("role") == "hospital" and request.get("hospital_id") != await resolve_profile_id(current_user):
+            raise HTTPException(
+                status_code=403,
+                detail={"success": False, "error": "Access denied. You do not have permission to perform this action."}
+            )
+        summary = await AlertDispatch.get_summary(request_id)
+        return success(summary)
     except HTTPException:
         raise
     except Exception as e:
@@ -182,18 +211,23 @@ async def create_request(
         
         # Set hospital_id if user is a hospital
         if current_user and current_user.get("role") == "hospital":
-            data["hospital_id"] = current_user.get("hospital_id")
+            data["hospital_id"] = await resolve_profile_id(current_user)
         
         new_request = await BloodRequest.create(data)
         
-        # Emit socket events if available
+        # Queue socket events (sent after the response)
         sio = getattr(http_request.app.state, 'sio', None)
         if sio:
-            await sio.emit('new-request', new_request)
+            rooms = request_rooms(new_request)
+            event_bus = http_request.app.state.event_bus
+            event_bus.track('request', new_request)
+            event_bus.emit('new-request', new_request, rooms, 'request', new_request["id"])
             if new_request.get("urgency") == "critical":
-                await sio.emit('critical-alert', new_request)
+                event_bus.emit('critical-alert', new_request, rooms, 'request', new_request["id"])
+            http_request.app.state.alert_dispatcher.dispatch(new_request)
+            http_request.app.state.stats_stream.mark_dirty()
         
-        return {"success": True, "data": new_request}
+        return success(new_request)
     except HTTPException:
         raise
     except Exception as e:
@@ -211,12 +245,13 @@ async def update_request(
     try:
         updated = await BloodRequest.update(request_id, request_data.model_dump(exclude_unset=True))
         
-        # Emit socket event
-        sio = getattr(http_request.app.state, 'sio', None)
-        if sio:
-            await sio.emit('request-updated', updated)
+        # Publish coalesced update
+        event_bus = getattr(http_request.app.state, 'event_bus', None)
+        if event_bus and updated:
+            event_bus.publish('request-updated', 'request', updated, request_rooms(updated))
+            http_request.app.state.stats_stream.mark_dirty()
         
-        return {"success": True, "data": updated}
+        return success(updated)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
@@ -225,15 +260,15 @@ async def update_request(
 async def fulfill_request(
     request_id: int,
     http_request: Request,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(verify_token)
 ):
     """Fulfill blood request"""
     try:
         donor_id = None
         if current_user.get("role") in ["donor", "user"]:
-            donor = await Donor.get_by_user_id(current_user["id"])
-            if donor:
-                donor_id = donor["id"]
+            donor_id = await resolve_profile_id(current_user)
+            if donor_id is not None:
                 
                 # Bio-Safety AI Check
                 # In production, we would get real-time coordinates from the mobile app
@@ -252,13 +287,20 @@ async def fulfill_request(
         
         updated = await BloodRequest.fulfill(request_id, donor_id)
         
-        # Emit socket events
+        # Emit a lightweight fulfillment notice; field changes go out as a diff
         sio = getattr(http_request.app.state, 'sio', None)
-        if sio:
-            await sio.emit('request-fulfilled', updated)
-            await sio.emit('request-updated', updated)
+        if sio and updated:
+            rooms = request_rooms(updated)
+            event_bus = http_request.app.state.event_bus
+            event_bus.emit('request-fulfilled', {
+                'request_id': request_id,
+                'donor_id': updated.get('donor_id')
+            }, rooms, 'request', request_id)
+            event_bus.publish('request-updated', 'request', updated, rooms)
+            background_tasks.add_task(http_request.app.state.alert_dispatcher.close, request_id, 'fulfilled')
+            http_request.app.state.stats_stream.mark_dirty()
         
-        return {"success": True, "data": updated}
+        return success(updated)
     except HTTPException:
         raise
     except Exception as e:
@@ -269,18 +311,21 @@ async def fulfill_request(
 async def cancel_request(
     request_id: int,
     http_request: Request,
+    background_tasks: BackgroundTasks,
     _: dict = Depends(verify_token)
 ):
     """Cancel blood request"""
     try:
         updated = await BloodRequest.cancel(request_id)
         
-        # Emit socket event
-        sio = getattr(http_request.app.state, 'sio', None)
-        if sio:
-            await sio.emit('request-updated', updated)
+        # Publish coalesced update
+        event_bus = getattr(http_request.app.state, 'event_bus', None)
+        if event_bus and updated:
+            event_bus.publish('request-updated', 'request', updated, request_rooms(updated))
+            background_tasks.add_task(http_request.app.state.alert_dispatcher.close, request_id, 'cancelled')
+            http_request.app.state.stats_stream.mark_dirty()
         
-        return {"success": True, "data": updated}
+        return success(updated)
     except Exception as e:
         raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
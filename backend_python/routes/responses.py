@@ -0,0 +1,42 @@
+"""
+Fast JSON Responses for BEOS Python Backend
+"""
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from typing import Any
+import json
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Types the encoder does not know (pydantic models, sets, Decimal, ...)"""
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Encode to JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for trusted model output. Returning a Response skips
+    FastAPI's jsonable_encoder pass over every value, which dominates the
+    cost of large lists; the content is encoded once, straight to bytes.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def success(data: Any, **extra: Any) -> FastJSONResponse:
+    """The usual {"success": True, "data": ...} envelope"""
+    return FastJSONResponse({"success": True, "data": data, **extra})
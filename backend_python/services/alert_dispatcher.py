@@ -0,0 +1,304 @@
+"""
+Critical Alert Dispatcher for BEOS Python Backend
+Alerts eligible nearby donors in waves over an expanding radius
+"""
+
+from models.alert_dispatch import AlertDispatch
+from models.blood_request import BloodRequest
+from models.donor import Donor
+from models.hospital import Hospital
+from services.ai_service import compatible_donor_types
+from services.analytics_compute import haversine_km
+from socket_handlers.rooms import ADMIN_ROOM, donor_room, hospital_room
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import math
+import os
+import time
+
+# Search radii around the hospital, widened whenever the current ring runs out
+ALERT_RADII_KM = [float(r) for r in os.environ.get("ALERT_RADII_KM", "2,5,10,25,50").split(",") if r.strip()]
+# Donors alerted per wave
+ALERT_WAVE_SIZE = int(os.environ.get("ALERT_WAVE_SIZE", "25"))
+# Time given to a wave to reach enough acceptances before the next goes out
+ALERT_WAVE_INTERVAL = float(os.environ.get("ALERT_WAVE_INTERVAL_SECONDS", "60"))
+# How often a waiting campaign re-checks acceptances recorded by other workers
+ALERT_POLL_INTERVAL = 5.0
+# Minimum days between two donations
+DONATION_INTERVAL_DAYS = 90
+KM_PER_DEGREE = 111.32
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a circle around a point"""
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+class CandidateFinder:
+    """
+    Yields eligible donors nearest-first, one ring (radius) at a time.
+
+    Donors passed as `preferred` (e.g. online right now) come first.
+    Each radius is then queried once through the donors geo index; donors
+    without coordinates in the hospital's city are used once every ring
+    is exhausted (or from the start when the hospital has no coordinates).
+    """
+
+    def __init__(self, blood_types: List[str], origin: Optional[Tuple[float, float]],
+                 city: Optional[str], radii: List[float] = None,
+                 preferred: List[Dict[str, Any]] = None):
+        self.blood_types = blood_types
+        self.origin = origin
+        self.city = city
+        self.radii = list(radii or ALERT_RADII_KM)
+        self.alerted = set()
+        self._radius_index = 0
+        self._ring: List[Dict[str, Any]] = list(preferred or [])
+        self._city_after_id = 0
+        self._city_done = not city
+
+    async def _load_ring(self) -> bool:
+        if self.origin is None or self._radius_index >= len(self.radii):
+            return False
+        radius = self.radii[self._radius_index]
+        self._radius_index += 1
+
+        lat, lng = self.origin
+        rows = await Donor.get_eligible_in_box(
+            self.blood_types, *bounding_box(lat, lng, radius),
+            min_days_since_donation=DONATION_INTERVAL_DAYS
+        )
+        ring = []
+        for donor in rows:
+            if donor["id"] in self.alerted:
+                continue
+            distance = haversine_km(lat, lng, donor["latitude"], donor["longitude"])
+            if distance <= radius:
+                donor["distance_km"] = round(distance, 2)
+                ring.append(donor)
+        ring.sort(key=lambda d: d["distance_km"])
+        self._ring = ring
+        return True
+
+    async def next(self, limit: int) -> List[Dict[str, Any]]:
+        """Up to `limit` donors that have not been alerted yet"""
+        found: List[Dict[str, Any]] = []
+
+        while len(found) < limit:
+            if not self._ring and not await self._load_ring():
+                break
+            take, self._ring = self._ring[:limit - len(found)], self._ring[limit - len(found):]
+            found.extend(take)
+            self.alerted.update(d["id"] for d in take)
+
+        while len(found) < limit and not self._city_done:
+            rows = await Donor.get_eligible_in_city(
+                self.blood_types, self.city, self._city_after_id, limit - len(found),
+                min_days_since_donation=DONATION_INTERVAL_DAYS
+            )
+            if not rows:
+                self._city_done = True
+                break
+            self._city_after_id = rows[-1]["id"]
+            for donor in rows:
+                # With an origin, located donors were already covered by the rings
+                if donor["id"] in self.alerted or (self.origin and donor.get("latitude") is not None):
+                    continue
+                donor["distance_km"] = None
+                found.append(donor)
+                self.alerted.add(donor["id"])
+
+        return found
+
+
+class AlertDispatcher:
+    """Runs one alert campaign per critical request until enough donors accept"""
+
+    def __init__(self, sio, radii: List[float] = None, wave_size: int = ALERT_WAVE_SIZE,
+                 wave_interval: float = ALERT_WAVE_INTERVAL, presence=None):
+        self.sio = sio
+        self.presence = presence
+        self.radii = radii or ALERT_RADII_KM
+        self.wave_size = wave_size
+        self.wave_interval = wave_interval
+        # request_id -> {"task": Task, "wake": Event, "closed": bool}
+        self._campaigns: Dict[int, Dict[str, Any]] = {}
+        self.stats = {
+            "campaigns": 0, "waves": 0, "alerts": 0, "delivered": 0,
+            "accepted": 0, "declined": 0, "online_first": 0, "last_first_wave_ms": None
+        }
+
+    def dispatch(self, request: Dict[str, Any]) -> bool:
+        """Start alerting donors for a critical request (no-op for other urgencies)"""
+        request_id = request.get("id")
+        is_critical = request.get("urgency") == "critical" or request.get("is_critical")
+        if not is_critical or request_id is None or request_id in self._campaigns:
+            return False
+        self._campaigns[request_id] = {
+            "wake": asyncio.Event(),
+            "closed": False
+        }
+        self._campaigns[request_id]["task"] = asyncio.create_task(self._run(request))
+        self.stats["campaigns"] += 1
+        return True
+
+    async def stop(self):
+        """Cancel every running campaign (shutdown)"""
+        campaigns, self._campaigns = self._campaigns, {}
+        for campaign in campaigns.values():
+            campaign["task"].cancel()
+        for campaign in campaigns.values():
+            try:
+                await campaign["task"]
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    @staticmethod
+    def target_for(request: Dict[str, Any]) -> int:
+        """Acceptances needed: one donor per unit requested"""
+        return max(1, int(request.get("units") or 1))
+
+    @staticmethod
+    def alert_payload(request: Dict[str, Any], hospital: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """What a donor is told about a request: no patient or contact details"""
+        hospital = hospital or {}
+        return {
+            "id": request["id"],
+            "blood_type": request["blood_type"],
+            "units": request.get("units"),
+            "urgency": request.get("urgency"),
+            "city": hospital.get("city") or request.get("hospital_city"),
+            "hospital_name": hospital.get("name") or request.get("hospital_name"),
+            "hospital_address": hospital.get("address"),
+            "latitude": hospital.get("latitude"),
+            "longitude": hospital.get("longitude"),
+        }
+
+    async def _run(self, request: Dict[str, Any]):
+        request_id = request["id"]
+        started = time.monotonic()
+        try:
+            hospital = await Hospital.get_by_id(request["hospital_id"]) if request.get("hospital_id") else None
+            origin = None
+            if hospital and hospital.get("latitude") is not None and hospital.get("longitude") is not None:
+                origin = (hospital["latitude"], hospital["longitude"])
+            city = (hospital or {}).get("city") or request.get("hospital_city")
+            payload = self.alert_payload(request, hospital)
+
+            compatible = compatible_donor_types(request["blood_type"])
+            # Donors connected right now get the first wave
+            online = []
+            if self.presence and origin:
+                online = self.presence.nearest(compatible, origin[0], origin[1], max(self.radii), self.wave_size)
+            finder = CandidateFinder(compatible, origin, city, self.radii, preferred=online)
+            self.stats["online_first"] += len(online)
+            target = self.target_for(request)
+            wave = 0
+            while True:
+                donors = await finder.next(self.wave_size)
+                if not donors:
+                    break
+                wave += 1
+                await self._send_wave(request, payload, wave, donors)
+                if wave == 1:
+                    self.stats["last_first_wave_ms"] = round((time.monotonic() - started) * 1000, 1)
+                if await self._wait_for_acceptances(request_id, target):
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Alert dispatch error (request {request_id}): {e}")
+        finally:
+            self._campaigns.pop(request_id, None)
+
+    async def _send_wave(self, request: Dict[str, Any], payload: Dict[str, Any], wave: int,
+                         donors: List[Dict[str, Any]]):
+        """Record a wave, then alert each donor on their personal room in one emit"""
+        sent_at = time.time()
+        # Recorded first so an immediate response always finds its row
+        await AlertDispatch.record_wave(request["id"], wave, donors, sent_at)
+        await self.sio.emit('donor-alert', {
+            **payload,
+            "alert": {"requestId": request["id"], "wave": wave, "sentAt": sent_at}
+        }, to=[donor_room(d["id"]) for d in donors])
+
+        self.stats["waves"] += 1
+        self.stats["alerts"] += len(donors)
+        await self.sio.emit('alert-progress', {
+            "requestId": request["id"],
+            "wave": wave,
+            "alerted": len(donors),
+            "maxDistanceKm": max((d["distance_km"] for d in donors if d.get("distance_km") is not None), default=None)
+        }, to=self._watcher_rooms(request))
+
+    async def _wait_for_acceptances(self, request_id: int, target: int) -> bool:
+        """Wait one wave interval; True once the campaign needs no more waves"""
+        campaign = self._campaigns.get(request_id)
+        deadline = time.monotonic() + self.wave_interval
+        while True:
+            if campaign["closed"] or await self._is_settled(request_id, target):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(campaign["wake"].wait(), timeout=min(remaining, ALERT_POLL_INTERVAL))
+                campaign["wake"].clear()
+            except asyncio.TimeoutError:
+                pass
+
+    async def _is_settled(self, request_id: int, target: int) -> bool:
+        if await AlertDispatch.count_accepted(request_id) >= target:
+            return True
+        request = await BloodRequest.get_by_id(request_id)
+        return request is None or request.get("status") != "pending"
+
+    async def acknowledge(self, request_id: int, donor_id: int) -> bool:
+        """A donor's client received the alert"""
+        delivered = await AlertDispatch.mark_delivered(request_id, donor_id)
+        if delivered:
+            self.stats["delivered"] += 1
+        return delivered
+
+    async def respond(self, request_id: int, donor_id: int, accepted: bool) -> Optional[Dict[str, Any]]:
+        """Record a donor's answer; closes the campaign once enough donors accepted"""
+        record = await AlertDispatch.record_response(request_id, donor_id, accepted)
+        if record is None:
+            return None
+        self.stats["accepted" if accepted else "declined"] += 1
+
+        request = await BloodRequest.get_by_id(request_id)
+        accepted_count = await AlertDispatch.count_accepted(request_id)
+        target = self.target_for(request or {})
+        await self.sio.emit('alert-response', {
+            "requestId": request_id,
+            "donorId": donor_id,
+            "accepted": accepted,
+            "acceptedCount": accepted_count,
+            "target": target
+        }, to=self._watcher_rooms(request or {}))
+
+        if accepted and accepted_count >= target:
+            await self.close(request_id, "target_reached")
+        return record
+
+    async def close(self, request_id: int, reason: str):
+        """Stop the campaign and tell donors still holding the alert it is no longer needed"""
+        campaign = self._campaigns.get(request_id)
+        if campaign:
+            campaign["closed"] = True
+            campaign["wake"].set()
+
+        pending = await AlertDispatch.get_pending_donor_ids(request_id)
+        if pending:
+            await self.sio.emit('donor-alert-closed', {"requestId": request_id, "reason": reason},
+                                to=[donor_room(donor_id) for donor_id in pending])
+
+    @staticmethod
+    def _watcher_rooms(request: Dict[str, Any]) -> List[str]:
+        rooms = [ADMIN_ROOM]
+        if request.get("hospital_id"):
+            rooms.append(hospital_room(request["hospital_id"]))
+        return rooms
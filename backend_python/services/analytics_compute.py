@@ -0,0 +1,237 @@
+"""
+Analytics Computations for BEOS Python Backend
+CPU-heavy parts of AIService, run inside analytics worker processes
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+import heapq
+import math
+import sqlite3
+
+BLOOD_TYPES = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+
+# Rows processed between checks of the task's cancellation flag
+CANCEL_CHECK_EVERY = 5000
+
+# Shared-memory flags set by the API process to cancel a running task (one per slot)
+_cancel_flags = None
+
+
+class TaskCancelled(Exception):
+    """Raised inside a worker when its task was cancelled or timed out"""
+
+
+def init_worker(cancel_flags):
+    """Process pool initializer: keep the shared cancellation flags"""
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+
+def check_cancelled(slot: int):
+    if _cancel_flags is not None and _cancel_flags[slot]:
+        raise TaskCancelled(f"Analytics task in slot {slot} cancelled")
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Haversine formula for distance calculation"""
+    R = 6371  # Earth's radius in km
+
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+    return R * c
+
+
+def forecast_demand(slot: int, historical: List[tuple], days_ahead: int) -> List[Dict[str, Any]]:
+    """Day-by-day demand per blood type from (blood_type, day_of_week, units, count) rows"""
+    # Build demand patterns by blood type and day of week
+    patterns = defaultdict(lambda: defaultdict(list))
+    for blood_type, day_of_week, units, count in historical:
+        patterns[blood_type][int(day_of_week)].append(units or 0)
+
+    predictions = []
+    today = datetime.utcnow()
+
+    for day_offset in range(days_ahead):
+        check_cancelled(slot)
+        future_date = today + timedelta(days=day_offset)
+        day_of_week = future_date.weekday()  # 0 = Monday
+
+        day_predictions = {
+            "date": future_date.strftime("%Y-%m-%d"),
+            "day_name": future_date.strftime("%A"),
+            "blood_types": {}
+        }
+
+        for blood_type in BLOOD_TYPES:
+            historical_data = patterns[blood_type][day_of_week]
+            if historical_data:
+                avg = sum(historical_data) / len(historical_data)
+                # Add seasonal variation factor
+                seasonal_factor = 1.0 + 0.1 * math.sin(2 * math.pi * future_date.timetuple().tm_yday / 365)
+                predicted = round(avg * seasonal_factor, 1)
+            else:
+                # Fallback to overall average if no data for this day
+                predicted = 5.0  # Default prediction
+
+            day_predictions["blood_types"][blood_type] = {
+                "predicted_units": predicted,
+                "confidence": "high" if len(historical_data) > 10 else "medium" if historical_data else "low"
+            }
+
+        predictions.append(day_predictions)
+
+    return predictions
+
+
+def rank_transfers(slot: int, expiring: List[Dict[str, Any]], deficits: List[Dict[str, Any]],
+                   limit: int = 10) -> List[Dict[str, Any]]:
+    """Pair expiring batches with hospitals that need the same blood type"""
+    by_type = defaultdict(list)
+    for deficit in deficits:
+        by_type[deficit["blood_type"]].append(deficit)
+
+    suggestions = []
+    for index, expiring_batch in enumerate(expiring):
+        if index % CANCEL_CHECK_EVERY == 0:
+            check_cancelled(slot)
+        for deficit in by_type.get(expiring_batch["blood_type"], ()):
+            # Calculate distance
+            if expiring_batch.get("latitude") and deficit.get("latitude"):
+                distance = haversine_km(
+                    expiring_batch["latitude"], expiring_batch["longitude"],
+                    deficit["latitude"], deficit["longitude"]
+                )
+            else:
+                distance = 100  # Assume 100km if no coordinates
+
+            # Only suggest if within reasonable distance (200km)
+            if distance <= 200:
+                transfer_units = min(expiring_batch["units"], deficit["units_needed"])
+
+                suggestions.append({
+                    "priority": expiring_batch["urgency"],
+                    "days_until_expiry": expiring_batch["days_until_expiry"],
+                    "blood_type": expiring_batch["blood_type"],
+                    "units": transfer_units,
+                    "from": {
+                        "bank_id": expiring_batch["bank_id"],
+                        "name": expiring_batch["bank_name"],
+                        "city": expiring_batch["city"]
+                    },
+                    "to": {
+                        "hospital_id": deficit["hospital_id"],
+                        "name": deficit["hospital_name"],
+                        "city": deficit["city"]
+                    },
+                    "distance_km": round(distance, 2),
+                    "estimated_value_saved": transfer_units * 2500,  # ~₹2500 per unit
+                    "action": "TRANSFER_RECOMMENDED"
+                })
+
+    # Sort by priority and distance
+    suggestions.sort(key=lambda x: (
+        {"critical": 0, "high": 1, "medium": 2}.get(x["priority"], 3),
+        x["distance_km"]
+    ))
+
+    return suggestions[:limit]
+
+
+def score_donors(slot: int, db_path: str, request: Dict[str, Any], compatible_types: List[str],
+                 limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Score every available compatible donor for a request and return the
+    best `limit`. Donor rows are streamed from a read-only connection of
+    the worker's own, so they are never pickled between processes.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        placeholders = ','.join(['?' for _ in compatible_types])
+        cursor = conn.execute(
+            f"""SELECT * FROM donors
+                WHERE blood_type IN ({placeholders})
+                AND available = 1
+                ORDER BY last_donation ASC NULLS FIRST""",
+            compatible_types
+        )
+
+        now = datetime.utcnow()
+        days_since_cache: Dict[str, int] = {}
+        has_origin = bool(request.get("latitude"))
+        # Min-heap of (match_score, -position, donor, score, distance, days_since):
+        # ties keep query order, as a stable sort by score would
+        best: list = []
+
+        for position, donor in enumerate(cursor):
+            if position % CANCEL_CHECK_EVERY == 0:
+                check_cancelled(slot)
+            score = 100  # Start with perfect score
+
+            # Factor 1: Blood type match (exact match preferred)
+            if donor["blood_type"] == request["blood_type"]:
+                score += 20  # Bonus for exact match
+
+            # Factor 2: Geographic proximity
+            distance = None
+            if has_origin and donor["latitude"]:
+                distance = haversine_km(
+                    request["latitude"], request["longitude"],
+                    donor["latitude"], donor["longitude"]
+                )
+                # Reduce score for distance (10 points per 50km)
+                score -= min(50, distance / 5)
+            elif donor["city"] == request.get("city"):
+                score += 10
+
+            # Factor 3: Last donation (more points if not donated recently)
+            days_since: Optional[int] = None
+            if donor["last_donation"]:
+                days_since = days_since_cache.get(donor["last_donation"])
+                if days_since is None:
+                    last_donation = datetime.strptime(donor["last_donation"], "%Y-%m-%d")
+                    days_since = days_since_cache[donor["last_donation"]] = (now - last_donation).days
+                if days_since >= 90:  # Safe to donate again
+                    score += min(20, days_since / 10)
+                else:
+                    score -= 50  # Recently donated, less preferred
+            else:
+                score += 15  # First-time donor gets bonus
+
+            entry = (round(max(0, score), 1), -position, donor, score, distance, days_since)
+            if len(best) < limit:
+                heapq.heappush(best, entry)
+            elif entry[:2] > best[0][:2]:
+                heapq.heapreplace(best, entry)
+    finally:
+        conn.close()
+
+    matches = []
+    for match_score, _, donor, score, distance, days_since in sorted(best, key=lambda e: e[:2], reverse=True):
+        donor_dict = dict(donor)
+        donor_dict["distance_km"] = round(distance, 2) if distance is not None else None
+        donor_dict["days_since_donation"] = days_since
+        donor_dict["match_score"] = match_score
+        donor_dict["is_recommended"] = score >= 80
+        matches.append(donor_dict)
+    return matches
+
+
+TASKS = {
+    "forecast_demand": forecast_demand,
+    "rank_transfers": rank_transfers,
+    "score_donors": score_donors,
+}
+
+
+def run_task(slot: int, name: str, args: tuple):
+    """Worker entry point"""
+    return TASKS[name](slot, *args)
@@ -0,0 +1,160 @@
+"""
+Analytics Process Pool for BEOS Python Backend
+Runs CPU-heavy analytics in worker processes with timeouts and cancellation
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from services.analytics_compute import init_worker, run_task
+from monitoring.tracing import traced, set_span_attribute
+from typing import Dict, Any, List, Optional
+import asyncio
+import multiprocessing
+import os
+import time
+
+# Worker processes (each holds one CPU while computing)
+ANALYTICS_WORKERS = int(os.environ.get("ANALYTICS_WORKERS", str(max(1, min(2, os.cpu_count() or 1)))))
+# Tasks queued or running at once; further callers wait for a slot
+ANALYTICS_MAX_TASKS = int(os.environ.get("ANALYTICS_MAX_TASKS", str(ANALYTICS_WORKERS * 4)))
+# Default per-task deadline
+ANALYTICS_TIMEOUT = float(os.environ.get("ANALYTICS_TIMEOUT_SECONDS", "15"))
+# How often a waiting HTTP handler checks whether its client went away
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class AnalyticsTimeout(Exception):
+    """Raised when an analytics task misses its deadline"""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client left before the result was ready"""
+
+
+class AnalyticsPool:
+    """
+    Process pool for analytics. Every task takes one of `max_tasks` slots,
+    each with a flag in shared memory; on timeout or cancellation the flag
+    is set and the worker abandons the task at its next check, so the
+    process is free again without being killed.
+    """
+
+    def __init__(self, workers: int = ANALYTICS_WORKERS, max_tasks: int = ANALYTICS_MAX_TASKS,
+                 timeout: float = ANALYTICS_TIMEOUT):
+        self.workers = max(workers, 1)
+        self.max_tasks = max(max_tasks, self.workers)
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._flags = self._context.RawArray('b', self.max_tasks)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._free: List[int] = list(range(self.max_tasks))
+        self.running = 0
+        self.stats = {
+            "completed": 0, "failed": 0, "timeouts": 0, "cancelled": 0,
+            "lastMs": None, "maxMs": 0.0
+        }
+
+    def start(self):
+        """Create the pool (also done lazily by the first task)"""
+        if self._executor is None:
+            # spawn: forking would copy the event loop and aiosqlite threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self._context,
+                initializer=init_worker, initargs=(self._flags,)
+            )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_tasks)
+
+    def stop(self):
+        """Abandon running tasks and shut the workers down"""
+        for slot in range(self.max_tasks):
+            self._flags[slot] = 1
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self, slot: int):
+        self._free.append(slot)
+        self._slots.release()
+
+    @traced("AnalyticsPool.run")
+    async def run(self, task: str, *args, timeout: Optional[float] = None):
+        """Run a task from services.analytics_compute.TASKS and return its result"""
+        self.start()
+        waiting = time.perf_counter()
+        await self._slots.acquire()
+        set_span_attribute("analytics.task", task)
+        set_span_attribute("analytics.slot_wait_ms", round((time.perf_counter() - waiting) * 1000, 3))
+        slot = self._free.pop()
+        self._flags[slot] = 0
+        try:
+            future = self._executor.submit(run_task, slot, task, args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory): start a fresh pool next time
+            self._executor = None
+            self._release(slot)
+            raise
+
+        # The slot is reused only once the worker has let go of it
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, slot))
+
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+            self.stats["completed"] += 1
+            return result
+        except asyncio.TimeoutError:
+            self._flags[slot] = 1
+            self.stats["timeouts"] += 1
+            raise AnalyticsTimeout(f"Analytics task '{task}' timed out after {timeout or self.timeout:g}s")
+        except asyncio.CancelledError:
+            self._flags[slot] = 1
+            self.stats["cancelled"] += 1
+            raise
+        except BrokenProcessPool:
+            self._executor = None
+            self.stats["failed"] += 1
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self.running -= 1
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stats["lastMs"] = round(elapsed, 2)
+            self.stats["maxMs"] = round(max(self.stats["maxMs"], elapsed), 2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool size, slots in use and outcome counters"""
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "slotsInUse": self.max_tasks - len(self._free),
+            **self.stats
+        }
+
+
+async def run_until_disconnected(request, awaitable, poll_interval: float = DISCONNECT_POLL_INTERVAL):
+    """
+    Await a coroutine for an HTTP handler, cancelling it (and any analytics
+    task it is waiting on) if the client disconnects first.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+analytics_pool = AnalyticsPool()
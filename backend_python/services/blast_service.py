@@ -0,0 +1,209 @@
+"""
+Donor Blast Service for BEOS Python Backend
+Streams matching donors in chunks to pluggable notification sinks
+"""
+
+from models.donor import Donor
+from models.donor_blast import DonorBlast
+from services.ai_service import AIService
+from services.alert_dispatcher import bounding_box, DONATION_INTERVAL_DAYS
+from services.analytics_compute import haversine_km
+from services.notification_sinks import build_sink, NotificationSink, CHANNELS
+from socket_handlers.rooms import ADMIN_ROOM, BLOOD_TYPES
+from typing import Dict, Any, List, Optional
+import asyncio
+import os
+import time
+
+# Donors fetched (and handed to each sink) per step; keeps queries and IN lists small
+BLAST_CHUNK_SIZE = min(int(os.environ.get("BLAST_CHUNK_SIZE", "500")), 900)
+# A donor is not notified twice on the same channel within this window
+BLAST_DEDUPE_HOURS = float(os.environ.get("BLAST_DEDUPE_HOURS", "12"))
+
+
+class BlastService:
+    """Starts and cancels donor blasts; the sending runs as a `donor-blast` job"""
+
+    def __init__(self, sio, job_queue, chunk_size: int = BLAST_CHUNK_SIZE,
+                 dedupe_hours: float = BLAST_DEDUPE_HOURS):
+        # sio may be None in a standalone worker without a message queue
+        self.sio = sio
+        self.job_queue = job_queue
+        self.chunk_size = chunk_size
+        self.dedupe_seconds = dedupe_hours * 3600
+
+    @staticmethod
+    async def build_filters(spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn a blast request into donor filters (defaults to low-stock blood types)"""
+        blood_types = [b for b in (spec.get("blood_types") or []) if b in BLOOD_TYPES]
+        if not blood_types and not spec.get("blood_types"):
+            blood_types = await AIService.get_low_stock_types()
+        if not blood_types:
+            raise ValueError("No blood types to notify (none given and no low-stock types)")
+
+        filters: Dict[str, Any] = {"blood_types": blood_types}
+        if spec.get("city"):
+            filters["city"] = spec["city"]
+        if spec.get("radius_km") is not None:
+            if spec.get("latitude") is None or spec.get("longitude") is None:
+                raise ValueError("latitude and longitude are required with radius_km")
+            filters["center"] = [spec["latitude"], spec["longitude"], spec["radius_km"]]
+            filters["box"] = list(bounding_box(spec["latitude"], spec["longitude"], spec["radius_km"]))
+        if spec.get("eligible_only", True):
+            filters["min_days_since_donation"] = DONATION_INTERVAL_DAYS
+        return filters
+
+    @staticmethod
+    def in_radius(center: List[float], latitude: float, longitude: float) -> bool:
+        """Whether a donor is inside a blast's [lat, lng, radius_km] circle"""
+        return haversine_km(center[0], center[1], latitude, longitude) <= center[2]
+
+    async def count_recipients(self, filters: Dict[str, Any]) -> int:
+        """Donors run() will go through, with the same radius check (so progress reaches total)"""
+        center = filters.get("center")
+        if not center:
+            return await Donor.count_for_blast(filters)
+        coordinates = await Donor.get_blast_coordinates(filters)
+        return sum(1 for latitude, longitude in coordinates if self.in_radius(center, latitude, longitude))
+
+    async def start(self, spec: Dict[str, Any], created_by: Optional[int] = None) -> Dict[str, Any]:
+        """Validate and record a blast, then queue it; returns the queued blast"""
+        channels = list(dict.fromkeys(spec.get("channels") or ["socket"]))
+        unknown = [c for c in channels if c not in CHANNELS]
+        if unknown:
+            raise ValueError(f"Unknown channel(s): {', '.join(unknown)}")
+        # Fail fast on unconfigured channels
+        for channel in channels:
+            build_sink(channel, self.sio)
+        filters = await self.build_filters(spec)
+
+        text = spec.get("message") or (
+            f"Urgent: {', '.join(filters['blood_types'])} blood is needed"
+            + (f" in {filters['city']}" if filters.get("city") else "")
+            + ". Please donate if you can."
+        )
+        blast = await DonorBlast.create({
+            "created_by": created_by,
+            "filters": filters,
+            "channels": channels,
+            "message": text,
+            "total": await self.count_recipients(filters)
+        })
+        await self.job_queue.enqueue(
+            "donor-blast", {"blast_id": blast["id"]}, queue="notifications",
+            unique_key=f"donor-blast:{blast['id']}", created_by=created_by
+        )
+        return blast
+
+    async def cancel(self, blast_id: int) -> bool:
+        """Cancel a queued or running blast (the worker running it stops at the next chunk)"""
+        return await DonorBlast.cancel(blast_id)
+
+    async def run(self, blast_id: int, final_attempt: bool = True) -> Dict[str, Any]:
+        """
+        Send a blast, resuming after `last_donor_id` when a previous attempt
+        was interrupted. Errors are re-raised for the job queue to retry;
+        the blast is marked failed only on the final attempt.
+        """
+        blast = await DonorBlast.get_by_id(blast_id)
+        if not blast:
+            raise LookupError(f"Donor blast {blast_id} not found")
+        if blast["status"] not in ("queued", "running"):
+            return {"id": blast_id, "status": blast["status"]}
+
+        filters = blast["filters"]
+        progress = {
+            "processed": blast.get("processed") or 0,
+            "skipped": blast.get("skipped") or 0,
+            "failed": blast.get("failed") or 0,
+            "sent": {channel: (blast.get("sent") or {}).get(channel, 0) for channel in blast["channels"]}
+        }
+        after_id = blast.get("last_donor_id") or 0
+        try:
+            sinks = [build_sink(channel, self.sio) for channel in blast["channels"]]
+        except ValueError as e:
+            # Configuration problem: retrying will not help
+            await DonorBlast.update(blast_id, {"status": "failed", "error": str(e), "finished_at": time.time()})
+            return {"id": blast_id, "status": "failed", "error": str(e)}
+
+        message = {
+            "blastId": blast_id,
+            "title": "Blood donors needed",
+            "text": blast["message"],
+            "bloodTypes": filters["blood_types"],
+            "city": filters.get("city")
+        }
+        status = "completed"
+        try:
+            await DonorBlast.update(blast_id, {"status": "running", "started_at": blast.get("started_at") or time.time()})
+            since = time.time() - self.dedupe_seconds
+            seen_contacts = {sink.name: set() for sink in sinks}
+            center = filters.get("center")
+
+            while True:
+                # Cancellation may come from any worker, so it is read from the database
+                if await DonorBlast.get_status(blast_id) == "cancelled":
+                    status = "cancelled"
+                    break
+                chunk = await Donor.get_blast_chunk(filters, after_id, self.chunk_size)
+                if not chunk:
+                    break
+                after_id = chunk[-1]["id"]
+                if center:
+                    chunk = [d for d in chunk if self.in_radius(center, d["latitude"], d["longitude"])]
+                progress["processed"] += len(chunk)
+
+                # Skipped: donors no channel sends to (counted once, not per channel)
+                notified = set()
+                for sink in sinks:
+                    recipients = await self._dedupe(sink, chunk, seen_contacts[sink.name], since)
+                    notified.update(d["id"] for d in recipients)
+                    if not recipients:
+                        continue
+                    delivered, failed = await sink.send(recipients, message)
+                    await DonorBlast.record_deliveries(blast_id, sink.name, delivered)
+                    progress["sent"][sink.name] += len(delivered)
+                    progress["failed"] += failed
+                progress["skipped"] += len(chunk) - len(notified)
+
+                await DonorBlast.update(blast_id, {**progress, "last_donor_id": after_id})
+                await self._emit_progress(blast_id, "running", progress)
+
+            if status == "completed":
+                await DonorBlast.update(blast_id, {**progress, "status": "completed", "finished_at": time.time()})
+            await self._emit_progress(blast_id, status, progress)
+            return {"id": blast_id, "status": status, **progress}
+        except asyncio.CancelledError:
+            # Worker shutdown: another worker resumes from last_donor_id
+            await DonorBlast.update(blast_id, {"status": "queued"})
+            raise
+        except Exception as e:
+            print(f"Donor blast {blast_id} failed: {e}")
+            fields = {"error": str(e)}
+            if final_attempt:
+                fields.update({"status": "failed", "finished_at": time.time()})
+            await DonorBlast.update(blast_id, fields)
+            raise
+
+    @staticmethod
+    async def _dedupe(sink: NotificationSink, chunk: List[Dict[str, Any]], seen: set, since: float) -> List[Dict[str, Any]]:
+        """Drop donors without a contact, repeated contacts and recently notified donors"""
+        recipients = []
+        for donor in chunk:
+            if not sink.accepts(donor):
+                continue
+            if sink.contact_field:
+                # Same phone/email registered more than once
+                contact = donor[sink.contact_field].strip().lower()
+                if contact in seen:
+                    continue
+                seen.add(contact)
+            recipients.append(donor)
+
+        recent = await DonorBlast.get_recently_notified([d["id"] for d in recipients], sink.name, since)
+        return [d for d in recipients if d["id"] not in recent]
+
+    async def _emit_progress(self, blast_id: int, status: str, progress: Dict[str, Any]):
+        if self.sio is None:
+            return
+        await self.sio.emit('blast-progress', {"id": blast_id, "status": status, **progress}, to=ADMIN_ROOM)
@@ -0,0 +1,156 @@
+"""
+Data Export Service for BEOS Python Backend
+Streams whole tables in primary-key order, one chunk at a time
+"""
+
+from database.db import DB_PATH
+from monitoring.db import connect as instrumented_connect
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+import asyncio
+import os
+
+# Rows read per query; memory use is bounded by one chunk per export
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "5000"))
+# Exports running at once (each holds its own read-only connection)
+EXPORT_MAX_CONCURRENT = int(os.environ.get("EXPORT_MAX_CONCURRENT", "2"))
+
+# Exportable datasets: table, column for since/until, equality filters
+DATASETS: Dict[str, Dict[str, Any]] = {
+    "donors": {
+        "table": "donors",
+        "time_column": "created_at",
+        "filters": ("blood_type", "city", "available"),
+    },
+    "requests": {
+        "table": "blood_requests",
+        "time_column": "created_at",
+        "filters": ("blood_type", "status", "urgency", "hospital_id"),
+    },
+    "donations": {
+        "table": "donations",
+        "time_column": "donation_date",
+        "filters": ("blood_type", "donor_id", "blood_bank_id"),
+    },
+    "batches": {
+        "table": "blood_batches",
+        "time_column": "created_at",
+        "filters": ("blood_type", "blood_bank_id"),
+    },
+}
+
+
+class ExportBusy(Exception):
+    """Raised when EXPORT_MAX_CONCURRENT exports are already running"""
+
+
+class ExportSlot:
+    """A claimed export slot; releasing it more than once is a no-op"""
+
+    def __init__(self, service: "ExportService"):
+        self.service = service
+        self.released = False
+
+    def release(self, completed: bool = False):
+        if self.released:
+            return
+        self.released = True
+        self.service.active -= 1
+        self.service.stats["completed" if completed else "aborted"] += 1
+
+
+class ExportService:
+    """
+    Keyset-paginated exports (WHERE id > last ORDER BY id LIMIT chunk).
+    Every chunk is a separate short query on a read-only connection of the
+    export's own, so a long export neither holds a read transaction open
+    nor queues behind (or in front of) API queries on the shared connection.
+    An export can be resumed from the last ID it delivered with `after_id`.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, chunk_rows: int = EXPORT_CHUNK_ROWS,
+                 max_concurrent: int = EXPORT_MAX_CONCURRENT):
+        self.db_path = db_path
+        self.chunk_rows = chunk_rows
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.stats = {"started": 0, "completed": 0, "aborted": 0, "rows": 0}
+
+    def acquire(self) -> ExportSlot:
+        """
+        Claim an export slot, or raise ExportBusy when none is free. Check
+        and claim happen without an await in between, so concurrent requests
+        can't all pass the check; the slot is held until released.
+        """
+        if self.active >= self.max_concurrent:
+            raise ExportBusy(f"{self.active} exports already running; try again later")
+        self.active += 1
+        self.stats["started"] += 1
+        return ExportSlot(self)
+
+    @staticmethod
+    def build_query(dataset: str, filters: Dict[str, Any], since: Optional[str],
+                    until: Optional[str]) -> Tuple[str, List[Any]]:
+        """WHERE clause for a dataset; raises ValueError on unknown datasets or filters"""
+        spec = DATASETS.get(dataset)
+        if spec is None:
+            raise ValueError(f"Unknown dataset: {dataset}. Use one of: {', '.join(DATASETS)}")
+        unknown = set(filters) - set(spec["filters"])
+        if unknown:
+            raise ValueError(f"Unsupported filter(s) for {dataset}: {', '.join(sorted(unknown))}")
+
+        where, params = ["id > ?"], []
+        for column, value in filters.items():
+            where.append(f"{column} = ?")
+            params.append(value)
+        if since:
+            where.append(f"{spec['time_column']} >= ?")
+            params.append(since)
+        if until:
+            where.append(f"{spec['time_column']} < ?")
+            params.append(until)
+        query = f"SELECT * FROM {spec['table']} WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        return query, params
+
+    async def stream(self, slot: ExportSlot, dataset: str, filters: Dict[str, Any] = None,
+                     since: Optional[str] = None, until: Optional[str] = None, after_id: int = 0,
+                     limit: Optional[int] = None) -> AsyncIterator[Tuple[List[str], List[tuple]]]:
+        """
+        Yield (columns, rows) chunks until the dataset or `limit` is exhausted
+        (the last may be empty), then release `slot`. A generator closed before
+        it started never runs this, so its owner must release the slot too.
+        """
+        query, params = self.build_query(dataset, filters or {}, since, until)
+        completed = False
+        db = None
+        try:
+            db = await instrumented_connect(f"file:{self.db_path}?mode=ro", "export", uri=True)
+            await db.execute("PRAGMA busy_timeout = 5000")
+            last_id, remaining = after_id, limit
+            while remaining is None or remaining > 0:
+                size = self.chunk_rows if remaining is None else min(self.chunk_rows, remaining)
+                cursor = await db.execute(query, (last_id, *params, size))
+                rows = await cursor.fetchall()
+                columns = [column[0] for column in cursor.description]
+                await cursor.close()
+                if rows:
+                    last_id = rows[-1][columns.index("id")]
+                    self.stats["rows"] += len(rows)
+                    if remaining is not None:
+                        remaining -= len(rows)
+                # Yielded even when empty, so a CSV still gets its header
+                yield columns, rows
+                if len(rows) < size:
+                    break
+            completed = True
+        finally:
+            slot.release(completed)
+            if db is not None:
+                # Shielded: when the client disconnects every await here is
+                # cancelled, and the connection must still be closed
+                await asyncio.shield(db.close())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"active": self.active, **self.stats}
+
+
+export_service = ExportService()
@@ -0,0 +1,296 @@
+"""
+Bulk Import Service for BEOS Python Backend
+Loads uploaded CSV/NDJSON files of donors, hospitals or blood banks in chunks
+"""
+
+from database.db import DB_PATH, tables_written
+from monitoring.db import connect as instrumented_connect
+from models.data_import import DataImport
+from models.donor import Donor
+from models.hospital import Hospital
+from models.blood_bank import BloodBank
+from routes.donors import DonorCreate
+from routes.hospitals import HospitalCreate
+from routes.blood_banks import BloodBankCreate
+from socket_handlers.rooms import BLOOD_TYPES
+from pydantic import ValidationError
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, BinaryIO
+import asyncio
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+
+IMPORT_DIR = os.environ.get("IMPORT_DIR", str(Path(__file__).parent.parent / "database" / "imports"))
+# Records validated, deduplicated and inserted per transaction (IN lists stay under 900)
+IMPORT_CHUNK_ROWS = min(int(os.environ.get("IMPORT_CHUNK_ROWS", "500")), 900)
+# Per-row errors kept on the import (all are counted)
+IMPORT_MAX_ERRORS = int(os.environ.get("IMPORT_MAX_ERRORS", "1000"))
+
+# Entity -> (validation model, model with bulk_create, fields that must not be blank)
+ENTITIES = {
+    "donors": (DonorCreate, Donor, ("name", "blood_type", "phone", "city")),
+    "hospitals": (HospitalCreate, Hospital, ("name", "address", "city", "phone")),
+    "blood_banks": (BloodBankCreate, BloodBank, ("name", "address", "city", "phone")),
+}
+# Tables each model's bulk_create writes, reported once a chunk commits
+BULK_TABLES = {Donor: ("donors",), Hospital: ("hospitals",), BloodBank: ("blood_banks", "blood_inventory")}
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+class RecordReader:
+    """
+    Reads an uploaded file one record at a time (blocking; used from a
+    thread). CSV rows come out as dicts, NDJSON lines as raw strings.
+    """
+
+    def __init__(self, path: str, fmt: str):
+        self.file = open(path, "rb")
+        self.bytes_read = 0
+        self.number = 0
+        lines = self._lines()
+        self.records = csv.DictReader(lines) if fmt == "csv" else (line for line in lines if line.strip())
+
+    def _lines(self):
+        for raw in self.file:
+            self.bytes_read += len(raw)
+            line = raw.decode("utf-8", errors="replace")
+            yield line.lstrip("\ufeff") if self.bytes_read == len(raw) else line
+
+    def read(self, count: int) -> List[Tuple[int, Any]]:
+        """Up to `count` (record number, record) pairs; numbers start at 1"""
+        records = []
+        for record in self.records:
+            self.number += 1
+            records.append((self.number, record))
+            if len(records) >= count:
+                break
+        return records
+
+    def skip(self, count: int):
+        """Skip records a previous attempt already processed"""
+        while count > 0:
+            skipped = len(self.read(min(count, 10000)))
+            if not skipped:
+                break
+            count -= skipped
+
+    def close(self):
+        self.file.close()
+
+
+def validate_record(entity: str, record: Any) -> Dict[str, Any]:
+    """Validate one record with the entity's create model; raises ValueError"""
+    model, _, required = ENTITIES[entity]
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(record, dict):
+        raise ValueError("Record is not an object")
+
+    # Blank cells fall back to the model defaults
+    values = {}
+    for key, value in record.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if key is not None and value not in ("", None):
+            values[key] = value
+    try:
+        validated = model.model_validate(values).model_dump()
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        ))
+
+    missing = [field for field in required if not validated.get(field)]
+    if missing:
+        raise ValueError(f"Required: {', '.join(missing)}")
+    if entity == "donors" and validated["blood_type"] not in BLOOD_TYPES:
+        raise ValueError(f"Invalid blood type: {validated['blood_type']}")
+    return validated
+
+
+def read_chunk(reader: RecordReader, entity: str, size: int):
+    """Read and validate up to `size` records (blocking; used from a thread)"""
+    valid, invalid = [], []
+    records = reader.read(size)
+    for number, record in records:
+        try:
+            valid.append((number, validate_record(entity, record)))
+        except ValueError as e:
+            invalid.append((number, str(e)))
+    return valid, invalid, len(records) < size
+
+
+class ImportService:
+    """Stores uploads and queues them; the loading runs as a `data-import` job"""
+
+    def __init__(self, job_queue, chunk_size: int = IMPORT_CHUNK_ROWS, import_dir: str = IMPORT_DIR,
+                 db_path: str = DB_PATH):
+        self.job_queue = job_queue
+        self.chunk_size = chunk_size
+        self.import_dir = import_dir
+        self.db_path = db_path
+
+    @staticmethod
+    def _save(source: BinaryIO, path: str) -> int:
+        with open(path, "wb") as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        return os.path.getsize(path)
+
+    async def start(self, entity: str, source: BinaryIO, filename: str, fmt: Optional[str] = None,
+                    created_by: Optional[int] = None) -> Dict[str, Any]:
+        """Save an uploaded file and queue its import; returns the queued import"""
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity: {entity}. Use one of: {', '.join(ENTITIES)}")
+        fmt = fmt or FORMATS.get(Path(filename or "").suffix.lower())
+        if fmt not in ("csv", "ndjson"):
+            raise ValueError("Format must be csv or ndjson (pass format or use a .csv/.ndjson file name)")
+
+        os.makedirs(self.import_dir, exist_ok=True)
+        path = os.path.join(self.import_dir, f"{uuid.uuid4().hex}.{fmt}")
+        size = await asyncio.to_thread(self._save, source, path)
+        data_import = await DataImport.create({
+            "created_by": created_by,
+            "entity": entity,
+            "format": fmt,
+            "file_path": path,
+            "file_size": size
+        })
+        await self.job_queue.enqueue(
+            "data-import", {"import_id": data_import["id"]},
+            unique_key=f"data-import:{data_import['id']}", created_by=created_by
+        )
+        return data_import
+
+    async def cancel(self, import_id: int) -> bool:
+        """Cancel a queued or running import (the worker stops at the next chunk)"""
+        return await DataImport.cancel(import_id)
+
+    async def run(self, import_id: int, final_attempt: bool = True) -> Dict[str, Any]:
+        """
+        Load an import, resuming after the records a previous attempt
+        processed. Rows already committed by an interrupted attempt are
+        caught by the duplicate check.
+        """
+        data_import = await DataImport.get_by_id(import_id)
+        if not data_import:
+            raise LookupError(f"Import {import_id} not found")
+        if data_import["status"] not in ("queued", "running"):
+            return {"id": import_id, "status": data_import["status"]}
+
+        entity = data_import["entity"]
+        model = ENTITIES[entity][1]
+        progress = {key: data_import.get(key) or 0 for key in ("processed", "inserted", "duplicates", "invalid")}
+        errors = data_import["errors"]
+        status = "completed"
+        reader = None
+        db = None
+        try:
+            await DataImport.update(import_id, {"status": "running", "started_at": data_import.get("started_at") or time.time()})
+            reader = await asyncio.to_thread(RecordReader, data_import["file_path"], data_import["format"])
+            await asyncio.to_thread(reader.skip, progress["processed"])
+            # Own connection: a failed chunk is rolled back without touching
+            # writes in flight on the shared connection
+            db = await instrumented_connect(self.db_path, "import")
+            await db.execute("PRAGMA busy_timeout = 5000")
+
+            while True:
+                if await DataImport.get_status(import_id) == "cancelled":
+                    status = "cancelled"
+                    break
+                valid, invalid, exhausted = await asyncio.to_thread(read_chunk, reader, entity, self.chunk_size)
+                for number, message in invalid:
+                    self._add_error(errors, number, message)
+
+                fresh, duplicates = await self._dedupe(db, model, valid)
+                inserted, failed = await self._insert(db, model, fresh, errors)
+
+                progress["processed"] += len(valid) + len(invalid)
+                progress["inserted"] += inserted
+                progress["duplicates"] += duplicates
+                progress["invalid"] += len(invalid) + failed
+                await DataImport.update(import_id, {**progress, "errors": errors, "bytes_read": reader.bytes_read})
+                if exhausted:
+                    break
+
+            if status == "completed":
+                await DataImport.update(import_id, {"status": "completed", "finished_at": time.time()})
+            self._remove_file(data_import["file_path"])
+            return {"id": import_id, "status": status, **progress}
+        except asyncio.CancelledError:
+            # Worker shutdown: another worker resumes after `processed`
+            await DataImport.update(import_id, {"status": "queued"})
+            raise
+        except Exception as e:
+            print(f"Import {import_id} failed: {e}")
+            fields = {"error": str(e)}
+            if final_attempt:
+                fields.update({"status": "failed", "finished_at": time.time()})
+                self._remove_file(data_import["file_path"])
+            await DataImport.update(import_id, fields)
+            raise
+        finally:
+            if reader is not None:
+                reader.close()
+            if db is not None:
+                await db.close()
+
+    @staticmethod
+    async def _dedupe(db, model, valid: List[Tuple[int, Dict[str, Any]]]):
+        """Drop records whose phone or email is already registered or repeated in the chunk"""
+        phones = list({record["phone"] for _, record in valid if record.get("phone")})
+        emails = list({record["email"] for _, record in valid if record.get("email")})
+        seen = await model.find_existing_contacts(phones, emails, db)
+        fresh, duplicates = [], 0
+        for number, record in valid:
+            contacts = [c for c in (record.get("phone"), record.get("email")) if c]
+            if any(contact in seen for contact in contacts):
+                duplicates += 1
+                continue
+            seen.update(contacts)
+            fresh.append((number, record))
+        return fresh, duplicates
+
+    async def _insert(self, db, model, fresh: List[Tuple[int, Dict[str, Any]]], errors: List[Dict[str, Any]]):
+        """One executemany transaction; if the database rejects it, row by row to find the bad ones"""
+        if not fresh:
+            return 0, 0
+        try:
+            await model.bulk_create([record for _, record in fresh], db)
+            await db.commit()
+            tables_written(*BULK_TABLES[model])
+            return len(fresh), 0
+        except sqlite3.Error:
+            await db.rollback()
+
+        inserted, failed = 0, 0
+        for number, record in fresh:
+            try:
+                await model.bulk_create([record], db)
+                await db.commit()
+                tables_written(*BULK_TABLES[model])
+                inserted += 1
+            except sqlite3.Error as e:
+                await db.rollback()
+                failed += 1
+                self._add_error(errors, number, str(e))
+        return inserted, failed
+
+    @staticmethod
+    def _add_error(errors: List[Dict[str, Any]], number: int, message: str):
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"row": number, "error": message})
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
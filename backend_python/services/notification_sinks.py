@@ -0,0 +1,217 @@
+"""
+Notification Sinks for BEOS Python Backend
+Delivery channels used by donor blasts: socket, SMS, email, file and stub
+"""
+
+from socket_handlers.rooms import donor_room
+from socket_handlers.rate_limit import TokenBucket
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib import parse, request as urlrequest
+import asyncio
+import base64
+import json
+import os
+import smtplib
+import time
+
+# Twilio (same variables as the Node backend)
+TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
+TWILIO_PHONE_NUMBER = os.environ.get("TWILIO_PHONE_NUMBER")
+
+# SMTP
+SMTP_HOST = os.environ.get("SMTP_HOST")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_USER = os.environ.get("SMTP_USER")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+SMTP_FROM = os.environ.get("SMTP_FROM", SMTP_USER or "alerts@beos.local")
+
+# Messages per second per channel
+BLAST_RATES = {
+    "socket": float(os.environ.get("BLAST_SOCKET_PER_SECOND", "5000")),
+    "sms": float(os.environ.get("BLAST_SMS_PER_SECOND", "1")),
+    "email": float(os.environ.get("BLAST_EMAIL_PER_SECOND", "10")),
+    "file": float(os.environ.get("BLAST_FILE_PER_SECOND", "100000")),
+    "stub": float(os.environ.get("BLAST_STUB_PER_SECOND", "100000")),
+}
+
+BLAST_FILE_PATH = os.environ.get(
+    "BLAST_FILE_PATH", str(Path(__file__).parent.parent / "database" / "donor_blasts.ndjson")
+)
+
+
+class NotificationSink(ABC):
+    """
+    A delivery channel. `send` gets a chunk of donors that have the
+    channel's contact field and returns (delivered donor IDs, failed count).
+    """
+    name = "base"
+    # Donor field a recipient must have for this channel
+    contact_field: Optional[str] = None
+
+    def __init__(self, rate: float = None):
+        rate = rate or BLAST_RATES.get(self.name, 100)
+        self.bucket = TokenBucket(rate, max(rate, 1))
+
+    def accepts(self, donor: Dict[str, Any]) -> bool:
+        return not self.contact_field or bool(donor.get(self.contact_field))
+
+    async def throttle(self, count: int = 1):
+        """Wait until `count` messages may go out at this channel's rate"""
+        while count > 0:
+            step = min(count, self.bucket.capacity)
+            while not self.bucket.consume(time.monotonic(), step):
+                await asyncio.sleep(max((step - self.bucket.tokens) / self.bucket.rate, 0.001))
+            count -= step
+
+    @abstractmethod
+    async def send(self, donors: List[Dict[str, Any]], message: Dict[str, Any]) -> Tuple[List[int], int]:
+        """Deliver `message` to `donors`; returns (delivered donor IDs, failed count)"""
+
+
+class SocketSink(NotificationSink):
+    """Emits `donor-blast` to each donor's personal room (one emit per chunk)"""
+    name = "socket"
+
+    def __init__(self, sio, rate: float = None):
+        super().__init__(rate)
+        self.sio = sio
+
+    async def send(self, donors, message):
+        for start in range(0, len(donors), int(self.bucket.capacity)):
+            part = donors[start:start + int(self.bucket.capacity)]
+            await self.throttle(len(part))
+            await self.sio.emit('donor-blast', message, to=[donor_room(d["id"]) for d in part])
+        return [d["id"] for d in donors], 0
+
+
+class SmsSink(NotificationSink):
+    """Twilio SMS over the REST API (blocking calls run in a thread)"""
+    name = "sms"
+    contact_field = "phone"
+
+    def __init__(self, rate: float = None):
+        if not (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_PHONE_NUMBER):
+            raise ValueError("SMS channel is not configured (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER)")
+        super().__init__(rate)
+
+    @staticmethod
+    def _post(to: str, body: str):
+        url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
+        data = parse.urlencode({"To": to, "From": TWILIO_PHONE_NUMBER, "Body": body}).encode()
+        req = urlrequest.Request(url, data=data, method="POST")
+        credentials = base64.b64encode(f"{TWILIO_ACCOUNT_SID}:{TWILIO_AUTH_TOKEN}".encode()).decode()
+        req.add_header("Authorization", f"Basic {credentials}")
+        with urlrequest.urlopen(req, timeout=10) as response:
+            response.read()
+
+    async def send(self, donors, message):
+        delivered, failed = [], 0
+        for donor in donors:
+            await self.throttle()
+            try:
+                await asyncio.to_thread(self._post, donor["phone"], message["text"])
+                delivered.append(donor["id"])
+            except Exception as e:
+                failed += 1
+                print(f"SMS failed to donor {donor['id']}: {e}")
+        return delivered, failed
+
+
+class EmailSink(NotificationSink):
+    """SMTP email; one connection per chunk (blocking calls run in a thread)"""
+    name = "email"
+    contact_field = "email"
+
+    def __init__(self, rate: float = None):
+        if not SMTP_HOST:
+            raise ValueError("Email channel is not configured (SMTP_HOST)")
+        super().__init__(rate)
+
+    @staticmethod
+    def _send_all(recipients: List[Tuple[int, str]], subject: str, text: str) -> Tuple[List[int], int]:
+        delivered, failed = [], 0
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as smtp:
+            smtp.starttls()
+            if SMTP_USER:
+                smtp.login(SMTP_USER, SMTP_PASSWORD or "")
+            for donor_id, address in recipients:
+                mail = EmailMessage()
+                mail["From"] = SMTP_FROM
+                mail["To"] = address
+                mail["Subject"] = subject
+                mail.set_content(text)
+                try:
+                    smtp.send_message(mail)
+                    delivered.append(donor_id)
+                except smtplib.SMTPException:
+                    failed += 1
+        return delivered, failed
+
+    async def send(self, donors, message):
+        await self.throttle(len(donors))
+        recipients = [(d["id"], d["email"]) for d in donors]
+        return await asyncio.to_thread(self._send_all, recipients, message["title"], message["text"])
+
+
+class FileSink(NotificationSink):
+    """Appends one NDJSON line per recipient (local testing and audits)"""
+    name = "file"
+
+    def __init__(self, path: str = BLAST_FILE_PATH, rate: float = None):
+        super().__init__(rate)
+        self.path = path
+
+    def _write(self, lines: List[str]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    async def send(self, donors, message):
+        await self.throttle(len(donors))
+        now = time.time()
+        lines = [
+            json.dumps({"donor_id": d["id"], "phone": d.get("phone"), "email": d.get("email"),
+                        "blast_id": message.get("blastId"), "text": message["text"], "at": now}) + "\n"
+            for d in donors
+        ]
+        await asyncio.to_thread(self._write, lines)
+        return [d["id"] for d in donors], 0
+
+
+class StubSink(NotificationSink):
+    """Delivers nowhere; keeps counts and the last recipients (tests)"""
+    name = "stub"
+
+    def __init__(self, rate: float = None):
+        super().__init__(rate)
+        self.delivered = 0
+        self.last_recipients: List[int] = []
+
+    async def send(self, donors, message):
+        await self.throttle(len(donors))
+        self.delivered += len(donors)
+        self.last_recipients = [d["id"] for d in donors]
+        return list(self.last_recipients), 0
+
+
+CHANNELS = ("socket", "sms", "email", "file", "stub")
+
+
+def build_sink(channel: str, sio=None) -> NotificationSink:
+    """Instantiate a sink by channel name; raises ValueError when unknown or unconfigured"""
+    if channel == "socket":
+        if sio is None:
+            raise ValueError("Socket channel needs a Socket.IO server or SOCKETIO_MESSAGE_QUEUE")
+        return SocketSink(sio)
+    if channel == "sms":
+        return SmsSink()
+    if channel == "email":
+        return EmailSink()
+    if channel == "file":
+        return FileSink()
+    if channel == "stub":
+        return StubSink()
+    raise ValueError(f"Unknown channel: {channel}")
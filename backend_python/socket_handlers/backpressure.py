@@ -0,0 +1,83 @@
+"""
+Outbound Backpressure for BEOS Python Backend
+Bounds the per-client send queue so slow consumers can't pile up memory
+"""
+
+from collections import defaultdict
+from monitoring.metrics import registry
+from typing import Dict, Any, Optional
+import os
+import socketio
+
+# Queued packets per client before droppable events are skipped
+SOCKET_QUEUE_SOFT_LIMIT = int(os.environ.get("SOCKET_QUEUE_SOFT_LIMIT", "100"))
+# Queued packets per client before the client is disconnected
+SOCKET_QUEUE_HARD_LIMIT = int(os.environ.get("SOCKET_QUEUE_HARD_LIMIT", "1000"))
+
+# Events that can be skipped for a lagging client: stats are pushed again on
+# the next change, and a skipped versioned diff makes the client resync
+# (get-state), which coalesces everything it missed into one full state
+DROPPABLE_EVENTS = {'stats-update', 'request-updated', 'donor-updated'}
+
+SOCKET_EMITS = registry.counter("beos_socket_emits_total", "Socket.IO emits by event", ("event",))
+SOCKET_DROPPED = registry.counter(
+    "beos_socket_dropped_packets_total", "Packets skipped for clients over the queue limits", ("event",)
+)
+
+
+def _event_name(eio_pkt) -> Optional[str]:
+    """Read the event name from an encoded Socket.IO EVENT packet ('2["name",...]')"""
+    data = eio_pkt.data
+    if not isinstance(data, str) or not data.startswith('2'):
+        return None
+    start = data.find('["')
+    if start == -1:
+        return None
+    end = data.find('"', start + 2)
+    return data[start + 2:end] if end != -1 else None
+
+
+class BackpressureServer(socketio.AsyncServer):
+    """AsyncServer that drops or disconnects when a client's send queue is full"""
+
+    def __init__(self, *args, soft_limit: int = SOCKET_QUEUE_SOFT_LIMIT,
+                 hard_limit: int = SOCKET_QUEUE_HARD_LIMIT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.dropped: Dict[str, int] = defaultdict(int)
+        self.slow_disconnects = 0
+
+    async def emit(self, event, *args, **kwargs):
+        SOCKET_EMITS.inc((event,))
+        return await super().emit(event, *args, **kwargs)
+
+    def queue_depth(self, eio_sid: str) -> int:
+        """Packets waiting to be written to a client"""
+        socket = self.eio.sockets.get(eio_sid)
+        return socket.queue.qsize() if socket else 0
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        depth = self.queue_depth(eio_sid)
+        if depth >= self.soft_limit:
+            event = _event_name(eio_pkt)
+            if event in DROPPABLE_EVENTS:
+                self.dropped[event] += 1
+                SOCKET_DROPPED.inc((event,))
+                return
+            if depth >= self.hard_limit:
+                self.dropped[event or 'other'] += 1
+                SOCKET_DROPPED.inc((event or 'other',))
+                self.slow_disconnects += 1
+                await self.eio.disconnect(eio_sid)
+                return
+        await super()._send_eio_packet(eio_sid, eio_pkt)
+
+    def get_backpressure_stats(self) -> Dict[str, Any]:
+        """Drop counts per event and slow-consumer disconnects"""
+        return {
+            "soft_limit": self.soft_limit,
+            "hard_limit": self.hard_limit,
+            "dropped": dict(self.dropped),
+            "slow_disconnects": self.slow_disconnects
+        }
@@ -0,0 +1,236 @@
+"""
+Outbound Socket.IO Event Bus for BEOS Python Backend
+Coalesces bursts of entity updates, emits field-level diffs and sends
+every outbound event from background sender tasks
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+import asyncio
+import os
+import time
+import uuid
+
+# Updates to the same entity inside this window are merged into one emit
+COALESCE_WINDOW = float(os.environ.get("SOCKET_COALESCE_WINDOW_MS", "100")) / 1000
+# Number of entity baselines kept for diffing (least recently used are dropped)
+MAX_TRACKED_ENTITIES = int(os.environ.get("SOCKET_MAX_TRACKED_ENTITIES", "10000"))
+# Parallel sender tasks; all events of one entity go through the same sender
+SOCKET_SENDERS = int(os.environ.get("SOCKET_SENDERS", "4"))
+# Events waiting across all senders before new ones are dropped
+SOCKET_OUTBOUND_MAX = int(os.environ.get("SOCKET_OUTBOUND_MAX", "10000"))
+
+
+class EventBus:
+    """
+    Coalescing outbound event bus.
+
+    Each entity (e.g. ("request", 12)) carries a version number and the
+    last state sent to clients. Publishing an update only records the new
+    state; after the coalescing window one event is emitted per entity:
+
+        {"id": 12, "version": 4, "full": False, "changes": {"status": "fulfilled"}}
+
+    When no baseline is known the full state is sent instead
+    (``"full": True, "data": {...}``). Clients that miss a version ask for
+    the full state with ``get_state`` / the ``get-state`` socket event.
+
+    Versions are kept per worker process; payloads carry the worker's
+    ``source`` ID and a client must resync when the source changes.
+
+    Nothing is emitted inline: ``emit`` and flushed updates are queued to
+    sender tasks, so HTTP handlers return without waiting on fan-out.
+    Events are sharded by entity, which keeps each entity's events in
+    the order they were queued.
+    """
+
+    def __init__(self, sio, window: float = COALESCE_WINDOW, max_entities: int = MAX_TRACKED_ENTITIES,
+                 senders: int = SOCKET_SENDERS, max_queued: int = SOCKET_OUTBOUND_MAX):
+        self.sio = sio
+        self.window = window
+        self.max_entities = max_entities
+        self.senders = max(senders, 1)
+        self.max_queued = max_queued
+        self._queues: List[asyncio.Queue] = []
+        self._sender_tasks: List[asyncio.Task] = []
+        # (entity, id) -> {"version": int, "state": dict}
+        self._baselines: "OrderedDict[Tuple[str, Any], Dict[str, Any]]" = OrderedDict()
+        # (entity, id) -> {"event": str, "state": dict, "rooms": set}
+        self._pending: "OrderedDict[Tuple[str, Any], Dict[str, Any]]" = OrderedDict()
+        self._loaders: Dict[str, Callable[[Any], Awaitable[Optional[Dict[str, Any]]]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.source = getattr(sio.manager, "host_id", None) or uuid.uuid4().hex
+        self.stats = {
+            "published": 0, "emitted": 0, "coalesced": 0, "unchanged": 0,
+            "queued": 0, "sent": 0, "dropped": 0, "maxDepth": 0, "lastSendLagMs": None
+        }
+
+    def start(self):
+        """Start the sender tasks (also started lazily by the first event)"""
+        if not self._sender_tasks:
+            self._queues = [asyncio.Queue() for _ in range(self.senders)]
+            self._sender_tasks = [asyncio.create_task(self._send_loop(q)) for q in self._queues]
+
+    async def stop(self, timeout: float = 5.0):
+        """Send what is pending (up to `timeout` seconds), then stop the senders"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        if not self._sender_tasks:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            print(f"Event bus stopped with {self.depth()} unsent event(s)")
+        for task in self._sender_tasks:
+            task.cancel()
+        await asyncio.gather(*self._sender_tasks, return_exceptions=True)
+        self._sender_tasks = []
+
+    def depth(self) -> int:
+        """Events waiting to be sent"""
+        return sum(q.qsize() for q in self._queues)
+
+    def emit(self, event: str, data: Any, rooms: List[str], entity: str = None, entity_id: Any = None):
+        """
+        Queue an event as is (no coalescing) and return immediately. Pass
+        `entity`/`entity_id` to order it with that entity's other events;
+        a pending coalesced update for the entity is sent before it.
+        """
+        if entity is not None:
+            key = (entity, entity_id)
+            pending = self._pending.pop(key, None)
+            if pending:
+                self._send_update(key, pending)
+        else:
+            key = (event, None)
+        self._enqueue(key, event, data, rooms)
+
+    def _enqueue(self, key: Tuple[str, Any], event: str, data: Any, rooms: List[str]):
+        if not self._sender_tasks:
+            self.start()
+        if self.depth() >= self.max_queued:
+            self.stats["dropped"] += 1
+            print(f"Event bus queue full, dropped '{event}'")
+            return
+        self._queues[hash(key) % len(self._queues)].put_nowait((time.monotonic(), event, data, rooms))
+        self.stats["queued"] += 1
+        self.stats["maxDepth"] = max(self.stats["maxDepth"], self.depth())
+
+    async def _send_loop(self, queue: asyncio.Queue):
+        while True:
+            queued_at, event, data, rooms = await queue.get()
+            try:
+                await self.sio.emit(event, data, to=rooms)
+                self.stats["sent"] += 1
+                self.stats["lastSendLagMs"] = round((time.monotonic() - queued_at) * 1000, 2)
+            except Exception as e:
+                print(f"Event bus emit error ({event}): {e}")
+            finally:
+                queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters plus current queue depth per sender"""
+        return {
+            **self.stats,
+            "depth": self.depth(),
+            "senderDepths": [q.qsize() for q in self._queues],
+            "pendingUpdates": len(self._pending)
+        }
+
+    def register_loader(self, entity: str, loader: Callable[[Any], Awaitable[Optional[Dict[str, Any]]]]):
+        """Register a coroutine that loads an entity's full state by ID"""
+        self._loaders[entity] = loader
+
+    def track(self, entity: str, state: Dict[str, Any]):
+        """Record state that clients already received in full (version 0)"""
+        if state and state.get("id") is not None:
+            self._set_baseline((entity, state["id"]), {"version": 0, "state": dict(state)})
+
+    def publish(self, event: str, entity: str, state: Dict[str, Any], rooms: List[str]):
+        """Queue an entity update; emitted as a diff after the coalescing window"""
+        if not state or state.get("id") is None:
+            return
+        key = (entity, state.get("id"))
+        self.stats["published"] += 1
+
+        pending = self._pending.get(key)
+        if pending:
+            self.stats["coalesced"] += 1
+            pending["event"] = event
+            pending["state"] = dict(state)
+            pending["rooms"].update(rooms)
+        else:
+            self._pending[key] = {"event": event, "state": dict(state), "rooms": set(rooms)}
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Keep draining while updates arrive during a flush
+        while True:
+            await asyncio.sleep(self.window)
+            await self.flush()
+            if not self._pending:
+                break
+
+    async def flush(self):
+        """Queue every pending update for sending now"""
+        pending, self._pending = self._pending, OrderedDict()
+        for key, item in pending.items():
+            self._send_update(key, item)
+
+    def _send_update(self, key: Tuple[str, Any], item: Dict[str, Any]):
+        payload = self._diff(key, item["state"])
+        if payload is None:
+            self.stats["unchanged"] += 1
+            return
+        self._enqueue(key, item["event"], payload, sorted(item["rooms"]))
+        self.stats["emitted"] += 1
+
+    def _diff(self, key: Tuple[str, Any], state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a delta (or full) payload and advance the entity's version"""
+        baseline = self._baselines.get(key)
+        if baseline is None:
+            version = 1
+            payload = {"id": key[1], "version": version, "source": self.source, "full": True, "data": state}
+        else:
+            old = baseline["state"]
+            changes = {k: v for k, v in state.items() if k not in old or old[k] != v}
+            changes.update({k: None for k in old if k not in state})
+            if not changes:
+                return None
+            version = baseline["version"] + 1
+            payload = {"id": key[1], "version": version, "source": self.source, "full": False, "changes": changes}
+
+        self._set_baseline(key, {"version": version, "state": state})
+        return payload
+
+    def _set_baseline(self, key: Tuple[str, Any], baseline: Dict[str, Any]):
+        self._baselines[key] = baseline
+        self._baselines.move_to_end(key)
+        while len(self._baselines) > self.max_entities:
+            self._baselines.popitem(last=False)
+
+    async def get_state(self, entity: str, entity_id: Any) -> Optional[Dict[str, Any]]:
+        """Full state of an entity with its current version, for client resyncs"""
+        key = (entity, entity_id)
+        if key in self._pending:
+            await self.flush()
+
+        baseline = self._baselines.get(key)
+        if baseline is None:
+            loader = self._loaders.get(entity)
+            state = await loader(entity_id) if loader else None
+            if state is None:
+                return None
+            baseline = {"version": 1, "state": state}
+            self._set_baseline(key, baseline)
+
+        return {
+            "id": entity_id,
+            "version": baseline["version"],
+            "source": self.source,
+            "full": True,
+            "data": baseline["state"]
+        }
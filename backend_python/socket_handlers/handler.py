@@ -4,30 +4,133 @@ Socket.IO Event Handlers for BEOS Python Backend
 
 from models.blood_request import BloodRequest
 from models.donor import Donor
-from models.blood_bank import BloodBank
+from middleware.auth import decode_token
+from socket_handlers.stats_stream import STATS_ROOM
+from socket_handlers.registry import extract_token, resolve_identity
+from socket_handlers.rooms import (
+    city_room, blood_room, hospital_room, feed_rooms_for, identity_rooms,
+    request_rooms, donor_rooms, public_donor, BLOOD_TYPES, PUBLIC_FEED_ROOM
+)
+from jose import JWTError
+from socketio.exceptions import ConnectionRefusedError
 import asyncio
 
 
-def setup_socket_handlers(sio):
+def _as_list(value):
+    """Accept a single value or a list from socket payloads"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [v for v in value if v]
+    return [value]
+
+
+def setup_socket_handlers(sio, event_bus, stats_stream, rate_limiter, registry, alert_dispatcher, presence):
     """Setup Socket.IO event handlers"""
     
+    async def rate_limited(sid, event):
+        """Reject an event from a client that exceeds its rate limit"""
+        session = await sio.get_session(sid)
+        if rate_limiter.allow(event, sid, session.get('user_id')):
+            return False
+        await sio.emit('error', {'message': 'Rate limit exceeded', 'event': event}, to=sid)
+        return True
+    
     @sio.event
-    async def connect(sid, environ):
-        """Handle client connection"""
-        print(f"Client connected: {sid}")
+    async def connect(sid, environ, auth=None):
+        """Handle client connection; a token, when sent, must be valid"""
+        identity = None
+        # Until it subscribes to cities/blood types, a socket follows every request
+        await sio.enter_room(sid, PUBLIC_FEED_ROOM)
+        token = extract_token(environ, auth)
+        if token:
+            try:
+                identity = await resolve_identity(decode_token(token))
+            except (JWTError, KeyError):
+                raise ConnectionRefusedError('Invalid token.')
+            
+            registry.add(sid, identity)
+            await sio.save_session(sid, {'user': identity, 'user_id': identity['id']})
+            for room in identity_rooms(identity):
+                await sio.enter_room(sid, room)
+            # Donors follow the feed for their own city and blood type
+            if identity.get('donor_id'):
+                presence.connect(sid, identity)
+                await update_subscriptions(
+                    sid,
+                    cities=_as_list(identity.get('city')),
+                    blood_types=_as_list(identity.get('blood_type'))
+                )
+        
+        print(f"Client connected: {sid}" + (f" (user {identity['id']})" if identity else ""))
         await sio.emit('connected', {
             'message': 'Connected to Blood Emergency Platform',
+            'authenticated': identity is not None,
             'timestamp': asyncio.get_event_loop().time()
         }, to=sid)
     
+    async def update_subscriptions(sid, cities=(), blood_types=(), leave=False):
+        """Add or remove city/blood type subscriptions and re-sync feed rooms"""
+        async with sio.session(sid) as session:
+            current_cities = set(session.get('cities', []))
+            current_types = set(session.get('blood_types', []))
+            old_feeds = set(feed_rooms_for(current_cities, current_types))
+            
+            cities = set(cities)
+            blood_types = {b for b in blood_types if b in BLOOD_TYPES}
+            if leave:
+                current_cities -= cities
+                current_types -= blood_types
+            else:
+                current_cities |= cities
+                current_types |= blood_types
+            
+            session['cities'] = sorted(current_cities)
+            session['blood_types'] = sorted(current_types)
+        
+        for city in cities:
+            if leave:
+                await sio.leave_room(sid, city_room(city))
+            else:
+                await sio.enter_room(sid, city_room(city))
+        for blood_type in blood_types:
+            if leave:
+                await sio.leave_room(sid, blood_room(blood_type))
+            else:
+                await sio.enter_room(sid, blood_room(blood_type))
+        
+        # Only sync feed rooms when the client has at least one subscription,
+        # so unsubscribed sockets never sit in the catch-all feed:*:* room
+        new_feeds = set()
+        if current_cities or current_types:
+            new_feeds = set(feed_rooms_for(current_cities, current_types))
+        for room in old_feeds - new_feeds:
+            await sio.leave_room(sid, room)
+        for room in new_feeds - old_feeds:
+            await sio.enter_room(sid, room)
+        # Subscribed sockets get their targeted feeds instead of the public one
+        if new_feeds:
+            await sio.leave_room(sid, PUBLIC_FEED_ROOM)
+        else:
+            await sio.enter_room(sid, PUBLIC_FEED_ROOM)
+        
+        return {'cities': sorted(current_cities), 'bloodTypes': sorted(current_types)}
+    
     @sio.event
     async def disconnect(sid):
         """Handle client disconnection"""
+        stats_stream.forget(sid)
+        rate_limiter.forget(sid)
+        identity = registry.remove(sid)
+        if identity and identity.get('donor_id'):
+            presence.disconnect(sid, identity['donor_id'])
         print(f"Client disconnected: {sid}")
     
     @sio.on('get-critical-requests')
     async def handle_get_critical(sid):
         """Handle request for critical alerts"""
+        if await rate_limited(sid, 'get-critical-requests'):
+            return
         try:
             critical_requests = await BloodRequest.get_critical()
             await sio.emit('critical-requests', critical_requests, to=sid)
@@ -36,60 +139,205 @@ def setup_socket_handlers(sio):
     
     @sio.on('get-stats')
     async def handle_get_stats(sid):
-        """Handle request for stats"""
+        """Handle request for stats (served from the shared snapshot, throttled per client)"""
+        try:
+            await stats_stream.refresh(sid)
+        except Exception as e:
+            await sio.emit('error', {'message': str(e)}, to=sid)
+    
+    @sio.on('subscribe-stats')
+    async def handle_subscribe_stats(sid):
+        """Receive stats-update pushes whenever the numbers change"""
         try:
-            stats = {
-                'requests': await BloodRequest.get_stats(),
-                'donors': await Donor.get_stats(),
-                'inventory': await BloodBank.get_total_inventory()
-            }
-            await sio.emit('stats-update', stats, to=sid)
+            await stats_stream.subscribe(sid)
         except Exception as e:
             await sio.emit('error', {'message': str(e)}, to=sid)
     
+    @sio.on('unsubscribe-stats')
+    async def handle_unsubscribe_stats(sid):
+        """Stop receiving stats-update pushes"""
+        await sio.leave_room(sid, STATS_ROOM)
+    
     @sio.on('toggle-availability')
     async def handle_toggle_availability(sid, data):
         """Handle donor availability toggle"""
+        if await rate_limited(sid, 'toggle-availability'):
+            return
         try:
             donor_id = data.get('donorId')
             available = data.get('available')
             updated = await Donor.update(donor_id, {'available': available})
-            await sio.emit('donor-updated', updated)
+            if updated:
+                presence.update_donor(updated)
+                event_bus.publish('donor-updated', 'donor', public_donor(updated), donor_rooms(updated))
+                stats_stream.mark_dirty()
         except Exception as e:
             await sio.emit('error', {'message': str(e)}, to=sid)
     
     @sio.on('emergency-request')
     async def handle_emergency_request(sid, data):
         """Handle new emergency request via socket"""
+        if await rate_limited(sid, 'emergency-request'):
+            return
+        # Raises donor alert waves, so only hospitals and admins may send it
+        user = registry.get(sid)
+        if not user or user['role'] not in ('hospital', 'admin'):
+            await sio.emit('error', {'message': 'Access denied', 'event': 'emergency-request'}, to=sid)
+            return
         try:
+            data = dict(data or {})
             data['urgency'] = 'critical'
+            # A hospital always requests for itself
+            if user['role'] == 'hospital':
+                data['hospital_id'] = user.get('hospital_id')
             request = await BloodRequest.create(data)
-            await sio.emit('new-request', request)
-            await sio.emit('critical-alert', request)
+            rooms = request_rooms(request)
+            event_bus.track('request', request)
+            event_bus.emit('new-request', request, rooms, 'request', request['id'])
+            event_bus.emit('critical-alert', request, rooms, 'request', request['id'])
+            alert_dispatcher.dispatch(request)
+            stats_stream.mark_dirty()
         except Exception as e:
             await sio.emit('error', {'message': str(e)}, to=sid)
     
     @sio.on('update-request-status')
     async def handle_update_status(sid, data):
         """Handle request status update"""
+        if await rate_limited(sid, 'update-request-status'):
+            return
         try:
             request_id = data.get('requestId')
             status = data.get('status')
             updated = await BloodRequest.update(request_id, {'status': status})
-            await sio.emit('request-updated', updated)
+            if updated:
+                event_bus.publish('request-updated', 'request', updated, request_rooms(updated))
+                stats_stream.mark_dirty()
+        except Exception as e:
+            await sio.emit('error', {'message': str(e)}, to=sid)
+    
+    def may_get_state(sid, entity, state):
+        """
+        Requests: only sockets in a room the request's events go to (or
+        admins). Donors: only admins and the donor themselves.
+        """
+        user = registry.get(sid)
+        if user and user['role'] == 'admin':
+            return True
+        if entity == 'donor':
+            return bool(user) and str(user.get('donor_id')) == str(state['id'])
+        return bool(set(request_rooms(state['data'])) & set(sio.rooms(sid)))
+    
+    @sio.on('get-state')
+    async def handle_get_state(sid, data):
+        """Send the full current state of an entity (resync after a missed version)"""
+        if await rate_limited(sid, 'get-state'):
+            return
+        try:
+            data = data or {}
+            entity = data.get('entity')
+            try:
+                entity_id = int(data.get('id'))
+            except (TypeError, ValueError):
+                entity_id = None
+            if entity not in ('request', 'donor') or entity_id is None:
+                await sio.emit('error', {'message': 'Invalid entity', 'event': 'get-state'}, to=sid)
+                return
+            state = await event_bus.get_state(entity, entity_id)
+            # Same answer for missing and forbidden, so IDs can't be probed
+            if state is None or not may_get_state(sid, entity, state):
+                await sio.emit('error', {'message': 'Entity not found'}, to=sid)
+                return
+            await sio.emit('entity-state', {'entity': entity, **state}, to=sid)
+        except Exception as e:
+            await sio.emit('error', {'message': str(e)}, to=sid)
+    
+    @sio.on('heartbeat')
+    async def handle_heartbeat(sid, data=None):
+        """Keep a donor marked online; may carry the device's current position"""
+        if await rate_limited(sid, 'heartbeat'):
+            return
+        user = registry.get(sid)
+        if not user or not user.get('donor_id'):
+            return
+        try:
+            data = data if isinstance(data, dict) else {}
+            presence.heartbeat(user['donor_id'], data.get('latitude'), data.get('longitude'))
+        except Exception as e:
+            await sio.emit('error', {'message': str(e)}, to=sid)
+    
+    @sio.on('alert-delivered')
+    async def handle_alert_delivered(sid, data):
+        """Donor client acknowledges that a donor-alert arrived"""
+        user = registry.get(sid)
+        if not user or not user.get('donor_id'):
+            return
+        try:
+            await alert_dispatcher.acknowledge((data or {}).get('requestId'), user['donor_id'])
+        except Exception as e:
+            await sio.emit('error', {'message': str(e)}, to=sid)
+    
+    @sio.on('alert-response')
+    async def handle_alert_response(sid, data):
+        """Donor accepts or declines a donor-alert"""
+        if await rate_limited(sid, 'alert-response'):
+            return
+        user = registry.get(sid)
+        if not user or not user.get('donor_id'):
+            await sio.emit('error', {'message': 'Only signed-in donors can answer alerts'}, to=sid)
+            return
+        try:
+            data = data or {}
+            record = await alert_dispatcher.respond(data.get('requestId'), user['donor_id'], bool(data.get('accept')))
+            if record is None:
+                await sio.emit('error', {'message': 'No open alert for this request'}, to=sid)
+                return
+            await sio.emit('alert-response-recorded', record, to=sid)
         except Exception as e:
             await sio.emit('error', {'message': str(e)}, to=sid)
     
     @sio.on('join-city')
     async def handle_join_city(sid, city):
         """Join city room for targeted notifications"""
-        await sio.enter_room(sid, f'city:{city}')
+        await update_subscriptions(sid, cities=_as_list(city))
         print(f"Socket {sid} joined city room: {city}")
     
     @sio.on('join-blood-type')
     async def handle_join_blood_type(sid, blood_type):
         """Join blood type room for targeted notifications"""
-        await sio.enter_room(sid, f'blood:{blood_type}')
+        await update_subscriptions(sid, blood_types=_as_list(blood_type))
         print(f"Socket {sid} joined blood type room: {blood_type}")
     
+    @sio.on('join-hospital')
+    async def handle_join_hospital(sid, hospital_id):
+        """Join hospital room to receive updates on its own requests (owner or admin only)"""
+        user = registry.get(sid)
+        for value in _as_list(hospital_id):
+            if user and (user['role'] == 'admin' or str(user.get('hospital_id')) == str(value)):
+                await sio.enter_room(sid, hospital_room(value))
+            else:
+                await sio.emit('error', {'message': 'Access denied', 'event': 'join-hospital'}, to=sid)
+    
+    @sio.on('subscribe')
+    async def handle_subscribe(sid, data):
+        """Subscribe to many cities/blood types at once"""
+        data = data or {}
+        subscriptions = await update_subscriptions(
+            sid,
+            cities=_as_list(data.get('cities') or data.get('city')),
+            blood_types=_as_list(data.get('bloodTypes') or data.get('bloodType'))
+        )
+        await sio.emit('subscribed', subscriptions, to=sid)
+    
+    @sio.on('unsubscribe')
+    async def handle_unsubscribe(sid, data):
+        """Drop city/blood type subscriptions"""
+        data = data or {}
+        subscriptions = await update_subscriptions(
+            sid,
+            cities=_as_list(data.get('cities') or data.get('city')),
+            blood_types=_as_list(data.get('bloodTypes') or data.get('bloodType')),
+            leave=True
+        )
+        await sio.emit('subscribed', subscriptions, to=sid)
+    
     return sio
@@ -0,0 +1,148 @@
+"""
+Socket.IO Client Managers for BEOS Python Backend
+Lets emits reach clients connected to any worker process
+"""
+
+from engineio import json
+from socketio import AsyncManager, AsyncRedisManager, AsyncAioPikaManager
+from socketio.async_pubsub_manager import AsyncPubSubManager
+from pathlib import Path
+from typing import Optional
+import aiosqlite
+import asyncio
+import os
+import time
+
+# In-process (None), sqlite:///path/to/bus.db, redis://..., amqp://...
+SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
+DEFAULT_SQLITE_QUEUE = f"sqlite:///{Path(__file__).parent.parent / 'database' / 'socketio_queue.db'}"
+
+
+class AsyncSqliteManager(AsyncPubSubManager):
+    """
+    Pub/sub client manager backed by a local SQLite file.
+
+    Every worker appends messages to a shared table and tails it by
+    auto-increment ID, so workers on one host can share Socket.IO rooms
+    without an external broker. Messages are JSON encoded and pruned
+    after `retention` seconds.
+    """
+    name = 'sqlite'
+
+    def __init__(self, url: str = DEFAULT_SQLITE_QUEUE, channel: str = 'socketio',
+                 write_only: bool = False, logger=None,
+                 poll_interval: float = 0.02, retention: float = 60):
+        self.path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else url
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    async def emit(self, event, data, namespace=None, room=None, skip_sid=None,
+                   callback=None, **kwargs):
+        # Replies to a single client connected to this worker skip the queue
+        if isinstance(room, str) and self.is_connected(room, namespace or '/'):
+            kwargs['ignore_queue'] = True
+        return await super().emit(event, data, namespace=namespace, room=room,
+                                  skip_sid=skip_sid, callback=callback, **kwargs)
+
+    async def _connect(self) -> aiosqlite.Connection:
+        async with self._connect_lock:
+            if self._conn is None:
+                conn = await aiosqlite.connect(self.path)
+                await conn.execute("PRAGMA journal_mode=WAL")
+                await conn.execute("PRAGMA synchronous=NORMAL")
+                await conn.execute("PRAGMA busy_timeout=5000")
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS socketio_messages (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        channel TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+                await conn.commit()
+                self._conn = conn
+            return self._conn
+
+    async def close(self):
+        """Close the queue connection (its thread would keep the worker alive)"""
+        listener = getattr(self, 'thread', None)
+        if listener:
+            listener.cancel()
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _publish(self, data):
+        conn = await self._connect()
+        await conn.execute(
+            "INSERT INTO socketio_messages (channel, payload, created_at) VALUES (?, ?, ?)",
+            (self.channel, json.dumps(data), time.time())
+        )
+        await conn.commit()
+
+    async def _listen(self):
+        conn = await self._connect()
+        cursor = await conn.execute("SELECT COALESCE(MAX(id), 0) FROM socketio_messages")
+        last_id = (await cursor.fetchone())[0]
+        last_prune = time.monotonic()
+
+        while True:
+            cursor = await conn.execute(
+                """SELECT id, payload FROM socketio_messages
+                WHERE id > ? AND channel = ?
+                ORDER BY id""",
+                (last_id, self.channel)
+            )
+            rows = await cursor.fetchall()
+            for message_id, payload in rows:
+                last_id = message_id
+                yield payload
+
+            if time.monotonic() - last_prune > self.retention:
+                last_prune = time.monotonic()
+                await conn.execute(
+                    "DELETE FROM socketio_messages WHERE created_at < ?",
+                    (time.time() - self.retention,)
+                )
+                await conn.commit()
+
+            if not rows:
+                await asyncio.sleep(self.poll_interval)
+
+
+def create_client_manager(url: Optional[str] = SOCKETIO_MESSAGE_QUEUE, workers: int = 1,
+                          write_only: bool = False) -> AsyncManager:
+    """
+    Build the Socket.IO client manager.
+
+    Without a message queue a single worker uses the in-process manager;
+    several workers default to the local SQLite queue. redis:// and
+    amqp:// URLs use python-socketio's broker-backed managers.
+    `write_only` managers only publish (e.g. from a job worker process).
+    """
+    if not url:
+        if workers <= 1:
+            return AsyncManager()
+        url = DEFAULT_SQLITE_QUEUE
+
+    if url.startswith("sqlite://"):
+        return AsyncSqliteManager(url, write_only=write_only)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return AsyncRedisManager(url, write_only=write_only)
+    if url.startswith(("amqp://", "amqps://")):
+        return AsyncAioPikaManager(url, write_only=write_only)
+    raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE: {url}")
+
+
+async def close_client_manager(manager: AsyncManager):
+    """Release resources held by the client manager on shutdown"""
+    if isinstance(manager, AsyncSqliteManager):
+        await manager.close()
+
+
+def is_distributed(manager: AsyncManager) -> bool:
+    """Whether emits are shared with other workers through a message queue"""
+    return isinstance(manager, AsyncPubSubManager)
@@ -0,0 +1,203 @@
+"""
+Donor Presence Registry for BEOS Python Backend
+Online donors indexed by blood type and spatial grid cell
+"""
+
+from typing import Dict, Any, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import heapq
+import math
+import os
+import time
+
+# Grid cell edge in degrees (~5.5 km of latitude)
+PRESENCE_CELL_DEGREES = float(os.environ.get("PRESENCE_CELL_DEGREES", "0.05"))
+# Donors without a connect/heartbeat for this long are treated as offline
+PRESENCE_TTL = float(os.environ.get("PRESENCE_TTL_SECONDS", "120"))
+DONATION_INTERVAL_DAYS = 90
+
+
+def is_eligible(last_donation: Optional[str]) -> bool:
+    """Whether enough time passed since the last donation"""
+    if not last_donation:
+        return True
+    try:
+        donated = datetime.strptime(str(last_donation)[:10], "%Y-%m-%d")
+    except ValueError:
+        return True
+    return datetime.utcnow() - donated >= timedelta(days=DONATION_INTERVAL_DAYS)
+
+
+def parse_position(latitude: Any, longitude: Any) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) from client input, or None when missing or not a valid position"""
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        # Also rejects NaN
+        return None
+    return latitude, longitude
+
+
+class PresenceRegistry:
+    """
+    Donors with at least one authenticated socket on this worker.
+
+    Located, available donors sit in ``index[blood_type][cell]`` so a
+    nearest-donor query only visits the cells that overlap the search
+    radius. Each worker tracks its own sockets.
+    """
+
+    def __init__(self, cell_degrees: float = PRESENCE_CELL_DEGREES, ttl: float = PRESENCE_TTL):
+        self.cell_degrees = cell_degrees
+        self.ttl = ttl
+        # donor_id -> {"donor_id", "user_id", "blood_type", "latitude", "longitude",
+        #              "cell", "available", "eligible", "sids", "last_seen"}
+        self._donors: Dict[int, Dict[str, Any]] = {}
+        self._index: Dict[str, Dict[Tuple[int, int], Set[int]]] = {}
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def _unindex(self, entry: Dict[str, Any]):
+        cell = entry.get("cell")
+        if cell is None:
+            return
+        cells = self._index.get(entry["blood_type"], {})
+        members = cells.get(cell)
+        if members:
+            members.discard(entry["donor_id"])
+            if not members:
+                del cells[cell]
+        entry["cell"] = None
+
+    def _reindex(self, entry: Dict[str, Any]):
+        self._unindex(entry)
+        if entry["available"] and entry["latitude"] is not None and entry["longitude"] is not None:
+            cell = self._cell(entry["latitude"], entry["longitude"])
+            self._index.setdefault(entry["blood_type"], {}).setdefault(cell, set()).add(entry["donor_id"])
+            entry["cell"] = cell
+
+    def connect(self, sid: str, identity: Dict[str, Any]):
+        """Register a donor socket (identity from the socket registry)"""
+        donor_id = identity.get("donor_id")
+        if not donor_id:
+            return
+        entry = self._donors.get(donor_id)
+        if entry is None:
+            entry = self._donors[donor_id] = {
+                "donor_id": donor_id,
+                "user_id": identity["id"],
+                "blood_type": identity.get("blood_type"),
+                "latitude": identity.get("latitude"),
+                "longitude": identity.get("longitude"),
+                "cell": None,
+                "available": bool(identity.get("available", True)),
+                "eligible": is_eligible(identity.get("last_donation")),
+                "sids": set()
+            }
+        entry["sids"].add(sid)
+        entry["last_seen"] = time.monotonic()
+        self._reindex(entry)
+
+    def disconnect(self, sid: str, donor_id: Optional[int]):
+        """Drop a socket; the donor goes offline with its last socket"""
+        entry = self._donors.get(donor_id) if donor_id else None
+        if not entry:
+            return
+        entry["sids"].discard(sid)
+        if not entry["sids"]:
+            self._unindex(entry)
+            del self._donors[donor_id]
+
+    def heartbeat(self, donor_id: int, latitude: float = None, longitude: float = None) -> bool:
+        """Refresh a donor's liveness and, optionally, position (an invalid one keeps the last known cell)"""
+        entry = self._donors.get(donor_id)
+        if not entry:
+            return False
+        entry["last_seen"] = time.monotonic()
+        position = parse_position(latitude, longitude)
+        if position:
+            entry["latitude"], entry["longitude"] = position
+            self._reindex(entry)
+        return True
+
+    def update_donor(self, donor: Dict[str, Any]):
+        """Apply availability/location/blood type changes of an online donor"""
+        entry = self._donors.get(donor.get("id"))
+        if not entry:
+            return
+        self._unindex(entry)
+        if "available" in donor:
+            entry["available"] = bool(donor["available"])
+        for key in ("blood_type", "latitude", "longitude"):
+            if donor.get(key) is not None:
+                entry[key] = donor[key]
+        if "last_donation" in donor:
+            entry["eligible"] = is_eligible(donor["last_donation"])
+        self._reindex(entry)
+
+    def is_online(self, donor_id: int) -> bool:
+        """Whether a donor has a live socket on this worker"""
+        entry = self._donors.get(donor_id)
+        return bool(entry) and time.monotonic() - entry["last_seen"] <= self.ttl
+
+    def nearest(self, blood_types: List[str], latitude: float, longitude: float,
+                radius_km: float, limit: int = 25, eligible_only: bool = True) -> List[Dict[str, Any]]:
+        """Online, available donors of the given types within radius_km, nearest first"""
+        lat_span = radius_km / 111.32
+        lng_span = radius_km / (111.32 * max(math.cos(math.radians(latitude)), 0.01))
+        min_cell = self._cell(latitude - lat_span, longitude - lng_span)
+        max_cell = self._cell(latitude + lat_span, longitude + lng_span)
+        stale_before = time.monotonic() - self.ttl
+        # Equirectangular distance: within metres of haversine at city scale
+        # and several times cheaper, which matters when a cell is dense
+        kx = 111.32 * math.cos(math.radians(latitude))
+        max_sq = radius_km * radius_km
+
+        found = []
+        for blood_type in blood_types:
+            cells = self._index.get(blood_type)
+            if not cells:
+                continue
+            # Walk whichever is smaller: the cells in range or the populated cells
+            if (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1) <= len(cells):
+                keys = [(x, y) for x in range(min_cell[0], max_cell[0] + 1)
+                        for y in range(min_cell[1], max_cell[1] + 1)]
+            else:
+                keys = [k for k in cells if min_cell[0] <= k[0] <= max_cell[0] and min_cell[1] <= k[1] <= max_cell[1]]
+            for key in keys:
+                for donor_id in cells.get(key, ()):
+                    entry = self._donors[donor_id]
+                    dx = (entry["longitude"] - longitude) * kx
+                    dy = (entry["latitude"] - latitude) * 111.32
+                    sq = dx * dx + dy * dy
+                    if sq > max_sq or entry["last_seen"] < stale_before or (eligible_only and not entry["eligible"]):
+                        continue
+                    found.append((sq, donor_id))
+
+        return [
+            {
+                "id": donor_id,
+                "user_id": self._donors[donor_id]["user_id"],
+                "blood_type": self._donors[donor_id]["blood_type"],
+                "latitude": self._donors[donor_id]["latitude"],
+                "longitude": self._donors[donor_id]["longitude"],
+                "distance_km": round(math.sqrt(sq), 2)
+            }
+            for sq, donor_id in heapq.nsmallest(limit, found)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Online donor counts by blood type"""
+        by_type = {
+            blood_type: sum(len(members) for members in cells.values())
+            for blood_type, cells in self._index.items()
+        }
+        return {
+            "online_donors": len(self._donors),
+            "indexed": sum(by_type.values()),
+            "by_type": {k: v for k, v in by_type.items() if v},
+            "cells": sum(len(cells) for cells in self._index.values())
+        }
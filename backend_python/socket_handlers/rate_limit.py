@@ -0,0 +1,146 @@
+"""
+Inbound Socket.IO Rate Limiting for BEOS Python Backend
+Token buckets per socket, per user and per event type
+"""
+
+from collections import defaultdict
+from typing import Dict, Any, Optional, Tuple
+import os
+import time
+
+# event -> (tokens per second, burst size)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'emergency-request': (0.2, 3),
+    'update-request-status': (2, 10),
+    'toggle-availability': (1, 5),
+    'get-critical-requests': (1, 5),
+    'get-state': (5, 20),
+    'alert-response': (1, 5),
+    'heartbeat': (0.5, 5),
+}
+
+# How many times the per-client limit all sockets together may use per event
+GLOBAL_MULTIPLIER = float(os.environ.get("SOCKET_RATE_LIMIT_GLOBAL_MULTIPLIER", "200"))
+MAX_BUCKETS = 50000
+
+
+def parse_limits(spec: Optional[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse SOCKET_RATE_LIMITS, e.g.
+    "emergency-request=0.2:3,toggle-availability=1:5"
+    """
+    limits = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        event, value = item.split("=", 1)
+        rate, _, burst = value.partition(":")
+        limits[event.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+class TokenBucket:
+    """Classic token bucket; refilled lazily on each check"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, now: float, cost: float = 1) -> bool:
+        self._refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def refund(self, cost: float = 1):
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """Per-event token bucket limits checked against socket, user and global buckets"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]] = None,
+                 global_multiplier: float = GLOBAL_MULTIPLIER):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits if limits is not None else parse_limits(os.environ.get("SOCKET_RATE_LIMITS")))
+        self.global_multiplier = global_multiplier
+        # ("user"|"global", key, event) -> bucket
+        self._buckets: Dict[Tuple[str, Any, str], TokenBucket] = {}
+        # sid -> event -> bucket (dropped as a whole on disconnect)
+        self._sid_buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"allowed": 0, "limited": 0})
+
+    def _new_bucket(self, event: str, multiplier: float = 1) -> TokenBucket:
+        rate, burst = self.limits[event]
+        return TokenBucket(rate * multiplier, burst * multiplier)
+
+    def _sid_bucket(self, sid: str, event: str) -> TokenBucket:
+        buckets = self._sid_buckets.setdefault(sid, {})
+        bucket = buckets.get(event)
+        if bucket is None:
+            bucket = buckets[event] = self._new_bucket(event)
+        return bucket
+
+    def _bucket(self, scope: str, key: Any, event: str, multiplier: float = 1) -> TokenBucket:
+        bucket_key = (scope, key, event)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._prune()
+            bucket = self._buckets[bucket_key] = self._new_bucket(event, multiplier)
+        return bucket
+
+    def allow(self, event: str, sid: str, user_id: Any = None) -> bool:
+        """Whether this event from this client may be processed now"""
+        if event not in self.limits:
+            return True
+
+        now = time.monotonic()
+        buckets = [self._sid_bucket(sid, event)]
+        if user_id is not None:
+            buckets.append(self._bucket("user", user_id, event))
+        buckets.append(self._bucket("global", None, event, self.global_multiplier))
+
+        taken = []
+        for bucket in buckets:
+            if not bucket.consume(now):
+                # Don't charge the buckets that did have room
+                for charged in taken:
+                    charged.refund()
+                self.stats[event]["limited"] += 1
+                return False
+            taken.append(bucket)
+
+        self.stats[event]["allowed"] += 1
+        return True
+
+    def forget(self, sid: str):
+        """Drop a disconnected socket's buckets"""
+        self._sid_buckets.pop(sid, None)
+
+    def _prune(self):
+        """Drop idle (full) buckets; they carry no state worth keeping"""
+        now = time.monotonic()
+        for key in [k for k, b in self._buckets.items() if k[0] != "global" and b.is_full(now)]:
+            del self._buckets[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Configured limits and allowed/limited counts per event"""
+        return {
+            "limits": {event: {"rate": rate, "burst": burst} for event, (rate, burst) in self.limits.items()},
+            "events": dict(self.stats),
+            "buckets": len(self._buckets) + sum(len(b) for b in self._sid_buckets.values())
+        }
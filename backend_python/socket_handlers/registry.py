@@ -0,0 +1,104 @@
+"""
+Socket Connection Registry for BEOS Python Backend
+Maps authenticated sockets to users and users to their sockets
+"""
+
+from models.donor import Donor
+from middleware.auth import resolve_profile_id, PROFILE_CLAIMS
+from typing import Dict, Any, List, Optional, Set
+from urllib.parse import parse_qs
+
+
+def extract_token(environ: Dict[str, Any], auth: Any = None) -> Optional[str]:
+    """
+    Read a JWT from the Socket.IO auth payload ({"token": ...}), the
+    ?token= query parameter or an Authorization: Bearer header
+    """
+    if isinstance(auth, dict) and auth.get("token"):
+        token = auth["token"]
+        return token[7:] if token.startswith("Bearer ") else token
+
+    query = parse_qs(environ.get("QUERY_STRING", ""))
+    if query.get("token"):
+        return query["token"][0]
+
+    header = environ.get("HTTP_AUTHORIZATION", "")
+    if header.startswith("Bearer "):
+        return header[7:]
+    return None
+
+
+async def resolve_identity(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a socket identity from a token payload, including the user's profile ID"""
+    identity = {
+        "id": payload["id"],
+        "email": payload.get("email"),
+        "role": payload.get("role")
+    }
+
+    if identity["role"] == "user":
+        donor = await Donor.get_by_user_id(identity["id"])
+        if donor:
+            identity.update({
+                "donor_id": donor["id"],
+                "city": donor.get("city"),
+                "blood_type": donor.get("blood_type"),
+                "latitude": donor.get("latitude"),
+                "longitude": donor.get("longitude"),
+                "available": donor.get("available"),
+                "last_donation": donor.get("last_donation")
+            })
+    elif identity["role"] in ("hospital", "blood_bank"):
+        # Tokens carry the profile ID; older tokens fall back to a lookup
+        profile_id = await resolve_profile_id(payload)
+        if profile_id is not None:
+            identity[PROFILE_CLAIMS[identity["role"]]] = profile_id
+
+    return identity
+
+
+class ConnectionRegistry:
+    """sid -> identity and user ID -> sids for the sockets on this worker"""
+
+    def __init__(self):
+        self._identities: Dict[str, Dict[str, Any]] = {}
+        self._user_sids: Dict[Any, Set[str]] = {}
+
+    def add(self, sid: str, identity: Dict[str, Any]):
+        """Register an authenticated socket"""
+        self._identities[sid] = identity
+        self._user_sids.setdefault(identity["id"], set()).add(sid)
+
+    def remove(self, sid: str) -> Optional[Dict[str, Any]]:
+        """Forget a socket; returns its identity if it was authenticated"""
+        identity = self._identities.pop(sid, None)
+        if identity:
+            sids = self._user_sids.get(identity["id"])
+            if sids:
+                sids.discard(sid)
+                if not sids:
+                    del self._user_sids[identity["id"]]
+        return identity
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        """Identity of a socket, or None for anonymous sockets"""
+        return self._identities.get(sid)
+
+    def sids_for_user(self, user_id: Any) -> List[str]:
+        """Sockets a user has open on this worker"""
+        return list(self._user_sids.get(user_id, ()))
+
+    def is_online(self, user_id: Any) -> bool:
+        """Whether a user has at least one socket on this worker"""
+        return user_id in self._user_sids
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Authenticated socket and user counts, by role"""
+        by_role: Dict[str, int] = {}
+        for identity in self._identities.values():
+            by_role[identity["role"]] = by_role.get(identity["role"], 0) + 1
+        return {
+            "authenticated_sockets": len(self._identities),
+            "online_users": len(self._user_sids),
+            "by_role": by_role
+        }
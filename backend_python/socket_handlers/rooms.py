@@ -0,0 +1,127 @@
+"""
+Socket.IO Room Routing for BEOS Python Backend
+Maps domain events to the rooms that should receive them
+"""
+
+from services.ai_service import compatible_donor_types
+from models.donor import Donor
+from typing import Dict, Any, List, Iterable, Optional
+
+# Wildcard used in feed rooms for "any city" / "any blood type"
+ANY = "*"
+
+ADMIN_ROOM = "admins"
+# Every request event, for sockets without city/blood type subscriptions
+# (public Emergency page, hospital dashboards, signed-out viewers)
+PUBLIC_FEED_ROOM = "feed:public"
+BLOOD_TYPES = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+
+
+def normalize_city(city: Optional[str]) -> Optional[str]:
+    """Normalize a city name for use in room names"""
+    if not city or not str(city).strip():
+        return None
+    return str(city).strip().lower()
+
+
+def city_room(city: str) -> str:
+    """Room for everyone watching a city"""
+    return f"city:{normalize_city(city)}"
+
+
+def blood_room(blood_type: str) -> str:
+    """Room for everyone watching a blood type"""
+    return f"blood:{blood_type}"
+
+
+def feed_room(city: Optional[str], blood_type: Optional[str]) -> str:
+    """
+    Composite request-feed room.
+    A client subscribed to cities C and blood types B sits in feed:c:b for
+    every pair; an empty side is replaced by the ANY wildcard.
+    """
+    return f"feed:{normalize_city(city) or ANY}:{blood_type or ANY}"
+
+
+def hospital_room(hospital_id: int) -> str:
+    """Room for a hospital's own dashboards"""
+    return f"hospital:{hospital_id}"
+
+
+def user_room(user_id: int) -> str:
+    """Personal room of one user account (all of its sockets)"""
+    return f"user:{user_id}"
+
+
+def donor_room(donor_id: int) -> str:
+    """Personal room of one donor profile"""
+    return f"donor:{donor_id}"
+
+
+def bank_room(bank_id: int) -> str:
+    """Room for a blood bank's own dashboards"""
+    return f"bank:{bank_id}"
+
+
+def role_room(role: str) -> str:
+    """Room for every authenticated socket with a role"""
+    return f"role:{role}"
+
+
+def identity_rooms(identity: Dict[str, Any]) -> List[str]:
+    """Rooms an authenticated socket joins automatically"""
+    rooms = [user_room(identity["id"]), role_room(identity["role"])]
+    if identity["role"] == "admin":
+        rooms.append(ADMIN_ROOM)
+    if identity.get("donor_id"):
+        rooms.append(donor_room(identity["donor_id"]))
+    if identity.get("hospital_id"):
+        rooms.append(hospital_room(identity["hospital_id"]))
+    if identity.get("blood_bank_id"):
+        rooms.append(bank_room(identity["blood_bank_id"]))
+    return rooms
+
+
+def feed_rooms_for(cities: Iterable[str], blood_types: Iterable[str]) -> List[str]:
+    """Feed rooms a client belongs to for its city/blood type subscriptions"""
+    cities = [c for c in cities if normalize_city(c)] or [None]
+    blood_types = [b for b in blood_types if b in BLOOD_TYPES] or [None]
+    return [feed_room(c, b) for c in cities for b in blood_types]
+
+
+def request_rooms(request: Dict[str, Any]) -> List[str]:
+    """
+    Rooms that should receive events about a blood request:
+    donors in the request's city with a compatible blood group, city-wide
+    watchers, the owning hospital, admins and the public feed.
+    """
+    city = request.get("hospital_city")
+    compatible = compatible_donor_types(request.get("blood_type"))
+
+    rooms = [ADMIN_ROOM, PUBLIC_FEED_ROOM]
+    for blood_type in compatible:
+        if city:
+            rooms.append(feed_room(city, blood_type))
+            # Donors who subscribed to a blood type but no city
+            rooms.append(feed_room(None, blood_type))
+        else:
+            # Location unknown: fall back to every compatible donor
+            rooms.append(blood_room(blood_type))
+    if city:
+        rooms.append(feed_room(city, None))
+    if request.get("hospital_id"):
+        rooms.append(hospital_room(request["hospital_id"]))
+    return rooms
+
+
+def donor_rooms(donor: Dict[str, Any]) -> List[str]:
+    """Rooms that should receive donor profile/availability changes"""
+    rooms = [ADMIN_ROOM, donor_room(donor["id"])]
+    if donor.get("city"):
+        rooms.append(feed_room(donor["city"], None))
+    return rooms
+
+
+def public_donor(donor: Dict[str, Any]) -> Dict[str, Any]:
+    """A donor row reduced to Donor.PUBLIC_FIELDS, for socket payloads"""
+    return {field: donor.get(field) for field in Donor.PUBLIC_FIELDS}
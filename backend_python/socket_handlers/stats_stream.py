@@ -0,0 +1,140 @@
+"""
+Server-driven stats channel for BEOS Python Backend
+One snapshot per interval/change, fanned out to the `stats` room
+"""
+
+from models.blood_request import BloodRequest
+from models.donor import Donor
+from models.blood_bank import BloodBank
+from socket_handlers.backpressure import SOCKET_EMITS
+from typing import Dict, Any, Optional
+import asyncio
+import os
+import time
+
+STATS_ROOM = "stats"
+
+# Periodic recompute (catches writes that don't mark the stream dirty)
+STATS_INTERVAL = float(os.environ.get("STATS_INTERVAL_SECONDS", "10"))
+# Minimum gap between two recomputes, however many changes arrive
+STATS_MIN_INTERVAL = float(os.environ.get("STATS_MIN_INTERVAL_SECONDS", "1"))
+# Minimum gap between manual refreshes from the same client
+STATS_CLIENT_THROTTLE = float(os.environ.get("STATS_CLIENT_THROTTLE_SECONDS", "5"))
+
+
+class StatsStream:
+    """Computes dashboard stats once and pushes them to every subscriber"""
+
+    def __init__(self, sio, interval: float = STATS_INTERVAL,
+                 min_interval: float = STATS_MIN_INTERVAL,
+                 client_throttle: float = STATS_CLIENT_THROTTLE):
+        self.sio = sio
+        self.interval = interval
+        self.min_interval = min_interval
+        self.client_throttle = client_throttle
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.computed_at = 0.0
+        self._pushed: Optional[Dict[str, Any]] = None
+        self._dirty = asyncio.Event()
+        self._compute_lock = asyncio.Lock()
+        self._last_refresh: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"computed": 0, "pushed": 0, "served_cached": 0, "throttled": 0}
+
+    def start(self):
+        """Start the background publisher"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background publisher"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def mark_dirty(self):
+        """Signal that underlying data changed; subscribers get a fresh snapshot soon"""
+        self._dirty.set()
+
+    def has_subscribers(self) -> bool:
+        """Whether any client on this server sits in the stats room"""
+        return bool(self.sio.manager.rooms.get("/", {}).get(STATS_ROOM))
+
+    async def compute(self) -> Dict[str, Any]:
+        """Run the stats queries once (concurrent callers share the result)"""
+        started = time.monotonic()
+        async with self._compute_lock:
+            if self.snapshot is not None and self.computed_at >= started:
+                return self.snapshot
+            self.snapshot = {
+                'requests': await BloodRequest.get_stats(),
+                'donors': await Donor.get_stats(),
+                'inventory': await BloodBank.get_total_inventory()
+            }
+            self.computed_at = time.monotonic()
+            self.stats["computed"] += 1
+            return self.snapshot
+
+    async def get_snapshot(self, max_age: float = None) -> Dict[str, Any]:
+        """Cached snapshot, recomputed only when older than max_age"""
+        max_age = self.interval if max_age is None else max_age
+        if self.snapshot is None or time.monotonic() - self.computed_at > max_age:
+            return await self.compute()
+        self.stats["served_cached"] += 1
+        return self.snapshot
+
+    async def subscribe(self, sid: str):
+        """Add a client to the stats room and send it the current snapshot"""
+        await self.sio.enter_room(sid, STATS_ROOM)
+        await self.sio.emit('stats-update', await self.get_snapshot(), to=sid)
+
+    async def refresh(self, sid: str) -> bool:
+        """
+        Manual refresh from a client; ignored when the client asks too often.
+        The client also joins the stats room so later changes are pushed.
+        """
+        await self.sio.enter_room(sid, STATS_ROOM)
+        now = time.monotonic()
+        last = self._last_refresh.get(sid)
+        if last is not None and now - last < self.client_throttle:
+            self.stats["throttled"] += 1
+            return False
+        self._last_refresh[sid] = now
+        await self.sio.emit('stats-update', await self.get_snapshot(self.min_interval), to=sid)
+        return True
+
+    def forget(self, sid: str):
+        """Drop per-client state on disconnect"""
+        self._last_refresh.pop(sid, None)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+
+            if not self.has_subscribers():
+                continue
+            try:
+                snapshot = await self.compute()
+                if snapshot != self._pushed:
+                    # Every worker runs its own stream for its own clients,
+                    # so the push must not go through the message queue
+                    await self.sio.manager.emit(
+                        'stats-update', snapshot, namespace='/',
+                        room=STATS_ROOM, ignore_queue=True
+                    )
+                    self._pushed = snapshot
+                    self.stats["pushed"] += 1
+                    SOCKET_EMITS.inc(('stats-update',))
+            except Exception as e:
+                print(f"Stats stream error: {e}")
+
+            # Debounce bursts of writes into one recompute per min_interval
+            await asyncio.sleep(self.min_interval)
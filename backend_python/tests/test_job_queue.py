@@ -0,0 +1,280 @@
+"""
+Job Queue Tests for BEOS Python Backend
+Claiming, retries with backoff, visibility timeouts, unique keys and repeats
+
+    python -m pytest tests
+"""
+
+from queues.job_queue import JobQueue
+from queues.worker import WorkerPool
+from queues import tasks
+import asyncio
+import pytest
+import time
+
+
+@pytest.fixture
+def run(tmp_path):
+    """Run an async scenario against a fresh queue in a temporary database"""
+
+    def runner(scenario):
+        async def main():
+            queue = JobQueue(str(tmp_path / "jobs.db"))
+            try:
+                return await scenario(queue)
+            finally:
+                await queue.close()
+        return asyncio.run(main())
+
+    return runner
+
+
+async def make_ready(queue: JobQueue, job_id: int):
+    """Skip a retry's backoff delay"""
+    await queue._write("UPDATE jobs SET run_at = 0 WHERE id = ?", (job_id,))
+
+
+# Claiming
+
+def test_claim_takes_highest_priority_then_oldest(run):
+    async def scenario(queue):
+        low = await queue.enqueue("a", priority=-10, run_at=1)
+        first = await queue.enqueue("b", run_at=1)
+        second = await queue.enqueue("c", run_at=2)
+        urgent = await queue.enqueue("d", priority=10, run_at=3)
+        claimed = [await queue.claim(["default"], "w1") for _ in range(4)]
+        assert [job["id"] for job in claimed] == [urgent["id"], first["id"], second["id"], low["id"]]
+        assert await queue.claim(["default"], "w1") is None
+
+    run(scenario)
+
+
+def test_claim_skips_delayed_jobs_and_other_queues(run):
+    async def scenario(queue):
+        await queue.enqueue("later", delay=60)
+        await queue.enqueue("elsewhere", queue="notifications")
+        assert await queue.claim(["default"], "w1") is None
+        job = await queue.claim(["default", "notifications"], "w1")
+        assert job["name"] == "elsewhere"
+
+    run(scenario)
+
+
+def test_claimed_job_is_locked_to_its_worker(run):
+    async def scenario(queue):
+        job = await queue.enqueue("a")
+        claimed = await queue.claim(["default"], "w1", visibility_timeout=30)
+        assert claimed["id"] == job["id"]
+        assert claimed["status"] == "running"
+        assert claimed["locked_by"] == "w1"
+        assert claimed["attempts"] == 1
+        assert claimed["locked_until"] == pytest.approx(time.time() + 30, abs=1)
+        assert await queue.claim(["default"], "w2") is None
+        assert not await queue.complete(job["id"], "w2")
+        assert await queue.complete(job["id"], "w1", {"ok": True})
+        done = await queue.get(job["id"])
+        assert done["status"] == "completed"
+        assert done["result"] == {"ok": True}
+
+    run(scenario)
+
+
+# Retries and backoff
+
+def test_failure_is_retried_with_exponential_backoff(run):
+    async def scenario(queue):
+        job = await queue.enqueue("flaky", max_attempts=3, backoff=10)
+        for attempt, delay in ((1, 10), (2, 20)):
+            claimed = await queue.claim(["default"], "w1")
+            assert claimed["attempts"] == attempt
+            failed_at = time.time()
+            assert await queue.fail(job["id"], "w1", "boom") == "pending"
+            retry = await queue.get(job["id"])
+            assert retry["locked_by"] is None
+            assert retry["last_error"] == "boom"
+            # +-20% jitter around backoff * 2^(attempt - 1)
+            assert delay * 0.8 - 1 <= retry["run_at"] - failed_at <= delay * 1.2 + 1
+            assert await queue.claim(["default"], "w1") is None
+            await make_ready(queue, job["id"])
+
+        await queue.claim(["default"], "w1")
+        assert await queue.fail(job["id"], "w1", "boom") == "failed"
+        final = await queue.get(job["id"])
+        assert final["status"] == "failed"
+        assert final["finished_at"] is not None
+        await make_ready(queue, job["id"])
+        assert await queue.claim(["default"], "w1") is None
+
+    run(scenario)
+
+
+def test_worker_retries_a_failing_handler(run, monkeypatch):
+    async def failing(payload, context):
+        raise RuntimeError("handler broke")
+
+    monkeypatch.setitem(tasks.HANDLERS, "test.failing", failing)
+
+    async def scenario(queue):
+        pool = WorkerPool(queue, ["default"], 1, poll_interval=0.01)
+        job = await queue.enqueue("test.failing", max_attempts=2)
+        pool.start()
+        try:
+            for _ in range(100):
+                if pool.stats["retried"]:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await pool.stop()
+        retry = await queue.get(job["id"])
+        assert pool.stats["retried"] == 1
+        assert retry["status"] == "pending"
+        assert retry["attempts"] == 1
+        assert retry["last_error"] == "RuntimeError: handler broke"
+
+    run(scenario)
+
+
+# Visibility timeout
+
+def test_expired_lock_is_requeued_and_reclaimed(run):
+    async def scenario(queue):
+        job = await queue.enqueue("slow")
+        await queue.claim(["default"], "w1", visibility_timeout=0.05)
+        assert await queue.requeue_expired() == 0
+        await asyncio.sleep(0.1)
+        assert await queue.requeue_expired() == 1
+
+        reclaimed = await queue.claim(["default"], "w2")
+        assert reclaimed["id"] == job["id"]
+        assert reclaimed["attempts"] == 2
+        # The first worker has lost the job
+        assert not await queue.extend(job["id"], "w1")
+        assert not await queue.complete(job["id"], "w1")
+        assert await queue.fail(job["id"], "w1", "late") is None
+        assert await queue.extend(job["id"], "w2")
+        assert await queue.complete(job["id"], "w2")
+
+    run(scenario)
+
+
+def test_expired_lock_without_attempts_left_fails_the_job(run):
+    async def scenario(queue):
+        job = await queue.enqueue("slow", max_attempts=1)
+        await queue.claim(["default"], "w1", visibility_timeout=0.05)
+        await asyncio.sleep(0.1)
+        assert await queue.requeue_expired() == 0
+        failed = await queue.get(job["id"])
+        assert failed["status"] == "failed"
+        assert failed["last_error"] == "Visibility timeout expired"
+
+    run(scenario)
+
+
+def test_heartbeat_keeps_the_lock(run):
+    async def scenario(queue):
+        job = await queue.enqueue("slow")
+        await queue.claim(["default"], "w1", visibility_timeout=0.05)
+        await asyncio.sleep(0.03)
+        assert await queue.extend(job["id"], "w1", visibility_timeout=30)
+        await asyncio.sleep(0.05)
+        assert await queue.requeue_expired() == 0
+        assert (await queue.get(job["id"]))["locked_by"] == "w1"
+
+    run(scenario)
+
+
+def test_worker_cancels_a_job_whose_lock_was_lost(run, monkeypatch):
+    events = []
+
+    async def slow(payload, context):
+        events.append("started")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+
+    monkeypatch.setitem(tasks.HANDLERS, "test.slow", slow)
+
+    async def scenario(queue):
+        pool = WorkerPool(queue, ["default"], 1, poll_interval=0.01, visibility_timeout=0.3)
+        job = await queue.enqueue("test.slow")
+        pool.start()
+        try:
+            while not events:
+                await asyncio.sleep(0.01)
+            # Another worker took the job over after a (simulated) expiry
+            await queue._write("UPDATE jobs SET locked_by = 'w2' WHERE id = ?", (job["id"],))
+            for _ in range(100):
+                if pool.stats["lost"]:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await pool.stop()
+        assert events == ["started", "cancelled"]
+        assert pool.stats["lost"] == 1
+        assert pool.stats["completed"] == 0
+        # Left alone for the worker that owns it now
+        assert (await queue.get(job["id"]))["locked_by"] == "w2"
+
+    run(scenario)
+
+
+# Unique keys
+
+def test_unique_key_dedupes_pending_and_running_jobs(run):
+    async def scenario(queue):
+        first = await queue.enqueue("resync", unique_key="resync")
+        assert (await queue.enqueue("resync", unique_key="resync"))["id"] == first["id"]
+        await queue.claim(["default"], "w1")
+        assert (await queue.enqueue("resync", unique_key="resync"))["id"] == first["id"]
+        await queue.complete(first["id"], "w1")
+        second = await queue.enqueue("resync", unique_key="resync")
+        assert second["id"] != first["id"]
+        assert (await queue.enqueue("other", unique_key="other"))["id"] != second["id"]
+        assert (await queue.counts())["default"] == {"completed": 1, "pending": 2}
+
+    run(scenario)
+
+
+# Repeating jobs
+
+def test_repeating_job_is_rescheduled_on_completion(run):
+    async def scenario(queue):
+        job = await queue.enqueue("tick", repeat_every=60, unique_key="tick")
+        await queue.claim(["default"], "w1")
+        completed_at = time.time()
+        assert await queue.complete(job["id"], "w1")
+        db = await queue._db()
+        cursor = await db.execute("SELECT * FROM jobs WHERE status = 'pending'")
+        pending = [dict(row) for row in await cursor.fetchall()]
+        assert len(pending) == 1
+        assert pending[0]["name"] == "tick"
+        assert pending[0]["unique_key"] == "tick"
+        assert pending[0]["run_at"] == pytest.approx(completed_at + 60, abs=1)
+
+    run(scenario)
+
+
+def test_completion_and_next_run_commit_together(run, monkeypatch):
+    async def scenario(queue):
+        job = await queue.enqueue("tick", repeat_every=60)
+        await queue.claim(["default"], "w1")
+        execute = JobQueue._execute
+
+        async def crash_on_insert(db, sql, params=()):
+            if sql.lstrip().startswith("INSERT"):
+                raise RuntimeError("crashed before rescheduling")
+            return await execute(db, sql, params)
+
+        monkeypatch.setattr(JobQueue, "_execute", staticmethod(crash_on_insert))
+        with pytest.raises(RuntimeError):
+            await queue.complete(job["id"], "w1")
+        monkeypatch.setattr(JobQueue, "_execute", staticmethod(execute))
+
+        # Neither write happened: the job is still running and can complete
+        assert (await queue.get(job["id"]))["status"] == "running"
+        assert await queue.complete(job["id"], "w1")
+        assert (await queue.counts())["default"] == {"completed": 1, "pending": 1}
+
+    run(scenario)
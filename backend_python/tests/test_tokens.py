@@ -0,0 +1,51 @@
+"""
+Token Revocation Tests for BEOS Python Backend
+Per-user cutoffs against tokens issued just before and after them
+"""
+
+from jose import JWTError
+from middleware.auth import create_access_token, decode_token
+from middleware.tokens import RevocationList, revocation_list
+from models.refresh_token import RefreshToken
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def revoke_user(monkeypatch):
+    """revocation_list.revoke_user without the database writes"""
+
+    async def no_op(*args):
+        pass
+
+    monkeypatch.setattr(RevocationList, "_store", no_op)
+    monkeypatch.setattr(RefreshToken, "revoke_user", no_op)
+    monkeypatch.setattr(revocation_list, "_user_cutoffs", {})
+    return lambda user_id: asyncio.run(revocation_list.revoke_user(user_id))
+
+
+def test_revoke_user_rejects_tokens_issued_in_the_same_second(revoke_user):
+    # Back to back, so the token and the cutoff almost always share a second
+    token = create_access_token({"id": 7, "role": "donor"})
+    revoke_user(7)
+    with pytest.raises(JWTError):
+        decode_token(token)
+
+
+def test_tokens_issued_after_revoke_user_are_valid(revoke_user):
+    revoke_user(7)
+    token = create_access_token({"id": 7, "role": "donor"})
+    assert decode_token(token)["id"] == 7
+
+
+def test_revoke_user_only_affects_that_user(revoke_user):
+    token = create_access_token({"id": 8, "role": "donor"})
+    revoke_user(7)
+    assert decode_token(token)["id"] == 8
+
+
+def test_legacy_tokens_without_iat_us_use_iat(revoke_user):
+    revoke_user(7)
+    cutoff = revocation_list._user_cutoffs[7]
+    assert revocation_list.is_revoked({"id": 7, "iat": int(cutoff)})
+    assert not revocation_list.is_revoked({"id": 7, "iat": int(cutoff) + 1})
@@ -29,7 +29,7 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
                 } catch (error) {
                     console.warn("Auth check failed or timed out:", error);
                     // Treat as guest if network fails, don't block app
-                    localStorage.removeItem('token');
+                    api.clearTokens();
                     setUser(null);
                 }
             }
@@ -41,7 +41,7 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
     const login = async (email: string, password: string): Promise<boolean> => {
         try {
             const response = await api.login({ email, password });
-            localStorage.setItem('token', response.token);
+            api.storeTokens(response.token, response.refreshToken);
             setUser(response.user);
 
             // Redirect based on role
@@ -75,7 +75,7 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
     const register = async (userData: RegisterData): Promise<boolean> => {
         try {
             const response = await api.register(userData as unknown as Record<string, unknown>);
-            localStorage.setItem('token', response.token);
+            api.storeTokens(response.token, response.refreshToken);
             setUser(response.user);
             showToast('Registration successful', 'success');
             return true;
@@ -87,7 +87,8 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
     };
 
     const logout = () => {
-        localStorage.removeItem('token');
+        // Revoke the token server-side; signing out locally does not wait on it
+        api.logout().catch(() => undefined).finally(api.clearTokens);
         setUser(null);
         navigate('/login');
         showToast('Logged out successfully', 'info');
@@ -59,18 +59,52 @@ export function useCriticalAlerts() {
 
 export function useRealTimeRequests(initialRequests = []) {
     const [requests, setRequests] = useState(initialRequests);
+    // Last applied { source, version } per request ID, to spot missed diffs
+    const versionsRef = useRef(new Map());
 
     useEffect(() => {
+        const versions = versionsRef.current;
+
         const handleNewRequest = (request) => {
+            versions.set(request.id, { source: null, version: 0 });
             setRequests(prev => [request, ...prev]);
         };
 
-        const handleUpdated = (updated) => {
-            setRequests(prev => prev.map(r => r.id === updated.id ? updated : r));
+        // request-updated carries { id, version, source, full, data | changes }:
+        // the whole row when full, otherwise only the fields that changed
+        const handleUpdated = (update) => {
+            if (update.full === undefined) {
+                setRequests(prev => prev.map(r => r.id === update.id ? update : r));
+                return;
+            }
+            const known = versions.get(update.id);
+            const missed = !update.full && known && (
+                (known.source !== null && known.source !== update.source) ||
+                (known.version !== 0 && known.version + 1 !== update.version)
+            );
+            if (missed) {
+                // A diff went missing: ask for the full state instead
+                socketService.emit('get-state', { entity: 'request', id: update.id });
+                return;
+            }
+            versions.set(update.id, { source: update.source, version: update.version });
+            const fields = update.full ? update.data : update.changes;
+            setRequests(prev => prev.map(r => r.id === update.id ? { ...r, ...fields } : r));
+        };
+
+        const handleState = (state) => {
+            if (state.entity !== 'request') return;
+            versions.set(state.id, { source: state.source, version: state.version });
+            setRequests(prev => prev.map(r => r.id === state.id ? { ...r, ...state.data } : r));
         };
 
+        // request-fulfilled only names the request and donor; the full field
+        // changes follow as a request-updated diff
         const handleFulfilled = (fulfilled) => {
-            setRequests(prev => prev.map(r => r.id === fulfilled.id ? fulfilled : r));
+            const id = fulfilled.request_id ?? fulfilled.id;
+            setRequests(prev => prev.map(r =>
+                r.id === id ? { ...r, status: 'fulfilled', donor_id: fulfilled.donor_id ?? r.donor_id } : r
+            ));
         };
 
         const handleCancelled = (cancelled) => {
@@ -79,12 +113,14 @@ export function useRealTimeRequests(initialRequests = []) {
 
         socketService.on('new-request', handleNewRequest);
         socketService.on('request-updated', handleUpdated);
+        socketService.on('entity-state', handleState);
         socketService.on('request-fulfilled', handleFulfilled);
         socketService.on('request-cancelled', handleCancelled);
 
         return () => {
             socketService.off('new-request', handleNewRequest);
             socketService.off('request-updated', handleUpdated);
+            socketService.off('entity-state', handleState);
             socketService.off('request-fulfilled', handleFulfilled);
             socketService.off('request-cancelled', handleCancelled);
         };
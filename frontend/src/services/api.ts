@@ -25,10 +25,81 @@ interface FetchOptions extends RequestInit {
 
 const DEFAULT_TIMEOUT = 10000; // 10 seconds
 
-async function fetchAPI<T>(endpoint: string, options: FetchOptions = {}): Promise<T> {
+// Access tokens are short-lived; they are renewed with the refresh token
+// (no password check). Concurrent callers share one refresh request.
+let refreshing: Promise<string | null> | null = null;
+
+export const storeTokens = (token: string, refreshToken?: string): void => {
+    localStorage.setItem('token', token);
+    if (refreshToken) {
+        localStorage.setItem('refreshToken', refreshToken);
+    }
+};
+
+export const clearTokens = (): void => {
+    localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
+};
+
+const expiresSoon = (token: string): boolean => {
+    try {
+        const payload = JSON.parse(atob(token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/')));
+        return typeof payload.exp === 'number' && payload.exp * 1000 - Date.now() < 30000;
+    } catch {
+        return false;
+    }
+};
+
+export function refreshAccessToken(): Promise<string | null> {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (!refreshToken) {
+        return Promise.resolve(null);
+    }
+    if (!refreshing) {
+        refreshing = (async () => {
+            try {
+                const response = await fetch(`${API_URL}/api/auth/refresh`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ refresh_token: refreshToken }),
+                });
+                if (!response.ok) {
+                    // Another tab may have rotated the token in the meantime
+                    if (localStorage.getItem('refreshToken') !== refreshToken) {
+                        return localStorage.getItem('token');
+                    }
+                    if (response.status === 401) {
+                        clearTokens();
+                    }
+                    return null;
+                }
+                const data = await response.json();
+                storeTokens(data.token, data.refreshToken);
+                return data.token as string;
+            } catch {
+                return null;
+            } finally {
+                refreshing = null;
+            }
+        })();
+    }
+    return refreshing;
+}
+
+// The stored access token, renewed first if it is about to expire
+export async function getAccessToken(): Promise<string | null> {
+    const token = localStorage.getItem('token');
+    if (token && expiresSoon(token) && localStorage.getItem('refreshToken')) {
+        return (await refreshAccessToken()) ?? token;
+    }
+    return token;
+}
+
+async function fetchAPI<T>(endpoint: string, options: FetchOptions = {}, retried = false): Promise<T> {
     const { timeout = DEFAULT_TIMEOUT, ...fetchOptions } = options;
     const url = `${API_URL}${endpoint}`;
-    const token = localStorage.getItem('token');
+    const isAuthEndpoint = endpoint === '/api/auth/login' || endpoint === '/api/auth/register';
+    const token = isAuthEndpoint ? localStorage.getItem('token') : await getAccessToken();
 
     const controller = new AbortController();
     const id = setTimeout(() => controller.abort(), timeout);
@@ -50,6 +121,12 @@ async function fetchAPI<T>(endpoint: string, options: FetchOptions = {}): Promis
         const data = await response.json();
 
         if (!response.ok) {
+            // Expired or revoked access token: refresh once and retry
+            if (token && !retried && !isAuthEndpoint
+                && (response.status === 401 || data.error === 'Invalid token.')
+                && await refreshAccessToken()) {
+                return fetchAPI<T>(endpoint, options, true);
+            }
             throw new Error(data.error || 'API request failed');
         }
 
@@ -206,6 +283,12 @@ export const register = (userData: Record<string, unknown>): Promise<AuthRespons
 export const getMe = (): Promise<ApiResponse<User>> =>
     fetchAPI('/api/auth/me');
 
+export const logout = (): Promise<ApiResponse<null>> =>
+    fetchAPI('/api/auth/logout', {
+        method: 'POST',
+        body: JSON.stringify({ refresh_token: localStorage.getItem('refreshToken') }),
+    });
+
 // Blood Banks (additional)
 export const getFloodBanks = getBloodBanks; // Alias
 
@@ -1,22 +1,36 @@
 import { io, Socket } from 'socket.io-client';
+import { getAccessToken } from './api';
 
 const SOCKET_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
 
 class SocketService {
     private socket: Socket | null = null;
     private listeners: Map<string, Set<(data: unknown) => void>> = new Map();
+    private heartbeat: ReturnType<typeof setInterval> | null = null;
 
     connect(): Socket {
         if (!this.socket) {
             this.socket = io(SOCKET_URL, {
                 transports: ['websocket', 'polling'],
                 withCredentials: true,
+                // Re-read on every (re)connect so login/logout take effect,
+                // refreshing an access token that has expired meanwhile
+                auth: (cb) => {
+                    getAccessToken().then((token) => cb({ token }), () => cb({ token: localStorage.getItem('token') }));
+                },
             });
 
             this.socket.on('connect', () => {
                 console.log('Socket connected:', this.socket?.id);
             });
 
+            // Keeps signed-in donors marked online for instant alerts
+            this.heartbeat = setInterval(() => {
+                if (this.socket?.connected) {
+                    this.socket.emit('heartbeat');
+                }
+            }, 30000);
+
             this.socket.on('disconnect', () => {
                 console.log('Socket disconnected');
             });
@@ -30,6 +44,10 @@ class SocketService {
     }
 
     disconnect(): void {
+        if (this.heartbeat) {
+            clearInterval(this.heartbeat);
+            this.heartbeat = null;
+        }
         if (this.socket) {
             this.socket.disconnect();
             this.socket = null;
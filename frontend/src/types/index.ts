@@ -58,6 +58,8 @@ export interface RegisterData extends LoginCredentials {
 export interface AuthResponse {
     success: boolean;
     token: string;
+    refreshToken?: string;
+    expiresIn?: number;
     user: User;
 }
 
@@ -262,15 +264,26 @@ export interface AdminUser {
 // Socket Event Types
 // ============================================
 
+// Versioned entity update: the whole entity when `full`, else changed fields only
+export interface EntityUpdate<T> {
+    id: number;
+    version: number;
+    source: string;
+    full: boolean;
+    data?: T;
+    changes?: Partial<T>;
+}
+
 export interface SocketEvents {
     'connected': { message: string; timestamp: string };
     'critical-requests': BloodRequest[];
     'stats-update': { requests: RequestStats; donors: DonorStats; inventory: TotalInventory[] };
-    'donor-updated': Donor;
+    'donor-updated': EntityUpdate<Pick<Donor, 'id' | 'name' | 'blood_type' | 'city' | 'available' | 'last_donation'>>;
     'new-request': BloodRequest;
     'critical-alert': BloodRequest;
-    'request-updated': BloodRequest;
-    'request-fulfilled': BloodRequest;
+    'request-updated': EntityUpdate<BloodRequest>;
+    'request-fulfilled': { request_id: number; donor_id: number | null };
+    'entity-state': EntityUpdate<BloodRequest> & { entity: 'request' | 'donor' };
     'error': { message: string };
 }
 